@@ -0,0 +1,352 @@
+"""
+The API of server.py as an ASGI app on AsyncHermes. A request waiting on TFRRS is a suspended coroutine instead of
+a blocked thread, so one process holds as many requests in flight as the upstream connection pool allows.
+The routes, headers, status codes and InvalidAPIUsage error bodies are the same as server.py.
+
+    uvicorn asgi_server:create_app --factory --port 5000
+    python asgi_server.py --port 5000      # serves the app with aiohttp when no ASGI server is installed
+
+Importing the module does not build the app (nor open athlete_index.json), create_app does.
+
+Pages are parsed on the event loop's executor, and TFRRS is reached through one pooled aiohttp session
+with HERMES_UPSTREAM_CONNECTIONS connections (256 by default). Requests to TFRRS are also rate limited to
+HERMES_UPSTREAM_RATE a second (5 by default, bursts of 10, 0 for no limit), and at the default rate that is
+what bounds the downloads in flight: the connections only fill up when the rate is raised or turned off,
+ie in front of a mirror or an archive.
+"""
+import argparse, asyncio, hashlib, json, os, time
+from urllib.parse import parse_qs
+
+from src.async_hermes import AsyncHermes, AsyncTransport
+from src.athletes import AthleteIndex
+from src.cache import DEFAULT_TTLS, PageCache
+from src.errors import InvalidAPIUsage
+from src.hermes import NoAthleteFoundException, NoTeamFoundException, NoMeetFoundException, results_cursor
+from src.marks import parse_since
+from src.metrics import Metrics
+from src.transport import UpstreamException
+
+UPSTREAM_CONNECTIONS = int(os.environ.get('HERMES_UPSTREAM_CONNECTIONS', 256))
+UPSTREAM_RATE = float(os.environ.get('HERMES_UPSTREAM_RATE', 5)) # requests a second to TFRRS, 0 for no limit
+PAST_SEASON_MAX_AGE = 7 * 24 * 60 * 60 # past seasons do not change so clients can keep them for a long time
+MAX_VALIDATORS = 4096
+
+
+class Request:
+    def __init__(self, scope):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.full_path = self.path + '?' + scope.get('query_string', b'').decode('latin-1')
+        self.args = {name: values[0] for name, values in parse_qs(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True).items()}
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope.get('headers', ())}
+
+    def if_none_match(self):
+        value = self.headers.get('if-none-match', '')
+        return {tag.strip().removeprefix('W/').strip('"') for tag in value.split(',') if tag.strip()}
+
+
+class Response:
+    def __init__(self, body=b'', status=200, content_type='application/json', headers=None, chunks=None):
+        """
+        A response to send over ASGI. chunks is an async iterator of bytes sent one after the other instead of body.
+        """
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+        if content_type is not None:
+            self.headers['content-type'] = content_type
+        self.chunks = chunks
+
+    @classmethod
+    def json(cls, data, status=200):
+        return cls((json.dumps(data, sort_keys=True, separators=(',', ':')) + '\n').encode(), status)
+
+    async def send(self, send, head=False):
+        headers = [(name.encode('latin-1'), str(value).encode('latin-1')) for name, value in self.headers.items()]
+        if self.chunks is None:
+            headers.append((b'content-length', str(len(self.body)).encode()))
+        await send({'type': 'http.response.start', 'status': self.status, 'headers': headers})
+        if self.chunks is None or head:
+            await send({'type': 'http.response.body', 'body': b'' if head else self.body})
+            return
+        async for chunk in self.chunks:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+class API:
+    def __init__(self, hermes, metrics=None):
+        """
+        The ASGI app. Every route reads its arguments from the query string like server.py.
+
+        Parameters
+        ----------
+        hermes : AsyncHermes
+            what the routes scrape with, shared by every request
+
+        metrics : Metrics
+            where request counts and cache stats are kept for /metrics
+        """
+        self.hermes = hermes
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.http_requests = self.metrics.counter('hermes_http_requests_total', 'Requests to the API by route and status', ('endpoint', 'status'))
+        self.cache_gauges = self.metrics.gauge('hermes_page_cache', 'Page cache counters and size', ('stat',))
+        self.validators = {} # request path -> (etag, expires_at, max_age) of the last response sent for it
+        self.routes = {
+            '/athlete-bests': self.get_athlete_bests,
+            '/athlete-results': self.get_athlete_results,
+            '/athlete-bests-by-id': self.get_athlete_bests_by_id,
+            '/athlete-results-by-id': self.get_athlete_results_by_id,
+            '/roster': self.get_roster,
+            '/top-performances': self.get_top_perfs,
+            '/team-athletes': self.get_team_athletes,
+            '/meets': self.get_meets,
+            '/meet-results': self.get_meet_results,
+            '/meet-results-by-id': self.get_meet_results_by_id,
+            '/meet-search': self.search_meets,
+            '/metrics': self.get_metrics,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        request = Request(scope)
+        route = self.routes.get(request.path)
+        try:
+            if route is None:
+                raise InvalidAPIUsage("Not found.", status_code=404)
+            if request.method not in ('GET', 'HEAD'):
+                raise InvalidAPIUsage("Method not allowed.", status_code=405)
+            response = await route(request)
+        except InvalidAPIUsage as e:
+            response = Response.json(e.to_dict(), e.status_code)
+        self.http_requests.inc(endpoint=route.__name__ if route is not None else 'unknown', status=response.status)
+        await response.send(send, head=request.method == 'HEAD')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.hermes.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def get_athlete_bests(self, request):
+        headers = ['Name','State', 'Team-name', 'Gender', 'Season']
+        return await self.perform_request(request, self.hermes.get_athlete_bests, headers, kind='athlete')
+
+    async def get_athlete_results(self, request):
+        headers = ['Name','State', 'Team-name', 'Gender', 'Season']
+        return await self.perform_request(request, self.synced(request, self.hermes.get_athlete_results), headers, stream=True, kind='athlete')
+
+    async def get_athlete_bests_by_id(self, request):
+        headers = ['Athlete-id']
+        return await self.perform_request(request, self.hermes.get_athlete_bests_by_id, headers, kind='athlete')
+
+    async def get_athlete_results_by_id(self, request):
+        headers = ['Athlete-id']
+        return await self.perform_request(request, self.synced(request, self.hermes.get_athlete_results_by_id), headers, stream=True, kind='athlete')
+
+    async def get_roster(self, request):
+        headers = ['State', 'Team-name', 'Gender', 'Season']
+        return await self.perform_request(request, self.hermes.get_roster, headers, kind='team')
+
+    async def get_top_perfs(self, request):
+        headers = ['State', 'Team-name', 'Gender', 'Season']
+        return await self.perform_request(request, self.hermes.get_top_performances, headers, kind='team')
+
+    async def get_team_athletes(self, request):
+        headers = ['State', 'Team-name', 'Gender', 'Season']
+        include = tuple(request.args.get('Include', 'bests,results').split(','))
+        if not set(include) <= {'bests', 'results'}:
+            raise InvalidAPIUsage("Include can only be bests, results or bests,results.")
+        async def get_team_athletes(*args):
+            return await self.hermes.get_team_athletes(*args, include=include)
+        return await self.perform_request(request, get_team_athletes, headers, stream=True, kind='athlete')
+
+    async def get_meets(self, request):
+        return await self.perform_request(request, self.hermes.get_meets, kind='meets')
+
+    async def get_meet_results(self, request):
+        headers = ['Meet-name', 'Gender']
+        return await self.perform_request(request, self.hermes.get_meet_results, headers, stream=True, kind='meet')
+
+    async def get_meet_results_by_id(self, request):
+        headers = ['Meet-id', 'Gender']
+        return await self.perform_request(request, self.hermes.get_meet_results_by_id, headers, stream=True, kind='meet')
+
+    async def search_meets(self, request):
+        headers = ['Query']
+        return await self.perform_request(request, self.hermes.search_meets, headers, kind='meets')
+
+    async def get_metrics(self, request):
+        if self.hermes.cache is not None:
+            for stat, value in self.hermes.cache.stats().items():
+                self.cache_gauges.set(value, stat=stat)
+        return Response(self.metrics.render().encode(), content_type='text/plain; version=0.0.4')
+
+    def synced(self, request, method):
+        """
+        With a since watermark in the query string, the athlete results method returns only the meets since it
+        along with the cursor to sync from next time (see server.synced).
+        """
+        since = request.args.get('since')
+        if since is None:
+            return method
+        try:
+            since = parse_since(since)
+        except ValueError:
+            raise InvalidAPIUsage("since has to be a date like 2022-05-18.")
+        async def sync(*args):
+            meet_results = await method(*args, since=since)
+            if request.args.get('stream') == '1':
+                return meet_results
+            return {'results': meet_results, 'cursor': results_cursor(meet_results, since)}
+        return sync
+
+    async def perform_request(self, request, method, headers=None, stream=False, kind='other'):
+        header_vals = [request.args.get(header) for header in headers or ()]
+        if None in header_vals:
+            raise InvalidAPIUsage("Check that headers are correct.")
+        try:
+            if stream and request.args.get('stream') == '1':
+                return self.stream_ndjson(await method(*header_vals))
+            remembered = self.validators.get(request.full_path)
+            if remembered is not None and time.monotonic() < remembered[1] and remembered[0] in request.if_none_match():
+                return self.not_modified(remembered[0], remembered[2])
+            data = await method(*header_vals)
+            return await self.validated_response(request, data, kind, header_vals)
+        except NoAthleteFoundException as e:
+            raise InvalidAPIUsage(message=e.message, status_code=404)
+        except NoTeamFoundException as e:
+            raise InvalidAPIUsage(message=e.message, status_code=404)
+        except NoMeetFoundException as e:
+            raise InvalidAPIUsage(message=e.message, status_code=404)
+        except UpstreamException as e:
+            raise InvalidAPIUsage(message=e.message, status_code=502)
+
+    def stream_ndjson(self, items):
+        """
+        Sends a result that has already been read whole as one line of json per item. AsyncHermes returns
+        lists, so this is the NDJSON framing only: it does not send the first line sooner or use less memory.
+        """
+        async def lines():
+            for item in items:
+                yield (json.dumps(item) + '\n').encode()
+        return Response(content_type='application/x-ndjson', chunks=lines())
+
+    async def get_max_age(self, kind, header_vals):
+        if kind == 'team' and await self.hermes.is_past_season(*header_vals):
+            return PAST_SEASON_MAX_AGE
+        return DEFAULT_TTLS.get(kind, DEFAULT_TTLS['other'])
+
+    def not_modified(self, etag, max_age):
+        return Response(status=304, content_type=None, headers={'etag': f'"{etag}"', 'cache-control': f'public, max-age={max_age}'})
+
+    async def validated_response(self, request, data, kind, header_vals):
+        """
+        Sends data as json with a content hash ETag and a Cache-Control max-age, remembering the ETag for max-age
+        like server.validated_response.
+        """
+        max_age = await self.get_max_age(kind, header_vals)
+        response = Response.json(data)
+        etag = hashlib.sha1(response.body).hexdigest()
+        now = time.monotonic()
+        if len(self.validators) >= MAX_VALIDATORS:
+            for path, (_, expires_at, _) in list(self.validators.items()):
+                if expires_at <= now:
+                    del self.validators[path]
+            if len(self.validators) >= MAX_VALIDATORS:
+                self.validators.clear()
+        self.validators[request.full_path] = (etag, now + max_age, max_age)
+        if etag in request.if_none_match() or '*' in request.if_none_match():
+            return self.not_modified(etag, max_age)
+        response.headers.update({'etag': f'"{etag}"', 'cache-control': f'public, max-age={max_age}'})
+        return response
+
+
+async def serve(app, host='127.0.0.1', port=5000):
+    """
+    Starts an ASGI app on aiohttp's web server, for when no ASGI server (uvicorn, hypercorn) is installed.
+
+    Returns
+    -------
+    aiohttp.web.AppRunner
+        the running server, clean it up to stop it
+    """
+    from aiohttp import web
+
+    async def handle(request):
+        scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': request.method,
+                 'path': request.path, 'raw_path': request.raw_path.encode(), 'query_string': request.query_string.encode(),
+                 'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in request.headers.items()]}
+        body = await request.read()
+        response = None
+        async def receive():
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        async def send(message):
+            nonlocal response
+            if message['type'] == 'http.response.start':
+                response = web.StreamResponse(status=message['status'])
+                for name, value in message['headers']:
+                    response.headers.add(name.decode('latin-1'), value.decode('latin-1'))
+                await response.prepare(request)
+            elif message.get('body'):
+                await response.write(message['body'])
+        await app(scope, receive, send)
+        await response.write_eof()
+        return response
+
+    server = web.Application()
+    server.router.add_route('*', '/{path:.*}', handle)
+    runner = web.AppRunner(server)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def create_app():
+    """
+    Builds the API on an AsyncHermes with the page cache, the athlete index in athlete_index.json and the
+    upstream connections and rate of the environment. See the module docstring.
+    """
+    transport = AsyncTransport(pool_size=UPSTREAM_CONNECTIONS, rate=UPSTREAM_RATE)
+    hermes = AsyncHermes(cache=PageCache(), athletes=AthleteIndex('athlete_index.json'), transport=transport, concurrency=UPSTREAM_CONNECTIONS)
+    return API(hermes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args(argv)
+    app = create_app()
+    try:
+        import uvicorn
+    except ImportError:
+        uvicorn = None
+    if uvicorn is not None:
+        uvicorn.run(app, host=args.host, port=args.port)
+        return
+
+    async def run():
+        runner = await serve(app, args.host, args.port)
+        print(f'serving on http://{args.host}:{args.port}')
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await app.hermes.close()
+            await runner.cleanup()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Offline benchmarks for Hermes over the saved TFRRS fixtures and synthetic scaled up pages.
+
+    python -m benchmarks.bench_hermes              # run and compare against benchmarks/baseline.json
+    python -m benchmarks.bench_hermes --save       # run and save the numbers as the new baseline
+    python -m benchmarks.bench_hermes --processes 4  # also compare parsing meets on threads and on a pool of 4 processes
+
+Every case runs a public Hermes method (or a table helper) through a stub transport that serves pages from memory.
+For each case this reports
+    parse_ms          time to parse the pages the case downloads
+    extract_ms        time for the method itself once its pages are parsed and cached
+    extract_alloc_kb  memory allocated while extracting (tracemalloc peak)
+    peak_kb           peak memory of a cold run that downloads, parses and extracts
+With --processes, 8 synthetic meets are read at once from 8 threads, first parsed on the threads and then on a ParsePool,
+and the pages per second of both are reported. Times are the median of --repeat runs. A case is a regression when its parse_ms + extract_ms or its peak_kb
+grow by more than --threshold over the baseline. Baselines are machine specific, save one on the machine you compare on.
+"""
+import argparse, gc, json, os, statistics, sys, time, tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cache import PageCache, ResultCache, page_type
+from src.hermes import Hermes, get_table_data, read_table
+from src.parsing import DEFAULT_PARSER, parse
+from src.pool import ParsePool
+from benchmarks.synthetic import meet_page, meets_page
+
+HTML_FILES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'html_files')
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+FIXTURES = {
+    'https://www.tfrrs.org/teams/PA_college_m_Moravian.html': 'main_moravian.html',
+    'https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255': 'moravian_outdoor_2022.html',
+    'https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html': 'distance.html',
+    'https://www.tfrrs.org//athletes/6537261/Moravian/Shane_Mastro.html': 'thrower.html',
+    'https://www.tfrrs.org//athletes/7983217/Moravian/Trevor_Gray.html': 'sprinter.html',
+    'https://www.tfrrs.org/results_search.html': 'results_search.html',
+    'http://www.tfrrs.org/results/xc/20871/m/_Landmark_Conference_Championships': 'meet_results.html',
+}
+TEAM = ('PA', 'Moravian', 'm', '2022_Outdoor')
+THROWER_URL = 'https://www.tfrrs.org//athletes/6537261/Moravian/Shane_Mastro.html'
+SYNTHETIC_MEET_URL = 'https://www.tfrrs.org/results/99999/m/'
+
+
+class Stub_Transport:
+    """
+    Serves pages from memory and records which urls were downloaded.
+    """
+    def __init__(self, pages):
+        self.pages = pages
+        self.downloads = []
+
+    def get(self, url):
+        self.downloads.append(url)
+        return self.pages[url]
+
+
+def load_pages():
+    pages = {}
+    for url, name in FIXTURES.items():
+        with open(os.path.join(HTML_FILES, name), 'rb') as f:
+            pages[url] = f.read()
+    pages[SYNTHETIC_MEET_URL] = meet_page(rows=5000)
+    return pages
+
+
+def read_thrower_tables(hermes):
+    tables = hermes.get_soup(THROWER_URL).find(id='meet-results').find_all('table')
+    return [get_table_data(table, ['event', 'result', 'place']) for table in tables]
+
+
+def read_synthetic_tables(hermes):
+    return [read_table(table, same_size=True) for table in hermes.get_soup(SYNTHETIC_MEET_URL).find_all('table')]
+
+
+# name -> (pages replacing the defaults or None, call)
+CASES = {
+    'get_year_keys': (None, lambda hermes: hermes.get_year_keys(*TEAM[:3])),
+    'get_roster': (None, lambda hermes: hermes.get_roster(*TEAM)),
+    'get_top_performances': (None, lambda hermes: hermes.get_top_performances(*TEAM)),
+    'get_athlete_bests[thrower]': (None, lambda hermes: hermes.get_athlete_bests('Mastro_Shane', *TEAM)),
+    'get_athlete_results[thrower]': (None, lambda hermes: hermes.get_athlete_results('Mastro_Shane', *TEAM)),
+    'get_athlete_results[distance]': (None, lambda hermes: hermes.get_athlete_results('Houghton_Shane', *TEAM)),
+    'get_athlete_results[sprinter]': (None, lambda hermes: hermes.get_athlete_results('Gray_Trevor', *TEAM)),
+    'get_athlete_results[thrower, columnar]': (None, lambda hermes: hermes.get_athlete_results('Mastro_Shane', *TEAM, columnar=True)),
+    'get_meets': (None, lambda hermes: hermes.get_meets()),
+    'get_meet_results': (None, lambda hermes: hermes.get_meet_results('Landmark Conference Championships', 'm')),
+    'get_meet_results[5000 rows]': (None, lambda hermes: hermes.get_meet_results_by_id('99999', 'm')),
+    'get_meet_results[5000 rows, compact]': (None, lambda hermes: hermes.get_meet_results_by_id('99999', 'm', compact=True)),
+    'search_meets[2000 meets]': ({'https://www.tfrrs.org/results_search.html': meets_page(2000)},
+                                 lambda hermes: hermes.search_meets('Drew Invit')),
+    'get_table_data[thrower]': (None, read_thrower_tables),
+    'read_table[5000 rows]': (None, read_synthetic_tables),
+}
+
+
+def median_time(function, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def allocated(function):
+    """
+    Returns the peak memory in KB allocated while function runs.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_case(name, pages, repeat=5, parser=DEFAULT_PARSER):
+    """
+    Runs one case and returns its numbers. See the module docstring for what they mean.
+    """
+    replacements, call = CASES[name]
+    pages = dict(pages, **(replacements or {}))
+    transport = Stub_Transport(pages)
+    new_hermes = lambda cache: Hermes(cache=cache, transport=transport, parser=parser)
+
+    peak_kb = allocated(lambda: call(new_hermes(PageCache())))
+    cache = PageCache()
+    transport.downloads = []
+    call(new_hermes(cache)) # warms the cache so the timed runs only extract
+    downloaded = list(transport.downloads)
+    parse_ms = median_time(lambda: [parse(pages[url], parser, url) for url in downloaded], repeat)
+    extract_ms = median_time(lambda: call(new_hermes(cache)), repeat)
+    extract_alloc_kb = allocated(lambda: call(new_hermes(cache)))
+    types = sorted({page_type(url) for url in downloaded})
+    return {'page_type': '+'.join(types), 'parse_ms': round(parse_ms, 3), 'extract_ms': round(extract_ms, 3),
+            'extract_alloc_kb': round(extract_alloc_kb, 1), 'peak_kb': round(peak_kb, 1)}
+
+
+def run(names=None, repeat=5, parser=DEFAULT_PARSER):
+    pages = load_pages()
+    return {name: run_case(name, pages, repeat, parser) for name in (names or CASES)}
+
+
+def throughput(processes, meets=8, rows=2000, repeat=3, parser=DEFAULT_PARSER):
+    """
+    Reads meets synthetic meets at once from as many threads, parsing on the threads and then on a ParsePool of processes workers.
+
+    Returns
+    -------
+    dict
+        the pages per second read with 'threads' and with the 'pool'
+    """
+    pages = {f'https://www.tfrrs.org/results/{90000 + i}/m/': meet_page(rows) for i in range(meets)}
+    def read_all(pool):
+        hermes = Hermes(transport=Stub_Transport(pages), parser=parser, pool=pool, results=ResultCache() if pool else None)
+        with ThreadPoolExecutor(meets) as threads:
+            list(threads.map(lambda i: hermes.get_meet_results_by_id(str(90000 + i), 'm', compact=True), range(meets)))
+    results = {'threads': round(meets / median_time(lambda: read_all(None), repeat) * 1000, 2)}
+    with ParsePool(processes) as pool:
+        results['pool'] = round(meets / median_time(lambda: read_all(pool), repeat) * 1000, 2)
+    return results
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Returns
+    -------
+    list
+        a message for every case that got slower or bigger than the baseline by more than threshold
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        old_ms, new_ms = before['parse_ms'] + before['extract_ms'], result['parse_ms'] + result['extract_ms']
+        if new_ms > old_ms * (1 + threshold):
+            regressions.append(f'{name}: {old_ms:.2f} ms -> {new_ms:.2f} ms')
+        if result['peak_kb'] > before['peak_kb'] * (1 + threshold):
+            regressions.append(f"{name}: peak {before['peak_kb']:.0f} KB -> {result['peak_kb']:.0f} KB")
+    return regressions
+
+
+def report(results):
+    columns = ('page_type', 'parse_ms', 'extract_ms', 'extract_alloc_kb', 'peak_kb')
+    width = max(len(name) for name in results)
+    lines = [f"{'case':<{width}}  " + '  '.join(f'{column:>16}' for column in columns)]
+    for name, result in results.items():
+        lines.append(f'{name:<{width}}  ' + '  '.join(f'{result[column]:>16}' for column in columns))
+    by_type = {}
+    for result in results.values():
+        by_type.setdefault(result['page_type'], []).append(result)
+    lines.append('')
+    for kind, kind_results in sorted(by_type.items()):
+        lines.append(f"{kind:<{width}}  parse {sum(r['parse_ms'] for r in kind_results):.2f} ms, "
+                     f"extract {sum(r['extract_ms'] for r in kind_results):.2f} ms over {len(kind_results)} cases")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='only run cases whose name contains this')
+    parser.add_argument('--parser', default=DEFAULT_PARSER)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--processes', type=int, help='also measure parsing meets on a pool of this many processes')
+    args = parser.parse_args(argv)
+
+    names = [name for name in CASES if args.only is None or args.only in name]
+    results = run(names, args.repeat, args.parser)
+    print(report(results))
+    if args.processes:
+        pages_per_second = throughput(args.processes, repeat=args.repeat, parser=args.parser)
+        print(f"\nmeets read at once: {pages_per_second['threads']} pages/s on threads, "
+              f"{pages_per_second['pool']} pages/s on {args.processes} processes")
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nsaved baseline to {args.baseline}')
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        print('\n' + ('\n'.join(['regressions:'] + regressions) if regressions else 'no regressions against the baseline'))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Load test of the ASGI server against a local stand-in for TFRRS that serves the saved fixtures.
+
+    python -m benchmarks.load_test --requests 500 --concurrency 200 --latency 0.1
+
+The stand-in answers every page after --latency seconds, like a slow TFRRS, and counts how many of its requests
+overlap. The API runs on AsyncHermes without a page cache, so a request only skips TFRRS when another request is
+already downloading the same page (or for the season keys and meet index AsyncHermes remembers). --concurrency clients send a mix of roster, athlete and meet requests over HTTP, and the report has the
+requests per second, the latency percentiles, the status codes and the most upstream requests in flight at once.
+"""
+import argparse, asyncio, os, statistics, sys, time
+from urllib.parse import quote
+
+from asgi_server import API, serve
+from benchmarks.bench_hermes import FIXTURES, HTML_FILES
+from src.async_hermes import AsyncHermes, AsyncTransport
+
+TEAM = 'State=PA&Team-name=Moravian&Gender=m&Season=2022_Outdoor'
+PATHS = [
+    f'/roster?{TEAM}',
+    f'/top-performances?{TEAM}',
+    f'/athlete-results?Name=Mastro_Shane&{TEAM}',
+    f'/athlete-bests?Name=Houghton_Shane&{TEAM}',
+    f'/athlete-results?Name=Gray_Trevor&{TEAM}&since=2022-04-01',
+    '/meets',
+    '/meet-results?Meet-name=Landmark Conference Championships&Gender=m',
+]
+
+
+class StandIn:
+    def __init__(self, pages, latency=0.05):
+        """
+        A local TFRRS serving pages from memory at /page?url=<the TFRRS url>, and 404 for anything else.
+        """
+        self.pages = pages
+        self.latency = latency
+        self.requests = 0
+        self.running = 0
+        self.most_running = 0
+
+    async def handle(self, request):
+        from aiohttp import web
+        self.requests += 1
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            await asyncio.sleep(self.latency)
+            page = self.pages.get(request.query.get('url'))
+            if page is None:
+                return web.Response(status=404, text='<html><body>Page not found</body></html>', content_type='text/html')
+            return web.Response(body=page, content_type='text/html')
+        finally:
+            self.running -= 1
+
+    async def start(self, host='127.0.0.1', port=0):
+        from aiohttp import web
+        server = web.Application()
+        server.router.add_get('/page', self.handle)
+        self.runner = web.AppRunner(server)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        self.url = f'http://{host}:{site._server.sockets[0].getsockname()[1]}/page?url='
+        return self
+
+
+class StandInTransport(AsyncTransport):
+    """
+    AsyncTransport that sends every TFRRS url to the stand-in instead.
+    """
+    def __init__(self, stand_in_url, **kwargs):
+        super().__init__(**kwargs)
+        self.stand_in_url = stand_in_url
+
+    async def get(self, url):
+        return await super().get(self.stand_in_url + quote(url, safe=''))
+
+
+def load_pages():
+    pages = {}
+    for url, name in FIXTURES.items():
+        with open(os.path.join(HTML_FILES, name), 'rb') as f:
+            pages[url] = f.read()
+    return pages
+
+
+async def run_load(requests=500, concurrency=200, latency=0.05, connections=256):
+    """
+    Starts the stand-in and the API on local ports, sends requests from concurrency clients and returns the numbers.
+    See the module docstring.
+    """
+    import aiohttp
+    stand_in = await StandIn(load_pages(), latency).start()
+    transport = StandInTransport(stand_in.url, pool_size=connections, rate=None, retries=0)
+    api = API(AsyncHermes(transport=transport, concurrency=connections))
+    runner = await serve(api, '127.0.0.1', 0)
+    port = runner.addresses[0][1]
+    latencies, statuses = [], {}
+    queue = iter(range(requests))
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=concurrency)) as session:
+            async def client():
+                for i in queue:
+                    start = time.perf_counter()
+                    async with session.get(f'http://127.0.0.1:{port}{PATHS[i % len(PATHS)]}') as response:
+                        await response.read()
+                    latencies.append(time.perf_counter() - start)
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+            start = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(concurrency)))
+            seconds = time.perf_counter() - start
+    finally:
+        await api.hermes.close()
+        await runner.cleanup()
+        await stand_in.runner.cleanup()
+    latencies.sort()
+    return {
+        'requests': requests,
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(requests / seconds, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        'statuses': statuses,
+        'upstream_requests': stand_in.requests,
+        'most_upstream_in_flight': stand_in.most_running,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=200, help='clients sending requests at the same time')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the stand-in takes to answer each page')
+    parser.add_argument('--connections', type=int, default=256, help='the most connections to the stand-in')
+    args = parser.parse_args(argv)
+    results = asyncio.run(run_load(args.requests, args.concurrency, args.latency, args.connections))
+    for name, value in results.items():
+        print(f'{name:>24}  {value}')
+    return 0 if set(results['statuses']) == {200} else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Scaled up TFRRS pages for the benchmarks, built in the same shape as the saved fixtures
+so Hermes reads them exactly like the real ones.
+"""
+
+EVENTS = [("Men's 100 Meters", 'TIME', '10.{:02d}'), ("Men's 1500 Meters", 'TIME', '3:{:02d}.12'),
+          ("Men's 5000 Meters", 'TIME', '14:{:02d}.40'), ("Men's Long Jump", 'MARK', '7.{:02d}m'),
+          ("Men's Shot Put", 'MARK', '15.{:02d}m')]
+TEAMS = ['Moravian', 'Scranton', 'Susquehanna', 'Juniata', 'Catholic', 'Drew', 'Elizabethtown', 'Goucher']
+YEARS = ['FR-1', 'SO-2', 'JR-3', 'SR-4']
+
+
+def meet_page(rows=5000, events=10):
+    """
+    A meet results page with rows results spread evenly over events event tables.
+
+    Returns
+    -------
+    bytes
+        the html of the page
+    """
+    per_event = rows // events
+    parts = ['<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n<title>TFRRS | Synthetic Invitational</title>\n</head>\n'
+             '<body class=" page-body">\n<div class="page-container">\n  <div class="panel">\n    <div class="panel-body">\n']
+    for e in range(events):
+        event, mark_header, mark = EVENTS[e % len(EVENTS)]
+        parts.append(f'      <div class="row">\n        <div class="col-lg-12">\n'
+                     f'          <div class="custom-table-title custom-table-title-tf">\n            <h3 class="font-weight-500">\n'
+                     f'              {event} Heat {e // len(EVENTS) + 1}\n              Final\n            </h3>\n          </div>\n'
+                     f'          <table class="tablesaw table-striped table-bordered table-hover" data-tablesaw-mode="columntoggle">\n'
+                     f'            <thead>\n            <tr>\n')
+        for header in ('PL', 'NAME', 'YEAR', 'TEAM', mark_header, 'SCORE'):
+            parts.append(f'              <th data-tablesaw-priority="persist" scope="col">{header}\n              </th>\n')
+        parts.append('            </tr>\n            </thead>\n            <tbody>\n')
+        for i in range(per_event):
+            athlete = e * per_event + i
+            parts.append(f'            <tr>\n              <td>{i + 1}</td>\n              <td>\n'
+                         f'                <a data-turbo-frame="_top" data-turbo="false" href="https://www.tfrrs.org/athletes/{8000000 + athlete}.html">'
+                         f'Athlete{athlete}, Synthetic</a>\n              </td>\n'
+                         f'              <td>{YEARS[athlete % len(YEARS)]}</td>\n              <td>{TEAMS[athlete % len(TEAMS)]}</td>\n'
+                         f'              <td>{mark.format(i % 60)}</td>\n              <td>{i + 1 if i < 50 else ""}</td>\n            </tr>\n')
+        parts.append('            </tbody>\n          </table>\n        </div>\n      </div>\n')
+    parts.append('    </div>\n  </div>\n</div>\n</body>\n</html>\n')
+    return ''.join(parts).encode()
+
+
+def meets_page(meets=2000):
+    """
+    A results search page listing meets meets.
+
+    Returns
+    -------
+    bytes
+        the html of the page
+    """
+    parts = ['<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n<title>TFRRS | Latest Results</title>\n</head>\n'
+             '<body class=" page-body">\n      <table class="tablesaw table-striped table-bordered table-hover" data-tablesaw-mode="columntoggle">\n'
+             '        <thead>\n        <tr>\n          <th scope="col">DATE</th>\n          <th scope="col">MEET</th>\n'
+             '          <th scope="col">SPORT</th>\n          <th scope="col">STATE</th>\n        </tr>\n        </thead>\n        <tbody>\n']
+    for i in range(meets):
+        name = f'{TEAMS[i % len(TEAMS)]} Invitational {i}'
+        parts.append(f'        <tr>\n          <td>Oct {i % 28 + 1}, 2022</td>\n          <td>\n'
+                     f'            <a data-turbo-frame="_top" data-turbo="false" href="//www.tfrrs.org/results/xc/{30000 + i}/NCAA_{name.replace(" ", "_")}">{name}</a>\n'
+                     f'          </td>\n          <td>XC</td>\n          <td>PA</td>\n        </tr>\n')
+    parts.append('        </tbody>\n      </table>\n</body>\n</html>\n')
+    return ''.join(parts).encode()
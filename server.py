@@ -1,27 +1,45 @@
-from flask import Flask, jsonify, request
-from src.hermes import Hermes, NoAthleteFoundException, NoTeamFoundException
+import hashlib, json, os, threading, time
+from functools import partial
+from flask import Flask, Response, jsonify, request
+from src.hermes import Hermes, NoAthleteFoundException, NoTeamFoundException, NoMeetFoundException, results_cursor
+from src.marks import parse_since
+from src.cache import DEFAULT_TTLS, PageCache, ResultCache
+from src.athletes import AthleteIndex
+from src.store import Store
+from src.metrics import Metrics
+from src.pool import ParsePool
+from src.archive import Archive
+from src.scheduler import Refresher, Watchlist
+from src.transport import UpstreamException
+from src.errors import InvalidAPIUsage
 
 
 
 app = Flask(__name__)
-hermes = Hermes()
-
-class InvalidAPIUsage(Exception):
-    status_code = 400
-    message = 'Bad request. Check that syntax is correct and information was entered correctly.'
-    def __init__(self, message=None, status_code=None, payload=None):
-        super().__init__()
-        if message is not None:
-            self.message = message
-        if status_code is not None:
-            self.status_code = status_code
-        self.payload = payload
-
-    def to_dict(self):
-        rv = dict(self.payload or ())
-        rv['message'] = self.message
-        rv['error'] = self.status_code
-        return rv
+app.config.setdefault('SERVER_TIMING', True) # send the fetch/parse/extract split of each request in a Server-Timing header
+metrics = Metrics()
+http_requests = metrics.counter('hermes_http_requests_total', 'Requests to the API by route and status', ('endpoint', 'status'))
+cache_gauges = metrics.gauge('hermes_page_cache', 'Page cache counters and size', ('stat',))
+flight_gauges = metrics.gauge('hermes_single_flight', 'Downloads that ran and callers coalesced onto them', ('stat',))
+result_gauges = metrics.gauge('hermes_result_cache', 'Result cache counters and size', ('stat',))
+refresh_gauges = metrics.gauge('hermes_refresh_jobs', 'Runs and failures of the jobs keeping the watchlist warm', ('job', 'stat'))
+PARSE_PROCESSES = int(os.environ.get('HERMES_PARSE_PROCESSES', 0)) # parse pages on this many worker processes, 0 parses on the request threads
+STALE_TTL = 30 * 60 # results this much past their ttl are served while they are revalidated in the background
+ARCHIVE = os.environ.get('HERMES_ARCHIVE') # keep every downloaded page in this archive directory
+REPLAY = os.environ.get('HERMES_REPLAY') # serve every page from this archive directory instead of TFRRS
+hermes = Hermes(cache=PageCache(), athletes=AthleteIndex('athlete_index.json'), store=Store('hermes.db'), metrics=metrics,
+                results=ResultCache(stale_ttl=STALE_TTL), pool=ParsePool(PARSE_PROCESSES) if PARSE_PROCESSES else None,
+                archive=Archive(ARCHIVE) if ARCHIVE else None, replay=REPLAY)
+refresher = Refresher(hermes, Watchlist.from_file(os.environ['HERMES_WATCHLIST'])).start() if os.environ.get('HERMES_WATCHLIST') else None
+PAST_SEASON_MAX_AGE = 7 * 24 * 60 * 60 # past seasons do not change so clients can keep them for a long time
+MAX_VALIDATORS = 4096
+validators = {} # request path -> (etag, expires_at, max_age) of the last response sent for it
+validators_lock = threading.Lock() # requests are served on several threads
+
+@app.after_request
+def count_request(response):
+    http_requests.inc(endpoint=request.endpoint or 'unknown', status=response.status_code)
+    return response
 
 @app.errorhandler(InvalidAPIUsage)
 def invalid_api_usage(e):
@@ -30,50 +48,197 @@ def invalid_api_usage(e):
 @app.route("/athlete-bests")
 def get_athlete_bests():
     headers = ['Name','State', 'Team-name', 'Gender', 'Season']
-    return perform_request(hermes.get_athlete_bests, headers)
+    return perform_request(hermes.get_athlete_bests, headers, kind='athlete')
 
 @app.route("/athlete-results") # not set on the name
 def get_athlete_results():
     headers = ['Name','State', 'Team-name', 'Gender', 'Season']
-    return perform_request(hermes.get_athlete_results, headers)
+    since = get_since(request)
+    if since is not None:
+        return perform_request(synced(hermes.get_athlete_results, since), headers,
+                               stream=partial(hermes.iter_athlete_results, since=since), kind='athlete')
+    return perform_request(hermes.get_athlete_results, headers, stream=hermes.iter_athlete_results, kind='athlete')
+
+@app.route("/athlete-bests-by-id")
+def get_athlete_bests_by_id():
+    headers = ['Athlete-id']
+    return perform_request(hermes.get_athlete_bests_by_id, headers, kind='athlete')
+
+@app.route("/athlete-results-by-id")
+def get_athlete_results_by_id():
+    headers = ['Athlete-id']
+    since = get_since(request)
+    if since is not None:
+        return perform_request(synced(hermes.get_athlete_results_by_id, since), headers,
+                               stream=partial(hermes.iter_athlete_results_by_id, since=since), kind='athlete')
+    return perform_request(hermes.get_athlete_results_by_id, headers, stream=hermes.iter_athlete_results_by_id, kind='athlete')
 
 @app.get("/roster")
 def get_roster():
     headers = ['State', 'Team-name', 'Gender', 'Season']
-    return perform_request(hermes.get_roster, headers)
+    return perform_request(hermes.get_roster, headers, kind='team')
 
 @app.get("/top-performances")
 def get_top_perfs():
     headers = ['State', 'Team-name', 'Gender', 'Season']
-    return perform_request(hermes.get_top_performances, headers)
+    return perform_request(hermes.get_top_performances, headers, kind='team')
+
+@app.get("/team-athletes")
+def get_team_athletes():
+    headers = ['State', 'Team-name', 'Gender', 'Season']
+    include = tuple(request.args.get('Include', 'bests,results').split(','))
+    if not set(include) <= {'bests', 'results'}:
+        raise InvalidAPIUsage("Include can only be bests, results or bests,results.")
+    return perform_request(partial(hermes.get_team_athletes, include=include), headers,
+                           stream=partial(hermes.iter_team_athletes, include=include), kind='athlete')
 
 @app.get("/meets")
 def get_meets():
-    return perform_request(hermes.get_meets)
+    return perform_request(hermes.get_meets, kind='meets')
 
 @app.get("/meet-results")
 def get_meet_results():
     headers = ['Meet-name', 'Gender']
-    return perform_request(hermes.get_meet_results, headers)
-
+    return perform_request(hermes.get_meet_results, headers, stream=hermes.iter_meet_results, kind='meet')
+
+@app.get("/meet-results-by-id")
+def get_meet_results_by_id():
+    headers = ['Meet-id', 'Gender']
+    return perform_request(hermes.get_meet_results_by_id, headers, stream=hermes.iter_meet_results_by_id, kind='meet')
+
+@app.get("/meet-search")
+def search_meets():
+    headers = ['Query']
+    return perform_request(hermes.search_meets, headers, kind='meets')
+
+@app.get("/metrics")
+def get_metrics():
+    if hermes.cache is not None:
+        for stat, value in hermes.cache.stats().items():
+            cache_gauges.set(value, stat=stat)
+    for stat, value in hermes.flights.stats().items():
+        flight_gauges.set(value, stat=stat)
+    if hermes.results is not None:
+        for stat, value in hermes.results.stats().items():
+            result_gauges.set(value, stat=stat)
+    if refresher is not None:
+        for job in refresher.stats():
+            refresh_gauges.set(job['runs'], job=job['name'], stat='runs')
+            refresh_gauges.set(job['failures'], job=job['name'], stat='failures')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def get_since(request):
+    """
+    Reads the optional since watermark of an incremental sync ("2022-05-18").
+    """
+    since = request.args.get('since')
+    if since is None:
+        return None
+    try:
+        return parse_since(since)
+    except ValueError:
+        raise InvalidAPIUsage("since has to be a date like 2022-05-18.")
+
+def synced(method, since):
+    """
+    Wraps an athlete results method so it only returns the meets since the watermark, along with the cursor to sync from next time.
+    """
+    def sync(*args):
+        meet_results = method(*args, since=since)
+        return {'results': meet_results, 'cursor': results_cursor(meet_results, since)}
+    return sync
 
 def get_arg_vals(headers, request):
     vals = [request.args.get(header) for header in headers]
     return tuple(vals)
 
-def perform_request(method, headers=None):
+def stream_ndjson(items):
+    """
+    Sends each item as a line of json as it is produced. The first item is read before the response starts
+    so a missing athlete or meet is still an error response rather than a broken stream.
+
+    This Hermes has a result cache, so its generators read the whole page and keep the result before yielding
+    the first item. Streaming here only changes the framing of the response: the first byte is not sent any
+    sooner and the whole result is held in memory as with a json response.
+    """
+    items = iter(items)
+    first = next(items, None)
+    def lines():
+        if first is None:
+            return
+        yield json.dumps(first) + '\n'
+        for item in items:
+            yield json.dumps(item) + '\n'
+    return Response(lines(), mimetype='application/x-ndjson')
+
+def get_max_age(kind, header_vals):
+    """
+    How long clients may keep a response: as long as Hermes keeps the pages it came from,
+    or PAST_SEASON_MAX_AGE for team data from a season that is over.
+    """
+    if kind == 'team' and hermes.is_past_season(*header_vals):
+        return PAST_SEASON_MAX_AGE
+    return DEFAULT_TTLS.get(kind, DEFAULT_TTLS['other'])
+
+def not_modified(etag, max_age):
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+def validated_response(data, kind, header_vals):
+    """
+    Sends data as json with a content hash ETag and a Cache-Control max-age. The ETag is remembered for max-age,
+    so a request with a matching If-None-Match within it is answered with a 304 before anything is scraped or serialized.
+    """
+    max_age = get_max_age(kind, header_vals)
+    response = jsonify(data)
+    etag = hashlib.sha1(response.get_data()).hexdigest()
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    now = time.monotonic()
+    with validators_lock:
+        if len(validators) >= MAX_VALIDATORS:
+            for path, (_, expires_at, _) in list(validators.items()):
+                if expires_at <= now:
+                    validators.pop(path, None)
+            if len(validators) >= MAX_VALIDATORS:
+                validators.clear()
+        validators[request.full_path] = (etag, now + max_age, max_age)
+    return response.make_conditional(request)
+
+def perform_request(method, headers=None, stream=None, kind='other'):
     header_vals = []
     if headers is not None:
         header_vals = get_arg_vals(headers, request)
     if None in header_vals:
         raise InvalidAPIUsage("Check that headers are correct.")
     try:
-        print(header_vals)
-        return jsonify(method(*header_vals))
+        app.logger.debug('%s %s', request.path, header_vals)
+        if stream is not None and request.args.get('stream') == '1':
+            return stream_ndjson(stream(*header_vals))
+        with validators_lock:
+            remembered = validators.get(request.full_path)
+        if remembered is not None and time.monotonic() < remembered[1] and remembered[0] in request.if_none_match:
+            return not_modified(remembered[0], remembered[2])
+        with metrics.call() as call:
+            data = method(*header_vals)
+        timing = call.server_timing()
+        response = validated_response(data, kind, header_vals)
+        if app.config['SERVER_TIMING']:
+            response.headers['Server-Timing'] = timing
+        return response
     except NoAthleteFoundException as e:
         raise InvalidAPIUsage(message=e.message, status_code=404)
     except NoTeamFoundException as e:
         raise InvalidAPIUsage(message=e.message, status_code=404)
+    except NoMeetFoundException as e:
+        raise InvalidAPIUsage(message=e.message, status_code=404)
+    except UpstreamException as e:
+        raise InvalidAPIUsage(message=e.message, status_code=502)
     # except:
     #     InvalidAPIUsage("IDK")
 
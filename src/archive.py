@@ -0,0 +1,185 @@
+import hashlib, mmap, os, sqlite3, time, zlib
+from threading import RLock
+
+from src.transport import UpstreamException
+
+
+class NotArchivedException(UpstreamException):
+    def __init__(self, url):
+        self.url = url
+        self.message = f"The archive has no page for: {url}"
+        Exception.__init__(self, self.message)
+
+
+class Archive:
+    def __init__(self, path, level=6, clock=time.time):
+        """
+        An on disk archive of the raw html of every page downloaded, for parsing pages again when the readers change
+        and for running Hermes without going to TFRRS (see ArchiveTransport).
+        Bodies are zlib compressed and appended to one pack file, keyed by the SHA-256 of the page so a page that has not
+        changed since it was last downloaded is only stored once. An sqlite index keeps where each body is in the pack
+        and every version of each url. Reads go through a memory map of the pack.
+
+        Parameters
+        ----------
+        path : str
+            the directory of the archive, made if it does not exist
+
+        level : int
+            the zlib compression level
+
+        clock : callable
+            returns the current time in seconds, the time a version was downloaded
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.level = level
+        self.clock = clock
+        self._lock = RLock()
+        self._pack = open(os.path.join(path, 'pages.pack'), 'a+b')
+        self._map = None
+        self.db = sqlite3.connect(os.path.join(path, 'index.db'), check_same_thread=False)
+        with self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS bodies (digest TEXT PRIMARY KEY, offset INTEGER, length INTEGER, size INTEGER)')
+            self.db.execute('CREATE TABLE IF NOT EXISTS versions (url TEXT, fetched_at REAL, digest TEXT)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS versions_url ON versions (url, fetched_at)')
+
+    def put(self, url, content):
+        """
+        Archives a download of a page. A new version of the url is only recorded when the page changed.
+
+        Returns
+        -------
+        str
+            the digest of the page
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock, self.db:
+            if self.db.execute('SELECT 1 FROM bodies WHERE digest = ?', (digest,)).fetchone() is None:
+                compressed = zlib.compress(content, self.level)
+                self._pack.seek(0, os.SEEK_END)
+                offset = self._pack.tell()
+                self._pack.write(compressed)
+                self._pack.flush()
+                self.db.execute('INSERT INTO bodies VALUES (?, ?, ?, ?)', (digest, offset, len(compressed), len(content)))
+            latest = self.versions(url)[-1:]
+            if not latest or latest[0][1] != digest:
+                self.db.execute('INSERT INTO versions VALUES (?, ?, ?)', (url, self.clock(), digest))
+        return digest
+
+    def get(self, url, at=None):
+        """
+        Returns the html of a page as it was last downloaded, or as it was at a time.
+
+        Parameters
+        ----------
+        url : str
+            the url of the page
+
+        at : float
+            a time in seconds, the version downloaded last before it is returned (the latest if None)
+
+        Returns
+        -------
+        bytes
+            the html of the page
+        """
+        with self._lock:
+            row = self.db.execute('SELECT digest FROM versions WHERE url = ? AND fetched_at <= ? ORDER BY fetched_at DESC, rowid DESC LIMIT 1',
+                                  (url, float('inf') if at is None else at)).fetchone()
+        if row is None:
+            raise NotArchivedException(url)
+        return self.read(row[0])
+
+    def read(self, digest):
+        """
+        Returns the html of the page with a digest.
+        """
+        with self._lock:
+            row = self.db.execute('SELECT offset, length FROM bodies WHERE digest = ?', (digest,)).fetchone()
+            if row is None:
+                raise KeyError(digest)
+            offset, length = row
+            if self._map is None or offset + length > len(self._map): # the pack grew since it was mapped
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._pack.fileno(), 0, access=mmap.ACCESS_READ)
+            compressed = self._map[offset:offset + length]
+        return zlib.decompress(compressed)
+
+    def versions(self, url):
+        """
+        Returns
+        -------
+        list
+            the time each version of a page was downloaded and its digest, oldest first
+        """
+        with self._lock:
+            return self.db.execute('SELECT fetched_at, digest FROM versions WHERE url = ? ORDER BY fetched_at, rowid', (url,)).fetchall()
+
+    def urls(self):
+        """
+        Returns
+        -------
+        list
+            every url in the archive
+        """
+        with self._lock:
+            return [url for url, in self.db.execute('SELECT DISTINCT url FROM versions ORDER BY url')]
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict
+            how many urls, versions and distinct bodies are archived and their size before and after compression
+        """
+        with self._lock:
+            urls, versions = self.db.execute('SELECT COUNT(DISTINCT url), COUNT(*) FROM versions').fetchone()
+            bodies, size, compressed = self.db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM bodies').fetchone()
+        return {'urls': urls, 'versions': versions, 'bodies': bodies, 'size': size, 'compressed_size': compressed}
+
+    def __contains__(self, url):
+        with self._lock:
+            return self.db.execute('SELECT 1 FROM versions WHERE url = ? LIMIT 1', (url,)).fetchone() is not None
+
+    def __len__(self):
+        return self.stats()['urls']
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._pack.close()
+            self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ArchiveTransport:
+    def __init__(self, archive, at=None):
+        """
+        A transport that serves pages from an Archive instead of downloading them, so Hermes runs offline
+        at disk speed. A page that is not in the archive raises NotArchivedException.
+
+        Parameters
+        ----------
+        archive : Archive or str
+            the archive, or the directory of one
+
+        at : float
+            serve the pages as they were at this time (the latest versions if None)
+        """
+        self.archive = archive if isinstance(archive, Archive) else Archive(archive)
+        self.at = at
+
+    def get(self, url):
+        return self.archive.get(url, self.at)
+
+    def close(self):
+        self.archive.close()
@@ -0,0 +1,408 @@
+import asyncio, time
+from functools import partial
+
+from src.parsing import DEFAULT_PARSER, parse
+from src.hermes import (Hermes, TeamSeason, NoAthleteFoundException, NoTeamFoundException, NoTableFoundException,
+                        NoMeetFoundException, read_athlete_bests, read_athlete_results, read_meet_date, read_meet_results,
+                        read_season_keys, newer_meets)
+from src.meets import MeetIndex, gender_meet_url
+from src.transport import RateLimiter, UpstreamException
+from src.marks import athlete_results_columns, top_performances_columns, meet_results_columns, parse_meet_date
+
+
+class AsyncTransport:
+    def __init__(self, pool_size=100, connect_timeout=5, read_timeout=30, retries=3, backoff=0.5, rate=5, burst=10):
+        """
+        The asyncio version of Transport. Pages are downloaded with aiohttp over one pooled session,
+        with the same timeouts, retries and rate limiting.
+
+        Parameters
+        ----------
+        pool_size : int
+            the most connections kept open to TFRRS
+
+        connect_timeout : float
+            seconds to wait for a connection
+
+        read_timeout : float
+            seconds to wait for the response once connected
+
+        retries : int
+            how many times a failed request is retried
+
+        backoff : float
+            seconds to wait before the first retry, doubled for each retry after
+
+        rate : float
+            the most requests a second sent to TFRRS (None for no limit)
+
+        burst : int
+            how many requests can be sent at once before rate applies
+        """
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(rate, burst) if rate else None
+        self.session = None
+
+    async def get(self, url):
+        """
+        Downloads a page. Client errors (like a 404) are returned as is because TFRRS serves its error pages with them.
+
+        Parameters
+        ----------
+        url : str
+            the url to a webpage
+
+        Returns
+        -------
+        bytes
+            the body of the response
+        """
+        import aiohttp # only needed when actually going to TFRRS, so tests and offline use do not need it
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout))
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                await asyncio.sleep(self.limiter.reserve())
+            try:
+                async with self.session.get(url) as response:
+                    if response.status < 500:
+                        return await response.read()
+                    reason = f'status {response.status}'
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                reason = type(e).__name__
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+        raise UpstreamException(url, reason)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class AsyncTeamSeason(TeamSeason):
+    """
+    TeamSeason for an AsyncHermes. The team page is downloaded by AsyncHermes.team before the handle is made,
+    so the roster, top performances and athlete urls are plain attributes; the athlete accessors are coroutines.
+    """
+    async def athlete_html(self, name):
+        return await self.hermes.get_soup(self.athlete_url(name))
+
+    async def bests(self, name):
+        return read_athlete_bests(await self.athlete_html(name))
+
+    async def results(self, name):
+        return read_athlete_results(await self.athlete_html(name))
+
+
+class AsyncHermes:
+    def __init__(self, cache=None, season_keys_ttl=24 * 60 * 60, athletes=None, transport=None, concurrency=10, executor=None,
+                 parser=DEFAULT_PARSER, partial=True, meet_index_ttl=5 * 60):
+        """
+        The asyncio version of Hermes. It has the same methods as coroutines, so many pages can be downloaded at once
+        (ie the bests of a whole roster with asyncio.gather). At most concurrency pages are downloaded at a time and
+        the html is parsed on an executor so the event loop is not blocked. The scraping itself is shared with Hermes.
+
+        Parameters
+        ----------
+        cache : PageCache
+            optional cache of parsed pages shared by every method.
+
+        season_keys_ttl : int
+            how long in seconds the config_hnd values of a team's seasons are remembered.
+
+        athletes : AthleteIndex
+            optional index of athlete names to their pages, filled in as rosters are scraped.
+
+        transport : AsyncTransport
+            what pages are downloaded with. Anything with a coroutine get(url) returning the page bytes can be used.
+
+        concurrency : int
+            the most pages downloaded at the same time
+
+        executor : concurrent.futures.Executor
+            where html is parsed, defaults to the event loop's default executor
+
+        parser : str
+            the parser BeautifulSoup uses. Defaults to lxml when it is installed, otherwise html.parser.
+
+        partial : bool
+            only parse the tables that are read from team, athlete and meet pages
+
+        meet_index_ttl : int
+            how long in seconds the meets on the results search page are remembered.
+        """
+        self.URL = "https://www.tfrrs.org/"
+        self.cache = cache
+        self.season_keys_ttl = season_keys_ttl
+        self.clock = time.monotonic
+        self._season_keys = {}
+        self.athletes = athletes
+        self.transport = transport if transport is not None else AsyncTransport()
+        self.concurrency = concurrency
+        self.executor = executor
+        self._semaphore = None
+        self.parser = parser
+        self.partial = partial
+        self.meet_index_ttl = meet_index_ttl
+        self._meet_index = None
+        self.results = None # results are not cached across pages here, the TeamSeasons read their pages directly
+        self.pool = None
+        self._downloads = {} # url -> task downloading and parsing it, so concurrent requests for a page share one download
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if hasattr(self.transport, 'close'):
+            await self.transport.close()
+
+    async def get_roster(self, state, team_name, gender, season):
+        """
+        See Hermes.get_roster
+        """
+        return (await self.team(state, team_name, gender, season)).roster
+
+    async def get_top_performances(self, state, team_name, gender, season, columnar=False):
+        """
+        See Hermes.get_top_performances
+        """
+        performances = (await self.team(state, team_name, gender, season)).top_performances
+        return top_performances_columns(performances) if columnar else performances
+
+    async def get_athlete_bests(self, name, state, team_name, gender, season):
+        """
+        See Hermes.get_athlete_bests
+        """
+        return read_athlete_bests(await self.get_athlete_html(name, state, team_name, gender, season))
+
+    async def get_athlete_results(self, name, state, team_name, gender, season, columnar=False, since=None):
+        """
+        See Hermes.get_athlete_results
+        """
+        meet_results = read_athlete_results(await self.get_athlete_html(name, state, team_name, gender, season))
+        if since is not None:
+            meet_results = list(newer_meets(meet_results, since))
+        return athlete_results_columns(meet_results) if columnar else meet_results
+
+    async def get_athlete_bests_by_id(self, athlete_id):
+        """
+        See Hermes.get_athlete_bests_by_id
+        """
+        return read_athlete_bests(await self.get_athlete_html_by_id(athlete_id))
+
+    async def get_athlete_results_by_id(self, athlete_id, since=None):
+        """
+        See Hermes.get_athlete_results_by_id
+        """
+        meet_results = read_athlete_results(await self.get_athlete_html_by_id(athlete_id))
+        return list(newer_meets(meet_results, since)) if since is not None else meet_results
+
+    async def get_team_athletes(self, state, team_name, gender, season, include=('bests', 'results')):
+        """
+        See Hermes.get_team_athletes. The athlete pages are downloaded together, at most concurrency at a time.
+        """
+        readers = {'bests': read_athlete_bests, 'results': read_athlete_results}
+        for key in include:
+            if key not in readers:
+                raise ValueError(f"include can only have 'bests' and 'results', not {key!r}")
+        team = await self.team(state, team_name, gender, season)
+
+        async def read_athlete(name):
+            try:
+                athlete_html = await team.athlete_html(name)
+                return dict({'name': name}, **{key: readers[key](athlete_html) for key in include})
+            except Exception as e: # one bad page should not lose the rest of the team
+                return {'name': name, 'error': str(e) or type(e).__name__}
+        return list(await asyncio.gather(*(read_athlete(name) for name in team.athlete_urls)))
+
+    async def team(self, state, team_name, gender, season):
+        """
+        Downloads a team season page and returns a handle on it. See Hermes.team
+
+        Returns
+        -------
+        AsyncTeamSeason
+            the handle for the team season
+        """
+        team = AsyncTeamSeason(self, state, team_name, gender, season)
+        team._html = await self.get_team_html(state, team_name, gender, season)
+        return team
+
+    async def get_meets(self):
+        """
+        See Hermes.get_meets
+        """
+        return [dict(meet) for meet in (await self.get_meet_index()).meets]
+
+    async def get_meet_index(self):
+        """
+        See Hermes.get_meet_index
+        """
+        if self._meet_index is not None and self.clock() < self._meet_index[0]:
+            return self._meet_index[1]
+        meet_index = MeetIndex.from_html(await self.get_soup(self.URL+'results_search.html'))
+        self._meet_index = (self.clock() + self.meet_index_ttl, meet_index)
+        return meet_index
+
+    async def find_meet(self, meet_name):
+        """
+        See Hermes.find_meet
+        """
+        meet = (await self.get_meet_index()).lookup(meet_name)
+        if meet is None:
+            raise NoMeetFoundException(meet_name)
+        return meet
+
+    async def search_meets(self, query, limit=10):
+        """
+        See Hermes.search_meets
+        """
+        return (await self.get_meet_index()).search(query, limit)
+
+    async def get_meet_results(self, meet_name, gender, compact=False, columnar=False):
+        """
+        See Hermes.get_meet_results
+        """
+        meet = await self.find_meet(meet_name)
+        return await self.read_meet(gender_meet_url(meet['link'], gender), compact, columnar)
+
+    async def get_meet_results_by_id(self, meet_id, gender, compact=False, columnar=False):
+        """
+        See Hermes.get_meet_results_by_id
+        """
+        return await self.read_meet(self.get_meet_url(meet_id, gender), compact, columnar)
+
+    async def get_meet_results_by_gender(self, meet_name, genders=('m', 'f'), compact=False, columnar=False):
+        """
+        See Hermes.get_meet_results_by_gender
+        """
+        meet = await self.find_meet(meet_name)
+        results = await asyncio.gather(*(self.read_meet(gender_meet_url(meet['link'], gender), compact, columnar) for gender in genders))
+        return dict(zip(genders, results))
+
+    async def read_meet(self, url, compact=False, columnar=False):
+        meet_html = await self.get_soup(url)
+        if columnar:
+            return meet_results_columns(read_meet_results(meet_html), parse_meet_date(read_meet_date(meet_html)))
+        return read_meet_results(meet_html, compact)
+
+    async def get_soup(self, url):
+        """
+        Downloads a page with the transport and parses it on the executor.
+        If the AsyncHermes has a cache, a fresh cached soup is returned instead of going to TFRRS.
+        Coroutines asking for a page that is already being downloaded wait for that download.
+
+        Parameters
+        ----------
+        url : str
+            the url to a webpage
+
+        Returns
+        -------
+        soup obj
+            the soup obj of the webpage html
+        """
+        if self.cache is not None:
+            soup = self.cache.get(url)
+            if soup is not None:
+                return soup
+        download = self._downloads.get(url)
+        if download is None:
+            download = self._downloads[url] = asyncio.ensure_future(self.fetch_soup(url))
+            download.add_done_callback(lambda _: self._downloads.pop(url, None))
+        return await asyncio.shield(download) # one caller going away does not cancel the download for the others
+
+    async def fetch_soup(self, url):
+        content = await self.get_page(url)
+        soup = await asyncio.get_running_loop().run_in_executor(self.executor, partial(parse, content, self.parser, url if self.partial else None))
+        if self.cache is not None:
+            self.cache.put(url, soup, len(content))
+        return soup
+
+    async def get_page(self, url):
+        """
+        Downloads the raw html of a webpage with the transport, waiting if too many downloads are already running.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            return await self.transport.get(url)
+
+    async def get_athlete_html(self, name, state, team_name, gender, season):
+        """
+        See Hermes.get_athlete_html. Athletes in the athlete index are downloaded without the team page.
+        """
+        if self.athletes is not None:
+            indexed = self.athletes.lookup(name, state, team_name, gender, season)
+            if indexed is not None:
+                return await self.get_soup(indexed[1])
+        team = await self.team(state, team_name, gender, season)
+        return await team.athlete_html(name)
+
+    async def get_athlete_html_by_id(self, athlete_id):
+        """
+        See Hermes.get_athlete_html_by_id
+        """
+        athlete_html = await self.get_soup(self.get_athlete_url(athlete_id))
+        if athlete_html.find(id="meet-results") is None:
+            raise NoAthleteFoundException(athlete_id)
+        return athlete_html
+
+    async def get_year_keys(self, state, team_name, gender):
+        """
+        See Hermes.get_year_keys
+        """
+        current, keys, _ = await self.get_season_index(state, team_name, gender)
+        return {season: key for season, key in keys.items() if season != current}
+
+    async def is_past_season(self, state, team_name, gender, season):
+        """
+        See Hermes.is_past_season
+        """
+        try:
+            current = (await self.get_season_index(state, team_name, gender))[0]
+        except NoTeamFoundException:
+            return False
+        return current is not None and season != current
+
+    async def get_season_index(self, state, team_name, gender):
+        """
+        See Hermes.get_season_index
+        """
+        index_key = (state.upper(), team_name, gender.lower())
+        entry = self._season_keys.get(index_key)
+        if entry is not None and self.clock() < entry[0]:
+            return entry[1], entry[2], None
+        soup = await self.get_soup(self.get_team_url(state, team_name, gender))
+        current, keys = read_season_keys(soup, team_name)
+        self._season_keys[index_key] = (self.clock() + self.season_keys_ttl, current, keys)
+        return current, keys, soup
+
+    async def get_team_html(self, state, team_name, gender, season):
+        """
+        See Hermes.get_team_html
+        """
+        try:
+            current, year_keys, base_html = await self.get_season_index(state, team_name, gender)
+            if season == current:
+                return base_html if base_html is not None else await self.get_soup(self.get_team_url(state, team_name, gender))
+            return await self.get_soup(self.get_team_url(state, team_name, gender, year_keys[season]))
+        except NoTableFoundException:
+            raise NoTeamFoundException(team_name)
+
+    # these do not download anything so they are shared with Hermes as is
+    get_team_url = Hermes.get_team_url
+    get_athlete_url = Hermes.get_athlete_url
+    get_meet_url = Hermes.get_meet_url
+    reads_whole_pages = Hermes.reads_whole_pages
+    get_table_by_heading = Hermes.get_table_by_heading
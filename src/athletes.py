@@ -0,0 +1,116 @@
+import json, os, re
+from threading import RLock
+
+ATHLETE_ID = re.compile(r'/athletes/(\d+)')
+
+
+def get_athlete_id(url):
+    """
+    Pulls the stable athlete id out of an athlete url. ie (/athletes/6873033/Moravian/Shane__Houghton.html : 6873033)
+
+    Parameters
+    ----------
+    url : str
+        the url to an athlete page
+
+    Returns
+    -------
+    str
+        the athlete id or None if the url is not an athlete page
+    """
+    match = ATHLETE_ID.search(url)
+    return match.group(1) if match else None
+
+
+def team_key(state, team_name, gender):
+    return f'{state.upper()}_{gender.lower()}_{team_name}'
+
+
+class AthleteIndex:
+    def __init__(self, path=None):
+        """
+        An index of athlete names to their athlete id and url. It is filled in as rosters are scraped
+        so an athlete's page can be downloaded directly without going through their team page again.
+        Names are only unique within a team, and a team's roster changes from season to season,
+        so athletes are indexed by team and season and then by name (Last_First).
+
+        Parameters
+        ----------
+        path : str
+            optional json file the index is loaded from and saved to so it persists between runs
+        """
+        self.path = path
+        self._teams = {} # team key:season -> {name: [athlete_id, url]}
+        self._urls = {} # athlete_id -> url
+        self._lock = RLock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def add_team(self, state, team_name, gender, season, athlete_urls):
+        """
+        Adds the athletes of a team's season to the index and saves it if anything changed.
+
+        Parameters
+        ----------
+        state : str
+            state where the school is located.
+
+        team_name : str
+            the name of the school
+
+        gender : str
+            specifies whether it is the men or women's team
+
+        season : str
+            the season of the roster the athletes are on
+
+        athlete_urls : dict
+            athlete names (Last_First) to the url of their athlete page
+        """
+        with self._lock:
+            athletes = self._teams.setdefault(f'{team_key(state, team_name, gender)}:{season}', {})
+            changed = False
+            for name, url in athlete_urls.items():
+                athlete_id = get_athlete_id(url)
+                if athlete_id is None or athletes.get(name) == [athlete_id, url]:
+                    continue
+                athletes[name] = [athlete_id, url]
+                self._urls[athlete_id] = url
+                changed = True
+            if changed and self.path is not None:
+                self.save()
+
+    def lookup(self, name, state, team_name, gender, season):
+        """
+        Returns
+        -------
+        tuple
+            the athlete id and url of the athlete on the team that season, or None if they have not been indexed
+        """
+        entry = self._teams.get(f'{team_key(state, team_name, gender)}:{season}', {}).get(name)
+        return tuple(entry) if entry is not None else None
+
+    def get_url(self, athlete_id):
+        """
+        Returns
+        -------
+        str
+            the url of the athlete page for an athlete id, or None if it has not been indexed
+        """
+        return self._urls.get(str(athlete_id))
+
+    def load(self):
+        with self._lock:
+            with open(self.path) as f:
+                self._teams = json.load(f)
+            self._urls = {athlete_id: url for athletes in self._teams.values() for athlete_id, url in athletes.values()}
+
+    def save(self):
+        with self._lock:
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self._teams, f)
+            os.replace(tmp_path, self.path) # so a crash while writing never leaves a half written index
+
+    def __len__(self):
+        return len(self._urls)
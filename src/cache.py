@@ -0,0 +1,397 @@
+import time, zlib
+from collections import OrderedDict
+from threading import RLock
+
+# how long (in seconds) a page of each type stays fresh in the cache
+DEFAULT_TTLS = {
+    'team': 15 * 60,
+    'athlete': 60 * 60,
+    'meets': 5 * 60, # results_search.html changes whenever a meet is posted
+    'meet': 10 * 60,
+    'other': 5 * 60,
+}
+
+
+def page_type(url):
+    """
+    Classifies a TFRRS url by the kind of page it points to.
+
+    Parameters
+    ----------
+    url : str
+        the url to a TFRRS webpage
+
+    Returns
+    -------
+    str
+        one of 'team', 'athlete', 'meets', 'meet' or 'other'
+    """
+    if '/teams/' in url:
+        return 'team'
+    if '/athletes/' in url:
+        return 'athlete'
+    if url.split('?')[0].endswith('results_search.html'):
+        return 'meets'
+    if '/results/' in url:
+        return 'meet'
+    return 'other'
+
+
+class PageCache:
+    def __init__(self, max_entries=256, max_bytes=None, ttls=None, clock=time.monotonic):
+        """
+        An in-memory LRU cache of parsed TFRRS pages. Entries expire after a time to live that depends
+        on the type of page and the least recently used entries are evicted once the cache is full.
+
+        Parameters
+        ----------
+        max_entries : int
+            the most pages the cache will hold (None for no limit)
+
+        max_bytes : int
+            the most bytes of html the cache will hold (None for no limit)
+
+        ttls : dict
+            time to live in seconds for each page type, merged over DEFAULT_TTLS.
+            A ttl of 0 or None means pages of that type are never cached.
+
+        clock : callable
+            returns the current time in seconds, can be swapped out for testing
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.size = 0
+        self._entries = OrderedDict() # url -> (expires_at, value, size)
+        self._lock = RLock()
+
+    def get(self, url):
+        """
+        Returns the cached value for a url or None if it is missing or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value, size = entry
+            if self.clock() >= expires_at:
+                self._remove(url)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(url)
+            self.hits += 1
+            return value
+
+    def put(self, url, value, size=0):
+        """
+        Stores a value for a url, evicting the least recently used pages if the cache is over its limits.
+
+        Parameters
+        ----------
+        url : str
+            the url the value was retrieved from
+
+        value : any
+            what to cache (usually a soup obj)
+
+        size : int
+            the size in bytes of the page, used for the max_bytes limit
+        """
+        ttl = self.ttls.get(page_type(url))
+        if not ttl:
+            return
+        if self.max_bytes is not None and size > self.max_bytes:
+            return # would evict everything else and still not fit
+        with self._lock:
+            if url in self._entries:
+                self._remove(url)
+            self._entries[url] = (self.clock() + ttl, value, size)
+            self.size += size
+            while self._over_limit():
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, url=None, kind=None):
+        """
+        Removes pages from the cache. With no arguments every page is removed.
+
+        Parameters
+        ----------
+        url : str
+            remove only this url
+
+        kind : str
+            remove every page of this type ('team', 'athlete', 'meets', 'meet' or 'other')
+
+        Returns
+        -------
+        int
+            the number of pages removed
+        """
+        with self._lock:
+            if url is not None:
+                urls = [url] if url in self._entries else []
+            elif kind is not None:
+                urls = [cached for cached in self._entries if page_type(cached) == kind]
+            else:
+                urls = list(self._entries)
+            for cached in urls:
+                self._remove(cached)
+            return len(urls)
+
+    def clear(self):
+        self.invalidate()
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict
+            hit/miss counters and the current size of the cache
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self.size,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            return entry is not None and self.clock() < entry[0]
+
+    def _remove(self, url):
+        _, _, size = self._entries.pop(url)
+        self.size -= size
+
+    def _over_limit(self):
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.size > self.max_bytes
+
+
+class Revision:
+    __slots__ = ('expires_at', 'digest', 'etag', 'last_modified', 'values', 'body')
+
+    def __init__(self, expires_at, digest=None, etag=None, last_modified=None, body=None):
+        self.expires_at = expires_at
+        self.digest = digest
+        self.etag = etag
+        self.last_modified = last_modified
+        self.values = {} # (reader name, *args) -> what the reader returned
+        self.body = body # the zlib compressed html of the revision, so other readers can read it without downloading it again
+
+
+class ResultCache:
+    def __init__(self, max_entries=1024, ttls=None, stale_ttl=0, clock=time.monotonic):
+        """
+        Remembers what was extracted from each page (roster rows, bests, meet events ...) together with
+        the ETag, Last-Modified and content hash of the page it was extracted from. While an entry is fresh
+        its results are used as they are. Once it expires the page is revalidated: if TFRRS answers 304,
+        or sends back a page with the same content hash, the results are reused without parsing the page again.
+        The compressed html of each page is kept with its results, so a reader that has no result yet reads the
+        revision already downloaded instead of downloading it again.
+
+        Parameters
+        ----------
+        max_entries : int
+            the most pages whose results are kept (None for no limit)
+
+        ttls : dict
+            how long in seconds the results of each page type are used before revalidating, merged over DEFAULT_TTLS
+
+        stale_ttl : float
+            how long in seconds after they expire results may still be served while the page is revalidated
+            in the background (stale-while-revalidate). 0 always revalidates before answering
+
+        clock : callable
+            returns the current time in seconds, can be swapped out for testing
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+        self._entries = OrderedDict() # url -> Revision
+        self._lock = RLock()
+
+    def get(self, url, key):
+        """
+        Returns
+        -------
+        tuple
+            whether a fresh result for key was found, and the result
+        """
+        state, value = self.lookup(url, key)
+        return (True, value) if state == 'fresh' else (False, None)
+
+    def lookup(self, url, key):
+        """
+        Returns
+        -------
+        tuple
+            'fresh', 'stale' (expired less than stale_ttl ago, so it can be served while the page is revalidated)
+            or 'missing', and the result (None if missing)
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            now = self.clock()
+            if entry is None or key not in entry.values or now >= entry.expires_at + self.stale_ttl:
+                self.misses += 1
+                return 'missing', None
+            self._entries.move_to_end(url)
+            if now >= entry.expires_at:
+                self.stale += 1
+                return 'stale', entry.values[key]
+            self.hits += 1
+            return 'fresh', entry.values[key]
+
+    def validators(self, url):
+        """
+        Returns
+        -------
+        dict
+            the If-None-Match and If-Modified-Since headers to revalidate a page with (empty if there is nothing to reuse)
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            headers = {}
+            if entry is not None and (entry.values or entry.body is not None):
+                if entry.etag is not None:
+                    headers['If-None-Match'] = entry.etag
+                if entry.last_modified is not None:
+                    headers['If-Modified-Since'] = entry.last_modified
+            return headers
+
+    def revalidated(self, url):
+        """
+        Marks the results of a page fresh again after TFRRS answered 304.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                entry.expires_at = self.clock() + self._ttl(url)
+                self.not_modified += 1
+
+    def update(self, url, digest, etag=None, last_modified=None, content=None):
+        """
+        Records a new download of a page. The results extracted from the page are kept if its content hash
+        is the same as last time and forgotten otherwise.
+
+        Parameters
+        ----------
+        content : bytes
+            the html of the page, kept (compressed) for the readers that have no result from it yet (see body)
+
+        Returns
+        -------
+        bool
+            whether the page is unchanged, so the results already extracted from it can be reused
+        """
+        body = zlib.compress(content, 1) if content is not None else None
+        with self._lock:
+            entry = self._entries.get(url)
+            unchanged = entry is not None and entry.digest is not None and entry.digest == digest
+            if unchanged:
+                entry.expires_at = self.clock() + self._ttl(url)
+                entry.etag, entry.last_modified = etag, last_modified
+                entry.body = body if body is not None else entry.body
+                self.unchanged += 1
+            else:
+                self._add(url, Revision(self.clock() + self._ttl(url), digest, etag, last_modified, body))
+                self.changed += 1
+            return unchanged
+
+    def body(self, url):
+        """
+        Returns
+        -------
+        bytes
+            the html of the last download of a page, or None if it was not kept or its revision (since revalidated
+            with a 304 or an unchanged download) is not fresh
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or entry.body is None or self.clock() >= entry.expires_at:
+                return None
+            body = entry.body
+        return zlib.decompress(body)
+
+    def peek(self, url, key):
+        """
+        Like get, without counting a hit or a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or key not in entry.values or self.clock() >= entry.expires_at:
+                return False, None
+            return True, entry.values[key]
+
+    def put(self, url, key, value):
+        """
+        Stores what a reader extracted from a page.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                entry = self._add(url, Revision(self.clock() + self._ttl(url)))
+            entry.values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict
+            hit/stale/miss counters, how revalidations turned out and how many pages have results
+        """
+        with self._lock:
+            lookups = self.hits + self.stale + self.misses
+            return {
+                'hits': self.hits,
+                'stale': self.stale,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'not_modified': self.not_modified,
+                'unchanged': self.unchanged,
+                'changed': self.changed,
+                'entries': len(self._entries),
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _ttl(self, url):
+        return self.ttls.get(page_type(url)) or 0
+
+    def _add(self, url, entry):
+        self._entries[url] = entry
+        self._entries.move_to_end(url)
+        while self.max_entries is not None and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
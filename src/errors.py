@@ -8,4 +8,21 @@ class NoTeamFoundException(Exception):
     def __init__(self, name, message="Team could not be found"):
         self.name = name
         self.message = message
-        super().__init__(self.message)
\ No newline at end of file
+        super().__init__(self.message)
+
+class InvalidAPIUsage(Exception):
+    status_code = 400
+    message = 'Bad request. Check that syntax is correct and information was entered correctly.'
+    def __init__(self, message=None, status_code=None, payload=None):
+        super().__init__()
+        if message is not None:
+            self.message = message
+        if status_code is not None:
+            self.status_code = status_code
+        self.payload = payload
+
+    def to_dict(self):
+        rv = dict(self.payload or ())
+        rv['message'] = self.message
+        rv['error'] = self.status_code
+        return rv
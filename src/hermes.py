@@ -1,21 +1,139 @@
-import requests, re
-from bs4 import BeautifulSoup
+import hashlib, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from functools import wraps
+from threading import Lock
 from src.errors import NoAthleteFoundException
+from src.transport import Transport
+from src.archive import ArchiveTransport
+from src.parsing import DEFAULT_PARSER, parse
+from src.tables import get_table_data, read_table, remove_whitespace
+from src.marks import athlete_results_columns, top_performances_columns, meet_results_columns, parse_meet_date, parse_since
+from src.meets import MeetIndex, gender_meet_url
+from src.singleflight import SingleFlight
+from src.cache import page_type
+
+
+def instrumented(method):
+    """
+    Times a public Hermes method with the Hermes' metrics when it has them (see metrics.Metrics).
+    """
+    @wraps(method)
+    def timed_method(self, *args, **kwargs):
+        if self.metrics is None:
+            return method(self, *args, **kwargs)
+        with self.metrics.call(method.__name__):
+            return method(self, *args, **kwargs)
+    return timed_method
+
 
 class Hermes:
-    def __init__(self):
+    def __init__(self, cache=None, season_keys_ttl=24 * 60 * 60, athletes=None, transport=None, parser=DEFAULT_PARSER, partial=True,
+                 store=None, meet_index_ttl=5 * 60, metrics=None, results=None, pool=None, archive=None, replay=None):
         """
         A class used to webscrape TFRRS. It has various methods for retrieving important information
         regarding XC/TF teams and athletes.
 
+        Parameters
+        ----------
+        cache : PageCache
+            optional cache of parsed pages shared by every method. Without one every call goes to TFRRS.
+
+        season_keys_ttl : int
+            how long in seconds the config_hnd values of a team's seasons are remembered.
+            Past seasons never change so this can be long.
+
+        athletes : AthleteIndex
+            optional index of athlete names to their pages, filled in as rosters are scraped.
+            Athletes in the index for the requested season are looked up without downloading their team page.
+
+        transport : Transport
+            what pages are downloaded with. Defaults to a pooled, rate limited Transport.
+            Anything with a get(url) method returning the page bytes can be used, like a stand-in for tests.
+
+        parser : str
+            the parser BeautifulSoup uses. Defaults to lxml when it is installed, otherwise html.parser.
+
+        partial : bool
+            only parse the tables Hermes reads from team, athlete and meet pages (see parsing.STRAINERS).
+            Turn this off to get the whole page back from get_soup.
+
+        store : Store
+            optional local database of scraped rosters, top performances, athlete results and meet results.
+            They are answered from the store and only scraped when missing or stale, and past seasons never go stale.
+
+        meet_index_ttl : int
+            how long in seconds the meets on the results search page are remembered.
+
+        metrics : Metrics
+            optional metrics that every public method is timed with, split into fetching, parsing and extracting,
+            along with the pages downloaded for it and the page cache hits and misses.
+
+        results : ResultCache
+            optional cache of what was extracted from each page. Expired pages are revalidated with their ETag and
+            Last-Modified, and when TFRRS answers 304 or the page hashes the same, the results are reused without parsing.
+            With a stale_ttl, results that just expired are returned right away and revalidated in the background.
+
+        pool : ParsePool
+            optional pool of worker processes. The raw html of pages is sent to the workers, which parse and read it and
+            send back only the results, so big pages downloaded together are parsed on several cores. The pool is not closed by Hermes.
+            It needs results: the soups stay in the workers, so the ResultCache is what keeps pages from being downloaded again.
+
+        archive : Archive
+            optional archive every downloaded page is saved to, compressed and keyed by its content hash
+
+        replay : Archive or str
+            an archive (or the directory of one) to serve every page from instead of TFRRS, in place of the transport
+
         Attributes
         ----------
         URL : str
             The url for tffrs which will be added to depending on a specific method being used.
         """
+        if pool is not None and results is None:
+            raise ValueError("a ParsePool needs a ResultCache, the pages parsed in its workers are not in the page cache")
         self.URL = "https://www.tfrrs.org/"
+        self.cache = cache
+        self.season_keys_ttl = season_keys_ttl
+        self.clock = time.monotonic
+        self._season_keys = {} # (state, team_name, gender) -> (expires_at, current season, {season: config_hnd})
+        self.athletes = athletes
+        if replay is not None:
+            transport = ArchiveTransport(replay)
+        self.transport = transport if transport is not None else Transport()
+        self.archive = archive
+        self.parser = parser
+        self.partial = partial
+        self.store = store
+        self.meet_index_ttl = meet_index_ttl
+        self._meet_index = None # (expires_at, MeetIndex)
+        self.flights = SingleFlight() # threads asking for a page that is already being downloaded wait for that download
+        self.background = None # thread pool revalidating stale results, started by the first one (see revalidate_later)
+        self.refreshing = set()
+        self._refreshing_lock = Lock()
+        self.metrics = metrics
+        self.results = results
+        self.pool = pool
     
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Waits for the stale results being revalidated in the background and closes the transport.
+        """
+        with self._refreshing_lock:
+            background, self.background = self.background, None
+        if background is not None:
+            background.shutdown(wait=True)
+        if hasattr(self.transport, 'close'):
+            self.transport.close()
+
+    @instrumented
     def get_roster(self, state, team_name, gender, season):
         """
         This will scrape through the html and retrieve the roster for a specified team.
@@ -40,12 +158,17 @@ class Hermes:
         list
             List of dictionaries containing athlete information
         """
-        team_html = self.get_team_html(state, team_name, gender, season)
-        roster_table = self.get_table_by_heading(team_html, 'NAME')
-        roster = get_table_data(roster_table)[1:]
-        return roster
+        if self.store is not None:
+            roster = self.store.load_roster(state, team_name, gender, season, self.is_past_season(state, team_name, gender, season))
+            if roster is not None:
+                return roster
+        team = self.team(state, team_name, gender, season)
+        if self.store is not None:
+            self.store.save_roster(state, team_name, gender, season, team.roster, team.athlete_urls)
+        return team.roster
 
-    def get_top_performances(self, state, team_name, gender, season):
+    @instrumented
+    def get_top_performances(self, state, team_name, gender, season, columnar=False):
         """
         This will retrieve top performances from the team html
         Parameters
@@ -62,17 +185,24 @@ class Hermes:
         season : str
             the season for the roster (*year*_Cross_Country, *year*_Indoor, or *year*_Outdoor)
 
+        columnar : bool
+            return the performances as columns with numeric marks (see marks.Performances)
+
         Returns
         -------
         list
             list of dictionaries containing list of performances
         """
-        team_html = self.get_team_html(state, team_name, gender, season)
-        table = self.get_table_by_heading(team_html, 'EVENT') #getting top performance table by the EVENT heading, hackish ik.
-        performances = get_table_data(table)
-        performances.pop(0)
-        return performances
+        performances = None
+        if self.store is not None:
+            performances = self.store.load_top_performances(state, team_name, gender, season, self.is_past_season(state, team_name, gender, season))
+        if performances is None:
+            performances = self.team(state, team_name, gender, season).top_performances
+            if self.store is not None:
+                self.store.save_top_performances(state, team_name, gender, season, performances)
+        return top_performances_columns(performances) if columnar else performances
     
+    @instrumented
     def get_athlete_bests(self, name, state, team_name, gender, season):
         """
         This will scrape through the html of the athlete and return their personal bests for any event they do.
@@ -100,18 +230,10 @@ class Hermes:
         dict
             A dictionary of the athlete's best marks
         """
-        athlete_html = self.get_athlete_html(name, state, team_name, gender, season)
-        table_bests = athlete_html.find("table", class_="table bests")
-        rows = table_bests.find_all("td")
-        bests = {}
-        for i in range(0,len(rows), 2):
-            event = remove_whitespace(rows[i].text)
-            mark = remove_whitespace(rows[i+1].text).strip('\\"').replace('m', 'm ') #hackish way of spacing metric and standard
-            if event != "" or mark != "":
-                bests[event] = mark
-        return bests
+        return self.team(state, team_name, gender, season).bests(name)
 
-    def get_athlete_results(self, name, state, team_name, gender, season):
+    @instrumented
+    def get_athlete_results(self, name, state, team_name, gender, season, columnar=False, since=None):
         """
         This will scrape through the html of the athlete and return history of performances.
         This will return the information on when and where the performance was and the mark and placement for the athlete.
@@ -133,62 +255,396 @@ class Hermes:
 
         season : str
             the season for the roster (*year*_Cross_Country, *year*_Indoor, or *year*_Outdoor)
+
+        columnar : bool
+            return the performances as columns with numeric marks, dates and places (see marks.Performances)
+
+        since : datetime.date or str
+            only return the meets that started on or after this date ("2022-05-18"). The meet tables are newest first,
+            so reading stops at the first older one. See results_cursor for the watermark of the next sync.
         
         Returns
         -------
         list
             list of dictionaries containing meet dates, names, and lists of performance results
         """
+        meet_results = list(self.iter_athlete_results(name, state, team_name, gender, season, since))
+        return athlete_results_columns(meet_results) if columnar else meet_results
 
-        info_keys = ['event', 'result', 'place']
-        meet_results  = []
-        athlete_html = self.get_athlete_html(name, state, team_name, gender, season)
-        meet_results_tables = athlete_html.find(id="meet-results").find_all("table")
-        for meet_table in meet_results_tables:
-            # there are some divs in athlete results to specify whether they transferred or not, resulting in a None.
-            if meet_table.find("thead") is not None:
-                title = meet_table.find("thead").text.strip().replace('\xa0\xa0\xa0', '')
-                meet_name, date = title.split('\n')
-                meet_info = {}
-                meet_info['meet_name'] = meet_name
-                meet_info['date'] = date
-                meet_info['performances'] = get_table_data(meet_table, info_keys)[1:] #set the keys manually because these tables do not have headers
-                meet_results.append(meet_info)
-        return meet_results
-
-    def get_meets(self): #can this use general get data function?
-        info_keys = ['date', 'meet_name', 'sport', 'state']
-        meets_html = self.get_soup(self.URL+'results_search.html')
-        meets_table = meets_html.find("table")
-        meets = get_table_data(meets_table)[1:]
-        return meets
-
-    def get_meet_results(self, meet_name, gender):
-        meets_html = self.get_soup(self.URL+'results_search.html') # because this page has very limited results it will not be able to find every meet
-        rows = meets_html.find_all("tr")[1:]
-        link = ''
-        for row in rows:
-            row_data = row.find_all('td')
-            if row_data[1].text.strip() == meet_name:
-                link = row.find('a')['href'].strip()
-                break
-        link = link.split('NCAA')
-        meet_html = self.get_soup(f'http:{link[0]}{gender}/{link[1]}') # reformatting the url to get the gender we want
-        table_containers = meet_html.find_all('div', class_='col-lg-12')
-        events = []
-        for table_cont in table_containers:
-            event = {}
-            event_name = table_cont.find('div', class_='custom-table-title').text.strip().split('\n')
-            event['name'] = f'{event_name[0]} {event_name[1]}' # doing this so we don't lose info on whether its a final or prelim
-            table = table_cont.find('table')
-            event['results'] = get_table_data(table, same_size=True) # set same_size to true bc we don't want fouls or what happened on field event attempts
-            events.append(event)
-        return events
+    def iter_athlete_results(self, name, state, team_name, gender, season, since=None):
+        """
+        Yields the history of performances of an athlete one meet at a time, as each meet table is read.
+        See get_athlete_results. An athlete scraped to the end is saved to the Hermes' store if it has one.
+        With a result cache the whole page is read and kept before the first meet is yielded.
+
+        Yields
+        ------
+        dict
+            the meet date, name, and list of performance results
+        """
+        if since is not None:
+            yield from newer_meets(self.iter_athlete_results(name, state, team_name, gender, season), since)
+            return
+        if self.store is not None:
+            meet_results = self.store.load_athlete_results(state, team_name, gender, name)
+            if meet_results is not None:
+                yield from meet_results
+                return
+        team = self.team(state, team_name, gender, season)
+        meet_results = []
+        meets = team.results(name) if self.reads_whole_pages else iter_athlete_results(team.athlete_html(name))
+        for meet in meets:
+            meet_results.append(meet)
+            yield meet
+        if self.store is not None:
+            self.store.save_athlete_results(state, team_name, gender, name, meet_results, team.athlete_url(name))
+
+    def team(self, state, team_name, gender, season):
+        """
+        Returns a handle on one season of a team. The team page is downloaded once, the first time the handle needs it,
+        and the roster, top performances and athlete links are all read from that one page.
+
+        Parameters
+        ----------
+        state : str
+            state where the school is located. (There can be multiple universities with the same name)
+        
+        team_name : str
+            the name of the school
+        
+        gender : str
+            specifies whether we are trying to retrieve men or women's team
+
+        season : str
+            the season for the roster (*year*_Cross_Country, *year*_Indoor, or *year*_Outdoor)
+
+        Returns
+        -------
+        TeamSeason
+            the handle for the team season
+        """
+        return TeamSeason(self, state, team_name, gender, season)
+
+    @instrumented
+    def get_team_athletes(self, state, team_name, gender, season, include=('bests', 'results'), workers=8):
+        """
+        Returns the bests and/or results of every athlete on a team's roster.
+        See iter_team_athletes, this collects what it yields back into roster order.
+
+        Returns
+        -------
+        list
+            list of dictionaries with the athlete's name and either the included data or an error
+        """
+        team = self.team(state, team_name, gender, season)
+        order = {name: i for i, name in enumerate(team.athlete_urls)}
+        athletes = self.iter_team_athletes(state, team_name, gender, season, include, workers, team=team)
+        return sorted(athletes, key=lambda athlete: order[athlete['name']])
+
+    def iter_team_athletes(self, state, team_name, gender, season, include=('bests', 'results'), workers=8, team=None):
+        """
+        Downloads the page of every athlete on a team's roster across a pool of threads and yields each athlete
+        as soon as their page is done. The team page is only downloaded once and the downloads stay within the rate limit
+        of the transport. An athlete whose page fails is yielded with an error instead of stopping the others.
+
+        Parameters
+        ----------
+        state : str
+            state where the school is located. (There can be multiple universities with the same name)
+        
+        team_name : str
+            the name of the school
+        
+        gender : str
+            specifies whether we are trying to retrieve men or women's team
+
+        season : str
+            the season for the roster (*year*_Cross_Country, *year*_Indoor, or *year*_Outdoor)
+
+        include : tuple
+            what to read from each athlete page, 'bests' and/or 'results'
+
+        workers : int
+            the most athlete pages downloaded at the same time
+
+        team : TeamSeason
+            the handle for the team season if the caller already has one
+
+        Yields
+        ------
+        dict
+            the athlete's name and their 'bests' and/or 'results', or an 'error' message
+        """
+        readers = {'bests': read_athlete_bests, 'results': read_athlete_results}
+        for key in include:
+            if key not in readers:
+                raise ValueError(f"include can only have 'bests' and 'results', not {key!r}")
+        if team is None:
+            team = self.team(state, team_name, gender, season)
+        athlete_urls = team.athlete_urls
+
+        @self.joined
+        def read_athlete(name):
+            values = self.read_page_with(athlete_urls[name], [(readers[key], ()) for key in include])
+            return {'name': name, **dict(zip(include, values))}
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(read_athlete, name): name for name in athlete_urls}
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e: # one bad page should not lose the rest of the team
+                    yield {'name': futures[future], 'error': str(e) or type(e).__name__}
+
+    @instrumented
+    def get_athlete_bests_by_id(self, athlete_id):
+        """
+        Returns the personal bests of an athlete straight from their athlete page, without looking them up on a team.
+
+        Parameters
+        ----------
+        athlete_id : str
+            the TFRRS id of the athlete (the number in /athletes/6873033/...)
+
+        Returns
+        -------
+        dict
+            A dictionary of the athlete's best marks
+        """
+        return self.read_page(self.get_athlete_url(athlete_id), read_found_athlete, athlete_id, 'bests')
+
+    @instrumented
+    def get_athlete_results_by_id(self, athlete_id, since=None):
+        """
+        Returns the history of performances of an athlete straight from their athlete page, without looking them up on a team.
+
+        Parameters
+        ----------
+        athlete_id : str
+            the TFRRS id of the athlete (the number in /athletes/6873033/...)
+
+        since : datetime.date or str
+            only return the meets that started on or after this date. See get_athlete_results
+
+        Returns
+        -------
+        list
+            list of dictionaries containing meet dates, names, and lists of performance results
+        """
+        if since is not None:
+            return list(self.iter_athlete_results_by_id(athlete_id, since))
+        return self.read_page(self.get_athlete_url(athlete_id), read_found_athlete, athlete_id, 'results')
+
+    def iter_athlete_results_by_id(self, athlete_id, since=None):
+        """
+        Yields the history of performances of an athlete one meet at a time. See get_athlete_results_by_id.
+        With a result cache the whole page is read and kept before the first meet is yielded.
+        """
+        if self.reads_whole_pages:
+            meet_results = iter(self.get_athlete_results_by_id(athlete_id))
+        else:
+            meet_results = iter_athlete_results(self.get_athlete_html_by_id(athlete_id))
+        return newer_meets(meet_results, since) if since is not None else meet_results
+
+    @instrumented
+    def get_meets(self):
+        """
+        Returns the meets on the results search page.
+
+        Returns
+        -------
+        list
+            list of dictionaries with the date, meet name, sport and state of each meet
+        """
+        return [dict(meet) for meet in self.get_meet_index().meets]
+
+    def get_meet_index(self):
+        """
+        Returns the index of the meets on the results search page, which is only downloaded again
+        once the index is older than meet_index_ttl.
+
+        Returns
+        -------
+        MeetIndex
+            the meets by normalized name and by id
+        """
+        if self._meet_index is not None and self.clock() < self._meet_index[0]:
+            return self._meet_index[1]
+        meet_index = self.read_page(self.URL+'results_search.html', MeetIndex.from_html) # because this page has very limited results it will not be able to find every meet
+        self._meet_index = (self.clock() + self.meet_index_ttl, meet_index)
+        return meet_index
+
+    def find_meet(self, meet_name):
+        """
+        Finds a meet on the results search page by its name. Case, spacing and punctuation do not matter.
+
+        Parameters
+        ----------
+        meet_name : str
+            the name of the meet
+
+        Returns
+        -------
+        dict
+            the date, meet, sport and state of the meet with its 'id' and 'link'
+        """
+        meet = self.get_meet_index().lookup(meet_name)
+        if meet is None:
+            raise NoMeetFoundException(meet_name)
+        return meet
+
+    @instrumented
+    def search_meets(self, query, limit=10):
+        """
+        Finds meets on the results search page whose name starts with query, or failing that is close to it.
+        See MeetIndex.search
+        """
+        return self.get_meet_index().search(query, limit)
+
+    @instrumented
+    def get_meet_results(self, meet_name, gender, compact=False, columnar=False):
+        """
+        This will find a meet on the results search page and return the results of every event for a gender.
+        Once the results search page is indexed this costs one download.
+
+        Parameters
+        ----------
+        meet_name : str
+            the name of the meet (case, spacing and punctuation do not matter)
+
+        gender : str
+            specifies whether we want the men or women's results
+
+        compact : bool
+            give each event its 'headers' once and its 'results' as tuples instead of a dictionary per result
+
+        columnar : bool
+            return every result as columns with numeric marks and places (see marks.Performances)
+
+        Returns
+        -------
+        list
+            list of dictionaries containing the event name and a list of its results
+        """
+        meet = self.find_meet(meet_name)
+        return self.read_meet(gender_meet_url(meet['link'], gender), gender, meet['id'], meet['meet'], compact, columnar)
+
+    def iter_meet_results(self, meet_name, gender, compact=False):
+        """
+        Yields the results of a meet for a gender one event at a time, as each event table is read.
+        See get_meet_results. With a result cache the whole page is read and kept before the first event is yielded.
+
+        Yields
+        ------
+        dict
+            the event name and a list of its results
+        """
+        meet = self.find_meet(meet_name)
+        return self.iter_meet(gender_meet_url(meet['link'], gender), gender, meet['id'], meet['meet'], compact)
+
+    @instrumented
+    def get_meet_results_by_id(self, meet_id, gender, compact=False, columnar=False):
+        """
+        Returns the results of every event of a meet for a gender without going through the results search page.
+        See get_meet_results.
+
+        Parameters
+        ----------
+        meet_id : str
+            the TFRRS id of the meet (the number in /results/xc/20871/...)
+        """
+        return self.read_meet(self.get_meet_url(meet_id, gender), gender, str(meet_id), '', compact, columnar)
+
+    def iter_meet_results_by_id(self, meet_id, gender, compact=False):
+        """
+        Yields the results of a meet for a gender one event at a time. See get_meet_results_by_id.
+        With a result cache the whole page is read and kept before the first event is yielded.
+        """
+        return self.iter_meet(self.get_meet_url(meet_id, gender), gender, str(meet_id), '', compact)
+
+    @instrumented
+    def get_meet_results_by_gender(self, meet_name, genders=('m', 'f'), compact=False, columnar=False):
+        """
+        Downloads the results of a meet for several genders at the same time.
+
+        Returns
+        -------
+        dict
+            each gender to its results (see get_meet_results)
+        """
+        meet = self.find_meet(meet_name)
+        with ThreadPoolExecutor(max_workers=len(genders)) as pool:
+            futures = {gender: pool.submit(self.joined(self.read_meet), gender_meet_url(meet['link'], gender), gender, meet['id'], meet['meet'], compact, columnar)
+                       for gender in genders}
+            return {gender: future.result() for gender, future in futures.items()}
+
+    def read_meet(self, url, gender, meet_id=None, meet_name='', compact=False, columnar=False):
+        """
+        Returns the results on a meet results page. See iter_meet.
+        """
+        if columnar:
+            events, meet_date = self.meet_page(url, gender, meet_id, meet_name)
+            return meet_results_columns(events, parse_meet_date(meet_date))
+        return list(self.iter_meet(url, gender, meet_id, meet_name, compact))
+
+    def iter_meet(self, url, gender, meet_id=None, meet_name='', compact=False):
+        """
+        Yields the events on a meet results page, from the store if the Hermes has one and the meet is fresh in it.
+        A meet scraped to the end is saved to the store.
+        """
+        yield from self.meet_page(url, gender, meet_id, meet_name, compact)[0]
+
+    def meet_page(self, url, gender, meet_id=None, meet_name='', compact=False):
+        """
+        Returns the events on a meet results page (see iter_meet) and the date in its header ("October 29, 2022").
+        """
+        if self.store is None or meet_id is None:
+            return self.read_events(url, compact)
+        events = self.store.load_meet_results(meet_id, gender)
+        if events is not None:
+            return (event if compact else expand_event(event) for event in events), self.store.load_meet_date(meet_id)
+        events, meet_date = self.read_events(url, compact=True) # the store keeps the headers of events without results
+        return self.saved_events(events, gender, meet_id, meet_name, meet_date, compact), meet_date
+
+    def saved_events(self, events, gender, meet_id, meet_name, meet_date, compact):
+        """
+        Yields the events of a meet as they are read and saves them to the store once they all have been.
+        """
+        saved = []
+        for event in events:
+            saved.append(event)
+            yield event if compact else expand_event(event)
+        self.store.save_meet_results(meet_id, gender, saved, meet_name, meet_date)
+
+    def read_events(self, url, compact=False):
+        """
+        Returns the events on a meet results page, read as the page is walked or whole through read_page_with
+        if the Hermes has a result cache, and the date in the page header.
+        """
+        if not self.reads_whole_pages:
+            meet_html = self.get_soup(url)
+            return iter_meet_results(meet_html, compact), read_meet_date(meet_html)
+        events, meet_date = self.read_page_with(url, [(read_meet_results, (compact,)), (read_meet_date, ())])
+        return iter(events), meet_date
+
+    def get_meet_url(self, meet_id, gender):
+        """
+        Returns the url of the results of a meet for a gender, from the meet index if it is already downloaded.
+        TFRRS redirects a meet id on its own to the meet, so the results search page is never downloaded just for the url.
+        """
+        if self._meet_index is not None:
+            meet = self._meet_index[1].get(meet_id)
+            if meet is not None:
+                return gender_meet_url(meet['link'], gender)
+        return self.URL + f'results/{meet_id}/{gender}/'
 
     def get_soup(self, url): # gets html with beautiful soup
         """
-        This will use the requests library to retrieve the html from a url.
-        The BeautifulSoup library will parse the html to be processed.
+        This will use the transport to retrieve the html from a url.
+        The BeautifulSoup library will parse the html to be processed, only the parts Hermes reads if partial is on.
+        If the Hermes has a cache, a fresh cached soup is returned instead of going to TFRRS.
+        Threads asking for a url that is already being downloaded and parsed wait for it instead of downloading it again
+        (see flights.stats() for how often that happens).
 
         Parameters
         ----------
@@ -200,8 +656,275 @@ class Hermes:
         soup obj
             the soup obj of the webpage html
         """
-        page = requests.get(url)
-        return BeautifulSoup(page.content, "html.parser")
+        if self.cache is not None:
+            soup = self.cache.get(url)
+            if self.metrics is not None:
+                self.metrics.cache_lookups.inc(page_type=page_type(url), result='miss' if soup is None else 'hit')
+            if soup is not None:
+                return soup
+        return self.flights.do(url, self.joined(lambda: self.fetch_soup(url)))
+
+    def fetch_soup(self, url):
+        """
+        Downloads and parses a page and puts it in the cache. See get_soup.
+        """
+        if self.results is None:
+            with self.timed('fetch', url):
+                content = self.get_page(url)
+            if self.metrics is not None:
+                self.metrics.fetched(page_type(url), len(content))
+        else:
+            _, content, etag, last_modified = self.get_response(url)
+            self.results.update(url, hashlib.sha1(content).digest(), etag, last_modified, content)
+        return self.parse_page(url, content)
+
+    def parse_page(self, url, content):
+        with self.timed('parse', url):
+            soup = parse(content, self.parser, url if self.partial else None)
+        if self.cache is not None:
+            self.cache.put(url, soup, len(content))
+        return soup
+
+    def read_page(self, url, reader, *args):
+        """
+        Returns what reader reads from the soup of a page, reader(soup, *args).
+        If the Hermes has a ResultCache, what reader returned is remembered with the page: it is reused while fresh,
+        and once it expires the page is revalidated instead of being parsed again (see revalidate). A result that expired
+        less than the cache's stale_ttl ago is returned as is while the page is revalidated in the background.
+        If the Hermes has a ParsePool, the page is parsed and read in a worker process.
+
+        Parameters
+        ----------
+        url : str
+            the url to a webpage
+
+        reader : callable
+            a function that reads something from the soup of the page, like read_athlete_bests.
+            It has to be a module level function for a ParsePool to send it to its workers
+
+        args : any
+            more arguments for reader
+
+        Returns
+        -------
+        any
+            what reader returned
+        """
+        return self.read_page_with(url, [(reader, args)])[0]
+
+    def read_page_with(self, url, readers):
+        """
+        Returns what each of several readers reads from the same page, like read_page does for one.
+        The page is downloaded and parsed at most once for all the readers that have no fresh result.
+
+        Parameters
+        ----------
+        url : str
+            the url to a webpage
+
+        readers : list
+            (reader, args) pairs, see read_page
+
+        Returns
+        -------
+        list
+            what each reader returned, in the order of readers
+        """
+        readers = [((reader.__name__,) + tuple(args), reader, tuple(args)) for reader, args in readers]
+        if self.results is None:
+            soup = self.get_soup(url)
+            return [reader(soup, *args) for _, reader, args in readers]
+        values, missing = {}, []
+        for key, reader, args in readers:
+            state, value = self.results.lookup(url, key)
+            if state == 'missing':
+                missing.append((key, reader, args))
+                continue
+            values[key] = value
+            if state == 'stale':
+                self.revalidate_later(url, key, reader, args)
+        if missing:
+            flight = ('read', url) + tuple(key for key, _, _ in missing)
+            values.update(self.flights.do(flight, self.joined(lambda: self.revalidate(url, missing))))
+        return [values[key] for key, _, _ in readers]
+
+    def revalidate_later(self, url, key, reader, args):
+        """
+        Revalidates a stale result on a background thread, unless it is already being revalidated.
+        A failed revalidation leaves the stale result in place, the next request that finds it stale tries again.
+        """
+        flight = ('read', url) + key
+        with self._refreshing_lock:
+            if flight in self.refreshing:
+                return
+            self.refreshing.add(flight)
+            if self.background is None:
+                self.background = ThreadPoolExecutor(2, thread_name_prefix='hermes-refresh')
+            background = self.background
+        def refresh():
+            try:
+                self.flights.do(flight, lambda: self.revalidate(url, [(key, reader, args)]))
+            except Exception as e:
+                if self.metrics is not None:
+                    self.metrics.errors.inc(method='revalidate', exception=type(e).__name__)
+            finally:
+                with self._refreshing_lock:
+                    self.refreshing.discard(flight)
+        background.submit(refresh)
+
+    def revalidate(self, url, readers):
+        """
+        Reads a page for the readers whose results are missing or expired. Results made fresh meanwhile (by another
+        reader revalidating the page) are used as they are. The page comes from the page cache if it is there, or else from
+        the body kept with a fresh revision of it, and only otherwise is it downloaded conditionally with the ETag and
+        Last-Modified of the last download. The results are reused as they are when TFRRS answers 304 or the content hash
+        matches, and the page is only parsed and read for the readers that still have no result.
+
+        Parameters
+        ----------
+        readers : list
+            (key, reader, args) of each reader, the key its results are cached under
+
+        Returns
+        -------
+        dict
+            the key of each reader to what it returned
+        """
+        values = {}
+        def still_missing():
+            missing = []
+            for key, reader, args in readers:
+                if key in values:
+                    continue
+                found, value = self.results.peek(url, key)
+                if found:
+                    values[key] = value
+                else:
+                    missing.append((key, reader, args))
+            return missing
+
+        missing = still_missing()
+        if not missing:
+            return values
+        soup = self.cache.get(url) if self.cache is not None else None
+        if soup is not None:
+            read = [reader(soup, *args) for _, reader, args in missing]
+        else:
+            content = self.results.body(url)
+            if content is None:
+                status, content, etag, last_modified = self.get_response(url, self.results.validators(url))
+                if status == 304:
+                    self.results.revalidated(url)
+                    self.count_revalidation(url, 'not_modified')
+                    content = self.results.body(url)
+                    missing = still_missing()
+                    if not missing:
+                        return values
+                    if content is None: # the body was not kept, it is needed after all
+                        status, content, etag, last_modified = self.get_response(url)
+                if status != 304:
+                    if self.results.update(url, hashlib.sha1(content).digest(), etag, last_modified, content):
+                        self.count_revalidation(url, 'unchanged')
+                        missing = still_missing()
+                        if not missing:
+                            return values
+                    else:
+                        self.count_revalidation(url, 'changed')
+            read = self.extract(url, content, missing)
+        for (key, _, _), value in zip(missing, read):
+            self.results.put(url, key, value)
+            values[key] = value
+        return values
+
+    def extract(self, url, content, readers):
+        """
+        Parses a downloaded page once and reads it with every (key, reader, args) of readers,
+        in a worker of the parse pool if the Hermes has one.
+
+        Returns
+        -------
+        list
+            what each reader returned
+        """
+        readers = [(reader, args) for _, reader, args in readers]
+        if self.pool is None:
+            return read_with(self.parse_page(url, content), readers)
+        with self.timed('parse', url):
+            return self.pool.extract(content, read_with, (readers,), self.parser, url if self.partial else None)
+
+    @property
+    def reads_whole_pages(self):
+        """
+        Whether pages are read whole through read_page (the Hermes has a result cache, and maybe a parse pool)
+        rather than walked lazily as their results are yielded.
+        """
+        return self.results is not None
+
+    def count_revalidation(self, url, result):
+        if self.metrics is not None:
+            self.metrics.revalidations.inc(page_type=page_type(url), result=result)
+
+    def get_response(self, url, headers=None):
+        """
+        Downloads a page, conditionally if headers has If-None-Match or If-Modified-Since.
+        Transports with only a get(url) method always download the whole page.
+
+        Returns
+        -------
+        tuple
+            the status code, the body, and the ETag and Last-Modified headers of the response (None if missing)
+        """
+        with self.timed('fetch', url):
+            if hasattr(self.transport, 'request'):
+                response = self.transport.request(url, headers or None)
+                status, content = response.status_code, response.content
+                etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+                if self.archive is not None and status != 304:
+                    self.archive.put(url, content)
+            else:
+                status, content, etag, last_modified = 200, self.get_page(url), None, None
+        if self.metrics is not None:
+            self.metrics.fetched(page_type(url), len(content))
+        return status, content, etag, last_modified
+
+    def timed(self, stage, url):
+        """
+        Times the fetch or parse of a page when the Hermes has metrics.
+        """
+        return self.metrics.timed(stage, page_type(url)) if self.metrics is not None else nullcontext()
+
+    def joined(self, function):
+        """
+        Wraps function so that when it runs on another thread (ie in a thread pool) it counts towards the metrics
+        of the call running now.
+        """
+        call = self.metrics.current() if self.metrics is not None else None
+        if call is None:
+            return function
+        @wraps(function)
+        def joined_function(*args, **kwargs):
+            with self.metrics.join(call):
+                return function(*args, **kwargs)
+        return joined_function
+
+    def get_page(self, url):
+        """
+        Downloads the raw html of a webpage with the transport.
+
+        Parameters
+        ----------
+        url : str
+            the url to a webpage
+
+        Returns
+        -------
+        bytes
+            the body of the response
+        """
+        content = self.transport.get(url)
+        if self.archive is not None:
+            self.archive.put(url, content)
+        return content
 
     def get_athlete_html(self, name, state, team_name, gender, season):
         """
@@ -230,22 +953,40 @@ class Hermes:
         soup obj
             the soup obj of the webpage html
         """
-        team_html = self.get_team_html(state, team_name, gender, season)
-        roster_rows = self.get_table_by_heading(team_html, 'NAME')
-        athlete_url = ''
-        for athlete_info in roster_rows('td'): # does a look up of the athlete by name
-            if name == remove_whitespace(athlete_info.text).replace(',', '_'):
-                athlete_url = self.URL + athlete_info('a')[0]['href']
-                return self.get_soup(athlete_url)  
-                
-        raise NoAthleteFoundException(name)
+        return self.team(state, team_name, gender, season).athlete_html(name)
         
+    def get_athlete_html_by_id(self, athlete_id):
+        """
+        This will retrieve the html for an athlete given their TFRRS id.
+
+        Parameters
+        ----------
+        athlete_id : str
+            the TFRRS id of the athlete (the number in /athletes/6873033/...)
+
+        Returns
+        -------
+        soup obj
+            the soup obj of the webpage html
+        """
+        athlete_html = self.get_soup(self.get_athlete_url(athlete_id))
+        if athlete_html.find(id="meet-results") is None: # TFRRS serves an error page for ids that do not exist
+            raise NoAthleteFoundException(athlete_id)
+        return athlete_html
+
+    def get_athlete_url(self, athlete_id):
+        if self.athletes is not None and self.athletes.get_url(athlete_id) is not None:
+            return self.athletes.get_url(athlete_id)
+        return self.URL + f'athletes/{athlete_id}.html'
+
+    @instrumented
     def get_year_keys(self, state, team_name, gender): # for getting the key "configure_hnd" so we can get the html page from a certain year
         """
         This method is essential for finding the team on a given year. Tffrs has values for each team and their corresponding
         season. ie (2022_Cross_Country : 330)
         This method first gets the most recent html page for a team and then finds a previous season and its value then
         will return dictionary of the seasons and their values.
+        The values are remembered for season_keys_ttl seconds so the team page is not downloaded again just to read them.
         Parameters
         ----------
         state : str
@@ -262,19 +1003,69 @@ class Hermes:
         dict
             Season and its values
         """
-       
-        soup = self.get_soup(self.URL + f'teams/{state.upper()}_college_{gender.lower()}_{team_name}.html')
-        form_control = soup.find("select", class_="form-control")
-        if form_control is None:
-            raise NoTeamFoundException(team_name)
-        year_info = form_control.find_all("option")
-        year_info.pop(0) # dictionary comprehension to get the keys and values for the years
-        return {year.text.strip().replace('NCAA','').replace(' ','_').replace('__','_') : str(year).split('"')[1] for year in year_info}
+        current, keys, _ = self.get_season_index(state, team_name, gender)
+        return {season: key for season, key in keys.items() if season != current}
+
+    def get_season_index(self, state, team_name, gender):
+        """
+        Returns every season of a team with its config_hnd value and which of them is the current season.
+        The base team page is only downloaded when the index is missing or has expired (and is not fresh in the store), in which case
+        the parsed page is handed back so the caller can reuse it for the current season.
+
+        Parameters
+        ----------
+        state : str
+            state where the school is located. (There can be multiple universities with the same name)
+        
+        team_name : str
+            the name of the school
         
+        gender : str
+            specifies whether we are trying to retrieve men or women's team
+
+        Returns
+        -------
+        tuple
+            the current season, a dict of every season and its value, and the soup obj of the base team page
+            (None if the index was already known)
+        """
+        index_key = (state.upper(), team_name, gender.lower())
+        entry = self._season_keys.get(index_key)
+        if entry is not None and self.clock() < entry[0]:
+            return entry[1], entry[2], None
+        stored = self.store.load_seasons(state, team_name, gender) if self.store is not None else None
+        if stored is not None:
+            self._season_keys[index_key] = (self.clock() + self.season_keys_ttl, *stored)
+            return stored[0], stored[1], None
+        soup = self.get_soup(self.get_team_url(state, team_name, gender))
+        current, keys = read_season_keys(soup, team_name)
+        self._season_keys[index_key] = (self.clock() + self.season_keys_ttl, current, keys)
+        if self.store is not None:
+            self.store.save_seasons(state, team_name, gender, current, keys)
+        return current, keys, soup
+
+    def is_past_season(self, state, team_name, gender, season):
+        """
+        Whether season is over for a team, so what was scraped from it will not change again.
+        Only the current season (the one the base team page shows) is not over.
+        """
+        try:
+            current = self.get_season_index(state, team_name, gender)[0]
+        except NoTeamFoundException:
+            return False
+        return current is not None and season != current
+
+    def get_team_url(self, state, team_name, gender, season_key=None):
+        url = self.URL + f'teams/{state.upper()}_college_{gender.lower()}_{team_name}.html'
+        if season_key is not None:
+            url += f'?config_hnd={season_key}'
+        return url
         
     def get_team_html(self, state, team_name, gender, season):
         """
         This will retrieve the html for a particular season for a team on the Tfrrs website.
+        At most one page is downloaded per season page needed: the base team page already is the current season,
+        so it is reused when the season index had to be built from it and read from its url afterwards.
 
         Parameters
         ----------
@@ -296,10 +1087,10 @@ class Hermes:
             the soup obj of the webpage html
         """
         try:
-            page_url = self.URL + f'teams/{state.upper()}_college_{gender.lower()}_{team_name}.html'
-            year_keys = self.get_year_keys(state, team_name, gender) # retrieve the value for the season we want to find
-            page_url += f'?config_hnd={year_keys[season]}'
-            return self.get_soup(page_url)
+            current, year_keys, base_html = self.get_season_index(state, team_name, gender) # retrieve the value for the season we want to find
+            if season == current: # the base page, from the cache once the season index is remembered
+                return base_html if base_html is not None else self.get_soup(self.get_team_url(state, team_name, gender))
+            return self.get_soup(self.get_team_url(state, team_name, gender, year_keys[season]))
         except NoTableFoundException:
             raise NoTeamFoundException(team_name)
 
@@ -325,6 +1116,154 @@ class Hermes:
         raise NoTableFoundException(heading)
 
 
+class TeamSeason:
+    def __init__(self, hermes, state, team_name, gender, season):
+        """
+        One season of a team on TFRRS. Created with Hermes.team. Everything is read lazily from a single
+        download of the team page, so pulling the roster, top performances and several athletes costs one team fetch.
+
+        Parameters
+        ----------
+        hermes : Hermes
+            the Hermes used to download pages
+
+        state : str
+            state where the school is located. (There can be multiple universities with the same name)
+        
+        team_name : str
+            the name of the school
+        
+        gender : str
+            specifies whether we are trying to retrieve men or women's team
+
+        season : str
+            the season for the roster (*year*_Cross_Country, *year*_Indoor, or *year*_Outdoor)
+        """
+        self.hermes = hermes
+        self.state = state
+        self.team_name = team_name
+        self.gender = gender
+        self.season = season
+        self._html = None
+        self._roster = None
+        self._top_performances = None
+        self._athlete_urls = None
+
+    @property
+    def html(self):
+        """
+        soup obj of the team season page, downloaded the first time it is needed
+        """
+        if self._html is None:
+            self._html = self.hermes.get_team_html(self.state, self.team_name, self.gender, self.season)
+        return self._html
+
+    @property
+    def url(self):
+        """
+        the url of the team season page. The base team page already is the current season.
+        """
+        try:
+            current, keys, _ = self.hermes.get_season_index(self.state, self.team_name, self.gender)
+        except NoTableFoundException:
+            raise NoTeamFoundException(self.team_name)
+        if self.season == current:
+            return self.hermes.get_team_url(self.state, self.team_name, self.gender)
+        return self.hermes.get_team_url(self.state, self.team_name, self.gender, keys[self.season])
+
+    def read(self, reader, *args):
+        """
+        Reads something from the team page, through Hermes.read_page if the Hermes has a result cache
+        (so an unchanged team page is not parsed again, and with a parse pool it is parsed in a worker) or else from the downloaded page.
+        """
+        if self.hermes.reads_whole_pages and self._html is None:
+            return self.hermes.read_page(self.url, reader, *args)
+        return reader(self.html, *args)
+
+    @property
+    def roster(self):
+        """
+        list of dictionaries containing athlete information
+        """
+        if self._roster is None:
+            self._roster = self.read(read_team_table, 'NAME')
+            if self.hermes.athletes is not None:
+                self.athlete_urls # scraping a roster fills in the athlete index
+        return self._roster
+
+    @property
+    def top_performances(self):
+        """
+        list of dictionaries containing list of performances
+        """
+        if self._top_performances is None:
+            self._top_performances = self.read(read_team_table, 'EVENT') #getting top performance table by the EVENT heading, hackish ik.
+        return self._top_performances
+
+    @property
+    def athlete_urls(self):
+        """
+        dict of athlete names (Last_First) to the url of their athlete page
+        """
+        if self._athlete_urls is None:
+            self._athlete_urls = self.read(read_athlete_urls, self.hermes.URL)
+            if self.hermes.athletes is not None:
+                self.hermes.athletes.add_team(self.state, self.team_name, self.gender, self.season, self._athlete_urls)
+        return self._athlete_urls
+
+    def athlete_html(self, name):
+        """
+        Returns the soup obj of an athlete's page.
+        Athletes already in the Hermes' athlete index are downloaded directly without the team page.
+
+        Parameters
+        ----------
+        name : str
+            The name of the athlete (Last_First)
+
+        Returns
+        -------
+        soup obj
+            the soup obj of the webpage html
+        """
+        return self.hermes.get_soup(self.athlete_url(name))
+
+    def athlete_url(self, name):
+        """
+        Returns the url of an athlete's page, from the Hermes' athlete index if they are in it
+        (so the team page does not need to be downloaded) or else from the roster.
+
+        Parameters
+        ----------
+        name : str
+            The name of the athlete (Last_First)
+
+        Returns
+        -------
+        str
+            the url of the athlete page
+        """
+        if self._athlete_urls is None and self.hermes.athletes is not None:
+            indexed = self.hermes.athletes.lookup(name, self.state, self.team_name, self.gender, self.season)
+            if indexed is not None:
+                return indexed[1]
+        if name not in self.athlete_urls:
+            raise NoAthleteFoundException(name)
+        return self.athlete_urls[name]
+
+    def bests(self, name):
+        """
+        Returns the personal bests of an athlete on the team. See Hermes.get_athlete_bests.
+        """
+        return self.hermes.read_page(self.athlete_url(name), read_athlete_bests)
+
+    def results(self, name):
+        """
+        Returns the history of performances of an athlete on the team. See Hermes.get_athlete_results.
+        """
+        return self.hermes.read_page(self.athlete_url(name), read_athlete_results)
+
+
 class NoAthleteFoundException(Exception):
     def __init__(self, name):
         self.message = f"Athlete: {name}, could not be found"
@@ -336,43 +1275,255 @@ class NoTeamFoundException(Exception):
         super().__init__(self.message)
 
 
+class NoMeetFoundException(Exception):
+    def __init__(self, meet_name):
+        self.message = f"Meet: {meet_name}, could not be found"
+        super().__init__(self.message)
+
+
 class NoTableFoundException(Exception):
     def __init__(self, heading):
         self.message = f"Table with heading: {heading}, could not be found"
         super().__init__(self.message)
 
 
-def remove_whitespace(string):
+def read_with(soup, readers):
+    """
+    Reads a page with several readers, [reader(soup, *args) for reader, args in readers], so it is only parsed once for all of them.
+    """
+    return [reader(soup, *args) for reader, args in readers]
+
+
+def read_team_table(team_html, heading):
+    """
+    Reads the rows of the table on a team page whose first header is heading ('NAME' for the roster, 'EVENT' for top performances).
+    """
+    for table in team_html.find_all("table", class_="tablesaw"):
+        th = table.find('th')
+        if th is not None and th.text.strip() == heading:
+            return get_table_data(table)[1:]
+    raise NoTableFoundException(heading)
+
+
+def read_athlete_urls(team_html, base_url):
+    """
+    Reads the athlete names (Last_First) on the roster of a team page and the urls of their athlete pages.
+    """
+    for table in team_html.find_all("table", class_="tablesaw"):
+        th = table.find('th')
+        if th is not None and th.text.strip() == 'NAME':
+            break
+    else:
+        raise NoTableFoundException('NAME')
+    athlete_urls = {}
+    for athlete_info in table('td'):
+        link = athlete_info.find('a')
+        if link is not None:
+            name = remove_whitespace(athlete_info.text).replace(',', '_')
+            athlete_urls.setdefault(name, base_url + link['href'])
+    return athlete_urls
+
+
+def read_found_athlete(athlete_html, athlete_id, part):
+    """
+    Reads the 'bests' or 'results' of an athlete page that was looked up by id.
+    TFRRS serves an error page for ids that do not exist, which raises NoAthleteFoundException.
+    """
+    if athlete_html.find(id="meet-results") is None:
+        raise NoAthleteFoundException(athlete_id)
+    return read_athlete_bests(athlete_html) if part == 'bests' else read_athlete_results(athlete_html)
+
+
+def read_athlete_bests(athlete_html):
+    """
+    Reads the personal bests table out of an athlete page.
+
+    Parameters
+    ----------
+    athlete_html : soup obj
+        the html of an athlete page
+
+    Returns
+    -------
+    dict
+        A dictionary of the athlete's best marks
+    """
+    table_bests = athlete_html.find("table", class_="table bests")
+    rows = table_bests.find_all("td")
+    bests = {}
+    for i in range(0,len(rows), 2):
+        event = remove_whitespace(rows[i].text)
+        mark = remove_whitespace(rows[i+1].text).strip('\\"').replace('m', 'm ') #hackish way of spacing metric and standard
+        if event != "" or mark != "":
+            bests[event] = mark
+    return bests
+
+
+def read_athlete_results(athlete_html):
+    """
+    Reads the history of performances out of the meet results section of an athlete page.
+
+    Parameters
+    ----------
+    athlete_html : soup obj
+        the html of an athlete page
+
+    Returns
+    -------
+    list
+        list of dictionaries containing meet dates, names, and lists of performance results
+    """
+    return list(iter_athlete_results(athlete_html))
+
+
+def iter_athlete_results(athlete_html):
+    """
+    Reads the meet tables of an athlete page one at a time. See read_athlete_results.
+
+    Yields
+    ------
+    dict
+        the meet date, name, and list of performance results
+    """
+    info_keys = ['event', 'result', 'place']
+    meet_results_tables = athlete_html.find(id="meet-results").find_all("table")
+    for meet_table in meet_results_tables:
+        # there are some divs in athlete results to specify whether they transferred or not, resulting in a None.
+        if meet_table.find("thead") is not None:
+            title = meet_table.find("thead").text.strip().replace('\xa0\xa0\xa0', '')
+            meet_name, date = title.split('\n')
+            meet_info = {}
+            meet_info['meet_name'] = meet_name
+            meet_info['date'] = date
+            meet_info['performances'] = get_table_data(meet_table, info_keys)[1:] #set the keys manually because these tables do not have headers
+            yield meet_info
+
+
+def newer_meets(meet_results, since):
+    """
+    Yields the meets of an athlete's results (newest first, as on the athlete page) that started on or after since,
+    and stops at the first older one so the rest are never read. Meets whose date cannot be read are kept.
+
+    Parameters
+    ----------
+    meet_results : iterable
+        the meets, like iter_athlete_results yields them
+
+    since : datetime.date or str
+        the watermark ("2022-05-18")
+    """
+    since = parse_since(since)
+    for meet in meet_results:
+        meet_date = parse_meet_date(meet['date'])
+        if meet_date is not None and meet_date < since:
+            return
+        yield meet
+
+
+def results_cursor(meet_results, since=None):
+    """
+    Returns the watermark to sync an athlete's results from next time: the start of their newest meet
+    (or since if there are no meets). The newest meet is sent again by the next sync since results
+    can still be added to a meet that is going on.
+
+    Returns
+    -------
+    str
+        the date like "2022-05-18", None without meets or since
+    """
+    dates = [meet_date for meet_date in (parse_meet_date(meet['date']) for meet in meet_results) if meet_date is not None]
+    cursor = max(dates) if dates else parse_since(since)
+    return cursor.isoformat() if cursor is not None else None
+
+
+def read_meet_results(meet_html, compact=False):
+    """
+    Reads the results of every event out of a meet results page.
+
+    Parameters
+    ----------
+    meet_html : soup obj
+        the html of a meet results page
+
+    compact : bool
+        give each event its 'headers' once and its 'results' as tuples instead of a dictionary per result
+
+    Returns
+    -------
+    list
+        list of dictionaries containing the event name and a list of its results
+    """
+    return list(iter_meet_results(meet_html, compact))
+
+
+def iter_meet_results(meet_html, compact=False):
     """
-    removes whitespace characters like \n and \t 
+    Reads the event tables of a meet results page one at a time. See read_meet_results.
+
+    Yields
+    ------
+    dict
+        the event name and a list of its results
+    """
+    table_containers = meet_html.find_all('div', class_='col-lg-12')
+    for table_cont in table_containers:
+        event = {}
+        event_name = table_cont.find('div', class_='custom-table-title').text.strip().split('\n')
+        event['name'] = f'{event_name[0]} {event_name[1]}' # doing this so we don't lose info on whether its a final or prelim
+        table = table_cont.find('table')
+        if compact:
+            event['headers'], event['results'] = read_table(table, same_size=True)
+        else:
+            event['results'] = get_table_data(table, same_size=True) # set same_size to true bc we don't want fouls or what happened on field event attempts
+        yield event
+
 
-    Paramters
-    ---------
-    string : str
-        string we want to remove white space from
+def read_meet_date(meet_html):
+    """
+    Reads the date in the header of a meet results page.
 
     Returns
     -------
     str
-        string stripped of whitespace
+        the date as it is written on the page ("October 29, 2022"), or '' if the page has none
+    """
+    for heading in meet_html.find_all('div', class_='panel-heading-normal-text'):
+        text = ' '.join(heading.get_text().split())
+        if parse_meet_date(text) is not None:
+            return text
+    return ''
+
+
+def expand_event(event):
+    """
+    Turns a compact event (see read_meet_results) back into one with a dictionary per result.
+    """
+    return {'name': event['name'], 'results': [dict(zip(event['headers'], row)) for row in event['results']]}
+
+
+def read_season_keys(team_html, team_name):
+    """
+    Reads the seasons and their config_hnd values out of the season select on a team page.
+
+    Parameters
+    ----------
+    team_html : soup obj
+        the html of a team page
+
+    team_name : str
+        the name of the school, used for the exception if the page is not a team page
+
+    Returns
+    -------
+    tuple
+        the name of the season the page is showing and a dict of every season and its value
     """
-    pattern = re.compile(r'\s+')
-    return re.sub(pattern, '', string)
-
-
-def get_table_data(table, keys=None, same_size=False): # general function idea
-    collection = []
-    table_head = table.find('thead') 
-    if keys is None:
-        headers = table_head.find_all('th')
-        keys = [remove_whitespace(header.text).lower() for header in headers]
-
-    rows = table.find_all("tr")
-    for row in rows:
-        info = {}
-        row = row.find_all("td")
-        for i in range(len(row)): # should this be zip?
-            info[keys[i]] = row[i].text.replace('\xa0\n', '').replace('\n',' ').replace('           ', ' ').strip('\\"').strip()
-        if ((same_size and len(row) == len(keys)) or not same_size): #same size enforces that the data found and the keys we want need to be the same size. This is helpful for avoiding information on tables you dont want.
-            collection.append(info)
-    return collection
+    form_control = team_html.find("select", class_="form-control")
+    if form_control is None:
+        raise NoTeamFoundException(team_name)
+    year_info = form_control.find_all("option")
+    season_name = lambda year: year.text.strip().replace('NCAA','').replace(' ','_').replace('__','_')
+    keys = {season_name(year) : year['value'] for year in year_info}
+    selected = form_control.find("option", selected=True) or (year_info[0] if year_info else None)
+    current = season_name(selected) if selected is not None else None
+    return current, keys
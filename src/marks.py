@@ -0,0 +1,289 @@
+import math, re
+from array import array
+from datetime import date
+
+# a time like 10.98, 4:05.12 or 1:02:03.4
+TIME = re.compile(r'^(?:(\d+):)?(?:(\d+):)?(\d+(?:\.\d+)?)$')
+# a metric field mark like 15.20m, 5.65mw or 16.11m
+METERS = re.compile(r'^(\d+(?:\.\d+)?)m$')
+# an imperial field mark like 49' 10.5" or 52'10.25
+FEET = re.compile(r"^(\d+)'\s*(\d+(?:\.\d+)?)?\"?$")
+# a wind reading like (3.1), (-0.4) or (+1.2)
+WIND = re.compile(r'\(\s*([+-]?\d+(?:\.\d+)?)\s*\)')
+PLACE = re.compile(r'^(\d+)(?:st|nd|rd|th)?\s*(?:\((\w+)\))?$', re.IGNORECASE)
+MEET_DATE = re.compile(r'([A-Z][a-z]{2})[a-z]*\s+(\d{1,2})(?:\s*-\s*(?:([A-Z][a-z]{2})[a-z]*\s+)?\d{1,2})?,\s*(\d{4})')
+MONTHS = {month: i for i, month in enumerate(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1)}
+STATUSES = {'DNF', 'DNS', 'DQ', 'FOUL', 'NM', 'NH', 'FS', 'SCR'}
+MULTI_EVENTS = ('DEC', 'HEP', 'PENT') # events scored in points
+
+
+class Mark:
+    __slots__ = ('text', 'value', 'unit', 'wind', 'flags')
+
+    def __init__(self, text, value=None, unit=None, wind=None, flags=()):
+        """
+        A performance mark read from its TFRRS text.
+
+        Attributes
+        ----------
+        text : str
+            the mark as it appeared on TFRRS
+
+        value : float
+            the mark in seconds, meters or points (None for DNF, DQ and other marks without a value)
+
+        unit : str
+            's', 'm' or 'pts'
+
+        wind : float
+            the wind reading in m/s if there was one
+
+        flags : tuple
+            anything else about the mark ie ('wind-aided',) or ('DNF',)
+        """
+        self.text = text
+        self.value = value
+        self.unit = unit
+        self.wind = wind
+        self.flags = tuple(flags)
+
+    def __repr__(self):
+        return f'Mark({self.text!r}, value={self.value}, unit={self.unit!r}, wind={self.wind}, flags={self.flags})'
+
+    def __eq__(self, other):
+        return isinstance(other, Mark) and (self.value, self.unit, self.wind, self.flags) == (other.value, other.unit, other.wind, other.flags)
+
+
+def parse_mark(text, event=None):
+    """
+    Reads a mark like "4:05.12", "10.98w (3.1)" or "15.20m  49' 10.5"" into a number.
+    Times become seconds and field marks become meters (the imperial conversion TFRRS shows next to metric marks is ignored).
+
+    Parameters
+    ----------
+    text : str
+        the mark as it appears on TFRRS
+
+    event : str
+        the event the mark is for. Marks in multi events (Dec, Hep, Pent) are points rather than seconds.
+
+    Returns
+    -------
+    Mark
+        the parsed mark
+    """
+    flags = []
+    wind = None
+    rest = text.strip()
+    if rest.upper() in STATUSES:
+        return Mark(text, flags=(rest.upper(),))
+
+    wind_match = WIND.search(rest)
+    if wind_match:
+        wind = float(wind_match.group(1))
+        rest = (rest[:wind_match.start()] + ' ' + rest[wind_match.end():]).strip()
+    first = rest.partition(' ')[0]
+    if first[-1:] in ('w', 'W'): # TFRRS marks wind aided performances with a w
+        flags.append('wind-aided')
+        first = first[:-1]
+
+    meters = METERS.match(first)
+    if meters:
+        return Mark(text, float(meters.group(1)), 'm', wind, flags)
+    feet = FEET.match(rest)
+    if feet:
+        return Mark(text, round(int(feet.group(1)) * 0.3048 + float(feet.group(2) or 0) * 0.0254, 4), 'm', wind, flags)
+    time = TIME.match(first)
+    if time:
+        hours, minutes, seconds = time.groups()
+        if minutes is None: # with only one colon the first group is minutes
+            hours, minutes = None, hours
+        value = int(hours or 0) * 3600 + int(minutes or 0) * 60 + float(seconds)
+        if event is not None and event.upper().startswith(MULTI_EVENTS):
+            return Mark(text, value, 'pts', wind, flags)
+        return Mark(text, round(value, 3), 's', wind, flags)
+    return Mark(text, flags=flags + ['unknown'])
+
+
+def parse_place(text):
+    """
+    Reads a place like "4th(F)" or "24th(P)".
+
+    Returns
+    -------
+    tuple
+        the place as an int (None if there was none) and the round ('F' for final, 'P' for prelim, or None)
+    """
+    match = PLACE.match(text.strip())
+    if match is None:
+        return None, None
+    return int(match.group(1)), match.group(2)
+
+
+def parse_meet_date(text):
+    """
+    Reads the (first) day of a meet date like "May 18-19, 2022" or "Nov 12, 2022".
+    The year is the one the meet ends in, so a meet like "Dec 31-Jan 2, 2023" started the year before.
+
+    Returns
+    -------
+    datetime.date
+        the date or None if it could not be read
+    """
+    match = MEET_DATE.search(text)
+    if match is None or match.group(1) not in MONTHS:
+        return None
+    month, year = MONTHS[match.group(1)], int(match.group(4))
+    if match.group(3) in MONTHS and MONTHS[match.group(3)] < month:
+        year -= 1
+    return date(year, month, int(match.group(2)))
+
+
+def parse_since(value):
+    """
+    Reads a sync watermark: a date, or a string like "2022-05-18" (a datetime is cut down to its day).
+
+    Returns
+    -------
+    datetime.date
+        the date, None if value is None
+
+    Raises
+    ------
+    ValueError
+        if value is not a date
+    """
+    if value is None or type(value) is date:
+        return value
+    if isinstance(value, date): # a datetime
+        return value.date()
+    return date.fromisoformat(str(value).strip()[:10])
+
+
+class Performances:
+    def __init__(self):
+        """
+        Performances stored as columns rather than one dictionary each, so thousands of them can be sorted or
+        aggregated with array operations. Numeric columns are arrays: mark and wind are NaN when missing,
+        date (as a date ordinal) and place are 0 when missing.
+
+        Attributes
+        ----------
+        event : list
+            the event of each performance
+
+        mark : array
+            the mark in seconds, meters or points
+
+        unit : list
+            's', 'm' or 'pts' for each mark ('' when the mark has no value)
+
+        wind : array
+            the wind reading
+
+        date : array
+            the date as date.toordinal()
+
+        place : array
+            the place
+
+        athlete : list
+            who the performance is by, when that is known
+
+        meet : list
+            the meet the performance was at, when that is known
+
+        text : list
+            the mark as it appeared on TFRRS
+        """
+        self.event = []
+        self.mark = array('d')
+        self.unit = []
+        self.wind = array('d')
+        self.date = array('l')
+        self.place = array('l')
+        self.athlete = []
+        self.meet = []
+        self.text = []
+
+    COLUMNS = ('event', 'mark', 'unit', 'wind', 'date', 'place', 'athlete', 'meet', 'text')
+
+    def append(self, event, result, date=None, place=None, athlete='', meet=''):
+        mark = parse_mark(result, event)
+        self.event.append(event)
+        self.mark.append(mark.value if mark.value is not None else math.nan)
+        self.unit.append(mark.unit or '')
+        self.wind.append(mark.wind if mark.wind is not None else math.nan)
+        self.date.append(date.toordinal() if date is not None else 0)
+        self.place.append(place or 0)
+        self.athlete.append(athlete)
+        self.meet.append(meet)
+        self.text.append(result)
+
+    def __len__(self):
+        return len(self.event)
+
+    def to_dict(self):
+        """
+        Returns
+        -------
+        dict
+            every column as a plain list (NaN becomes None) so it can be serialized to json
+        """
+        columns = {}
+        for name in self.COLUMNS:
+            column = list(getattr(self, name))
+            if name in ('mark', 'wind'):
+                column = [None if math.isnan(value) else value for value in column]
+            columns[name] = column
+        return columns
+
+    def to_numpy(self):
+        """
+        Returns
+        -------
+        dict
+            every column as a numpy array (numpy has to be installed)
+        """
+        import numpy as np
+        return {name: np.asarray(getattr(self, name)) if isinstance(getattr(self, name), array) else np.array(getattr(self, name), dtype=object)
+                for name in self.COLUMNS}
+
+
+def athlete_results_columns(meet_results):
+    """
+    Turns the output of Hermes.get_athlete_results into Performances.
+    """
+    performances = Performances()
+    for meet in meet_results:
+        meet_date = parse_meet_date(meet['date'])
+        for performance in meet['performances']:
+            performances.append(performance.get('event', ''), performance.get('result', ''), meet_date,
+                                parse_place(performance.get('place', ''))[0], meet=meet['meet_name'])
+    return performances
+
+
+def top_performances_columns(top_performances):
+    """
+    Turns the output of Hermes.get_top_performances into Performances.
+    """
+    performances = Performances()
+    for performance in top_performances:
+        performances.append(performance.get('event', ''), performance.get('time/mark', ''), athlete=performance.get('athlete/squad', ''))
+    return performances
+
+
+def meet_results_columns(events, meet_date=None):
+    """
+    Turns the output of Hermes.get_meet_results into Performances, all on meet_date (the date in the header of the
+    meet results page). Team score tables have no marks and are left out.
+    """
+    performances = Performances()
+    for event in events:
+        for result in event['results']:
+            mark = result.get('time', result.get('mark'))
+            if mark is None:
+                continue
+            performances.append(event['name'], mark, meet_date, parse_place(result.get('pl', ''))[0],
+                                athlete=result.get('name', result.get('team', '')))
+    return performances
@@ -0,0 +1,144 @@
+import re
+from bisect import bisect_left
+from difflib import get_close_matches
+
+from src.tables import get_table_data
+
+MEET_ID = re.compile(r'/results/(?:[a-z]+/)?(\d+)')
+NOT_ALPHANUMERIC = re.compile(r'[^a-z0-9]+')
+
+
+def get_meet_id(url):
+    """
+    Pulls the meet id out of a meet url. ie (//www.tfrrs.org/results/xc/20871/NCAA_Landmark_Conference_Championships : 20871)
+
+    Parameters
+    ----------
+    url : str
+        the url to a meet results page
+
+    Returns
+    -------
+    str
+        the meet id or None if the url is not a meet results page
+    """
+    match = MEET_ID.search(url)
+    return match.group(1) if match else None
+
+
+def normalize_meet_name(name):
+    """
+    Lowercases a meet name and collapses everything that is not a letter or number into single spaces,
+    so "Paul Short Run", "paul short  run" and "Paul-Short Run" are the same meet.
+    """
+    return NOT_ALPHANUMERIC.sub(' ', name.lower()).strip()
+
+
+def gender_meet_url(link, gender):
+    """
+    Turns the link of a meet on the results search page into the url of the results for a gender.
+
+    Parameters
+    ----------
+    link : str
+        the href of the meet on the results search page
+
+    gender : str
+        specifies whether we want the men or women's results
+
+    Returns
+    -------
+    str
+        the url of the meet results for the gender
+    """
+    link = link.split('NCAA')
+    return f'http:{link[0]}{gender}/{link[1]}' # reformatting the url to get the gender we want
+
+
+class MeetIndex:
+    def __init__(self, meets=(), links=()):
+        """
+        An index of the meets on the results search page by normalized name and by meet id,
+        so a meet is found without scanning the listing each time.
+
+        Parameters
+        ----------
+        meets : list
+            the rows of the results search table (dictionaries with the date, meet, sport and state)
+
+        links : list
+            the href of each meet, in the same order
+        """
+        self.meets = list(meets)
+        self._by_name = {}
+        self._by_id = {}
+        for meet, link in zip(self.meets, links):
+            entry = dict(meet, id=get_meet_id(link), link=link)
+            self._by_name.setdefault(normalize_meet_name(meet['meet']), entry) # the listing is newest first, keep the latest meet with a name
+            if entry['id'] is not None:
+                self._by_id.setdefault(entry['id'], entry)
+        self._names = sorted(self._by_name)
+
+    @classmethod
+    def from_html(cls, meets_html):
+        """
+        Builds the index from the html of results_search.html.
+        """
+        table = meets_html.find("table")
+        meets = get_table_data(table)[1:]
+        links = [row.find('a')['href'].strip() for row in table.find_all("tr")[1:]]
+        return cls(meets, links)
+
+    def lookup(self, meet_name):
+        """
+        Returns
+        -------
+        dict
+            the meet with the name (compared normalized) and its 'id' and 'link', or None if it is not in the index
+        """
+        return self._by_name.get(normalize_meet_name(meet_name))
+
+    def get(self, meet_id):
+        """
+        Returns
+        -------
+        dict
+            the meet with the id, or None if it is not in the index
+        """
+        return self._by_id.get(str(meet_id))
+
+    def search(self, query, limit=10, cutoff=0.6):
+        """
+        Finds meets by the start of their name, or failing that by names that are close to the query.
+
+        Parameters
+        ----------
+        query : str
+            the start of a meet name, or a misspelled one
+
+        limit : int
+            the most meets returned
+
+        cutoff : float
+            how close (0 to 1) a name has to be to the query to be a fuzzy match
+
+        Returns
+        -------
+        list
+            the matching meets, prefix matches in alphabetical order first
+        """
+        prefix = normalize_meet_name(query)
+        names = []
+        for name in self._names[bisect_left(self._names, prefix):]:
+            if not name.startswith(prefix) or len(names) == limit:
+                break
+            names.append(name)
+        if len(names) < limit:
+            names += [name for name in get_close_matches(prefix, self._names, limit, cutoff) if name not in names][:limit - len(names)]
+        return [self._by_name[name] for name in names]
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def __contains__(self, meet_name):
+        return normalize_meet_name(meet_name) in self._by_name
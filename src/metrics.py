@@ -0,0 +1,279 @@
+import threading, time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                     for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} needs the labels {self.labelnames}, not {tuple(labels)}')
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            lines += self.samples()
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self.key(labels), 0)
+
+    def samples(self):
+        return [f'{self.name}{format_labels(self.labelnames, key)} {format_value(value)}' for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * len(self.buckets), 0, 0.0] # bucket counts, count, sum
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[0][i] += 1
+            counts[1] += 1
+            counts[2] += value
+
+    def get(self, **labels):
+        """
+        Returns
+        -------
+        tuple
+            how many values were observed and their sum
+        """
+        counts = self._values.get(self.key(labels))
+        return (counts[1], counts[2]) if counts is not None else (0, 0.0)
+
+    def samples(self):
+        lines = []
+        for key, (buckets, count, total) in self._values.items():
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), buckets + [count]):
+                labels = format_labels(self.labelnames + ('le',), key + (format_value(float(bound)),))
+                lines.append(f'{self.name}_bucket{labels} {bucket_count}')
+            labels = format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_count{labels} {count}')
+            lines.append(f'{self.name}_sum{labels} {format_value(total)}')
+        return lines
+
+
+def covered(intervals):
+    """
+    Returns the seconds covered by at least one of the (start, end) intervals.
+    """
+    seconds, reached = 0.0, float('-inf')
+    for start, end in sorted(intervals):
+        if end > reached:
+            seconds += end - max(start, reached)
+            reached = end
+    return seconds
+
+
+class Call:
+    __slots__ = ('method', 'start', 'intervals', '_lock')
+
+    def __init__(self, method):
+        """
+        A timed public Hermes call. The fetches and parses done for it, on its own thread or on workers joined to it,
+        are kept as intervals so they are measured in wall-clock time: two pages downloading at once count once.
+        """
+        self.method = method
+        self.start = time.perf_counter()
+        self.intervals = {'fetch': [], 'parse': []}
+        self._lock = threading.Lock()
+
+    def add(self, stage, start, end):
+        with self._lock:
+            self.intervals[stage].append((start, end))
+
+    def durations(self, total):
+        """
+        Returns
+        -------
+        dict
+            the wall-clock seconds of the call spent fetching, parsing (while nothing was being fetched) and
+            extracting (the rest), which add up to total
+        """
+        with self._lock:
+            fetches, parses = list(self.intervals['fetch']), list(self.intervals['parse'])
+        fetch = covered(fetches)
+        parse = covered(fetches + parses) - fetch
+        return {'fetch': fetch, 'parse': parse, 'extract': max(total - fetch - parse, 0.0)}
+
+    def server_timing(self):
+        """
+        Returns
+        -------
+        str
+            the fetch, parse, extract and total time of the call as a Server-Timing header value
+        """
+        total = time.perf_counter() - self.start
+        parts = list(self.durations(total).items()) + [('total', total)]
+        return ', '.join(f'{name};dur={seconds * 1000:.1f}' for name, seconds in parts)
+
+
+class Metrics:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Counters and histograms for where Hermes spends its time, rendered in the Prometheus text format.
+        Every public Hermes call is timed as a whole and split into fetch (the network), parse (BeautifulSoup)
+        and extract (reading the tables, everything else).
+
+        Parameters
+        ----------
+        buckets : tuple
+            the upper bounds in seconds of the histogram buckets
+        """
+        self._local = threading.local()
+        self._metrics = []
+        self.calls = self.histogram('hermes_call_seconds', 'Time spent in public Hermes methods', ('method',), buckets)
+        self.fetches = self.histogram('hermes_fetch_seconds', 'Time spent downloading pages from TFRRS', ('page_type',), buckets)
+        self.parses = self.histogram('hermes_parse_seconds', 'Time spent parsing pages with BeautifulSoup', ('page_type',), buckets)
+        self.extracts = self.histogram('hermes_extract_seconds', 'Time spent in public Hermes methods outside of fetching and parsing', ('method',), buckets)
+        self.upstream_requests = self.counter('hermes_upstream_requests_total', 'Pages downloaded from TFRRS by the public method that needed them', ('method', 'page_type'))
+        self.downloaded_bytes = self.counter('hermes_downloaded_bytes_total', 'Bytes downloaded from TFRRS', ('page_type',))
+        self.cache_lookups = self.counter('hermes_cache_lookups_total', 'Page cache lookups by whether the page was cached', ('page_type', 'result'))
+        self.revalidations = self.counter('hermes_revalidations_total', 'Expired pages revalidated with TFRRS, by whether they were not modified, unchanged or changed', ('page_type', 'result'))
+        self.errors = self.counter('hermes_call_errors_total', 'Public Hermes calls that raised, by exception', ('method', 'exception'))
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Returns
+        -------
+        str
+            every metric in the Prometheus text exposition format
+        """
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return '\n'.join(lines) + '\n'
+
+    def current(self):
+        """
+        Returns the Call running on this thread, or None.
+        """
+        return getattr(self._local, 'call', None)
+
+    @contextmanager
+    def call(self, method=None):
+        """
+        Times a call. Only the outermost call on a thread is recorded, calls made inside it are part of it.
+        The first named call inside an unnamed one (ie one opened by the server for a request) names it.
+
+        Yields
+        ------
+        Call
+            the call being timed
+        """
+        call = self.current()
+        if call is not None:
+            if call.method is None:
+                call.method = method
+            yield call
+            return
+        call = self._local.call = Call(method)
+        try:
+            yield call
+        except Exception as e:
+            self.errors.inc(method=call.method or 'other', exception=type(e).__name__)
+            raise
+        finally:
+            self._local.call = None
+            total = time.perf_counter() - call.start
+            method = call.method or 'other'
+            self.calls.observe(total, method=method)
+            self.extracts.observe(call.durations(total)['extract'], method=method)
+
+    @contextmanager
+    def join(self, call):
+        """
+        Counts what is done on this thread (ie a worker of a thread pool) as part of call.
+        """
+        previous = self.current()
+        self._local.call = call
+        try:
+            yield
+        finally:
+            self._local.call = previous
+
+    @contextmanager
+    def timed(self, stage, page_type):
+        """
+        Times the fetch or parse of a page.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            (self.fetches if stage == 'fetch' else self.parses).observe(end - start, page_type=page_type)
+            call = self.current()
+            if call is not None:
+                call.add(stage, start, end)
+
+    def fetched(self, page_type, size):
+        call = self.current()
+        method = call.method if call is not None else None
+        self.upstream_requests.inc(method=method or 'other', page_type=page_type)
+        self.downloaded_bytes.inc(size, page_type=page_type)
@@ -0,0 +1,83 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from src.cache import page_type
+
+try:
+    import lxml # noqa: F401 the C backed parser is optional
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+
+class AnyStrainer(SoupStrainer):
+    def __init__(self, *strainers):
+        """
+        A SoupStrainer that keeps a tag if any of the given strainers would keep it.
+        SoupStrainer on its own can only match tags on one combination of name and attributes,
+        and the athlete and team pages need two different kinds of tags.
+
+        Parameters
+        ----------
+        strainers : SoupStrainer
+            the strainers to combine
+        """
+        super().__init__()
+        self.strainers = strainers
+
+    def allow_tag_creation(self, nsprefix, name, attrs): # beautifulsoup 4.13 and later
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string):
+        return False
+
+    def search_tag(self, markup_name=None, markup_attrs={}): # beautifulsoup before 4.13
+        return any(strainer.search_tag(markup_name, markup_attrs) for strainer in self.strainers)
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({', '.join(str(strainer) for strainer in self.strainers)})"
+
+
+def has_class(name):
+    """
+    Returns a matcher for a class attribute that contains the class name.
+    While parsing, the class attribute has not been split into a list yet so a plain string would have to match all of it.
+    """
+    def match(value):
+        if value is None:
+            return False
+        classes = value.split() if isinstance(value, str) else value
+        return name in classes
+    return match
+
+
+# the only parts of each type of page that Hermes reads, anything outside of them is never built
+STRAINERS = {
+    'team': AnyStrainer(SoupStrainer('select', class_=has_class('form-control')), SoupStrainer('table', class_=has_class('tablesaw'))),
+    'athlete': AnyStrainer(SoupStrainer('table', class_=has_class('bests')), SoupStrainer(id='meet-results')),
+    'meets': SoupStrainer('table'),
+    'meet': AnyStrainer(SoupStrainer('div', class_=has_class('col-lg-12')), SoupStrainer('div', class_=has_class('panel-heading-normal-text'))),
+}
+
+
+def parse(content, parser=DEFAULT_PARSER, url=None):
+    """
+    Parses the html of a page. If the url is given and it is a type of TFRRS page that Hermes knows,
+    only the tables Hermes reads from that type of page are parsed.
+
+    Parameters
+    ----------
+    content : bytes
+        the html of the page
+
+    parser : str
+        the parser BeautifulSoup uses ('lxml' or 'html.parser')
+
+    url : str
+        the url the page was downloaded from
+
+    Returns
+    -------
+    soup obj
+        the soup obj of the page (or the parts of it that are needed)
+    """
+    strainer = STRAINERS.get(page_type(url)) if url is not None else None
+    return BeautifulSoup(content, parser, parse_only=strainer)
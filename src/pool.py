@@ -0,0 +1,104 @@
+import multiprocessing, os
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from src.parsing import DEFAULT_PARSER, parse
+
+WARM_UP_PAGE = b'<html><body><table class="tablesaw"><tr><th>NAME</th></tr><tr><td>warm up</td></tr></table></body></html>'
+WARM_UP_TIMEOUT = 60
+_barrier = None
+
+
+def warm_up(barrier):
+    """
+    Runs in each worker as it starts, so the parser and the Hermes readers are imported before the first real page.
+    """
+    global _barrier
+    _barrier = barrier
+    import src.hermes # noqa: F401 the readers are looked up in it when the first page is unpickled
+    parse(WARM_UP_PAGE)
+
+
+def ready():
+    """
+    Waits until every worker is running a ready task, so each of them gets exactly one.
+    """
+    _barrier.wait(WARM_UP_TIMEOUT)
+    return os.getpid()
+
+
+def extract(content, reader, args, parser, url):
+    """
+    Parses a page and reads it in a worker. Only what reader returns goes back to the calling process, never the soup.
+    """
+    return reader(parse(content, parser, url), *args)
+
+
+class ParsePool:
+    def __init__(self, processes=None):
+        """
+        A pool of worker processes that parse pages and run the Hermes readers on them (read_athlete_results, read_meet_results ...).
+        BeautifulSoup and reading the tables are pure Python, so in one process the pages downloaded together are parsed
+        one after the other under the GIL. Handing the raw html to the workers lets parsing use every core.
+        The workers are started and warmed up when the pool is made so the first pages do not pay for it.
+
+        Parameters
+        ----------
+        processes : int
+            how many worker processes (the number of cores if None)
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(self.processes, initializer=warm_up, initargs=(multiprocessing.Barrier(self.processes),))
+        self.pids = set()
+        self.warm()
+
+    def warm(self):
+        """
+        Starts every worker. The executor only starts a worker when no idle one can take a task,
+        so one task per worker is submitted at once and they all wait for each other before returning.
+        """
+        futures = [self.executor.submit(ready) for _ in range(self.processes)]
+        wait(futures)
+        self.pids.update(future.result() for future in futures)
+
+    def submit(self, content, reader, args=(), parser=DEFAULT_PARSER, url=None):
+        """
+        Parses and reads a page in a worker.
+
+        Parameters
+        ----------
+        content : bytes
+            the html of the page
+
+        reader : callable
+            a module level function (so it can be sent to the worker) called with the soup and args
+
+        args : tuple
+            more arguments for reader
+
+        parser : str
+            the parser BeautifulSoup uses ('lxml' or 'html.parser')
+
+        url : str
+            the url the page was downloaded from, to only parse the parts that are read (see parsing.parse)
+
+        Returns
+        -------
+        Future
+            resolves to what reader returned
+        """
+        return self.executor.submit(extract, content, reader, args, parser, url)
+
+    def extract(self, content, reader, args=(), parser=DEFAULT_PARSER, url=None):
+        """
+        Parses and reads a page in a worker and waits for the result. See submit.
+        """
+        return self.submit(content, reader, args, parser, url).result()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,262 @@
+"""
+Keeps the pages of a watchlist of teams and meets warm, so requests for them rarely wait on TFRRS.
+
+Run it in the server process (set HERMES_WATCHLIST to the watchlist file) or next to the server on the same store:
+
+    python -m src.scheduler watchlist.json --db hermes.db
+
+A watchlist file looks like
+
+    {
+        "teams": [{"state": "PA", "team": "Moravian", "gender": "m"},
+                  {"state": "PA", "team": "Moravian", "gender": "m", "season": "2022_Outdoor", "include": ["bests"]}],
+        "meets": [{"id": "20871", "genders": ["m", "f"]}],
+        "latest_meets": 5
+    }
+
+A team without a season is its current season. latest_meets also watches the newest meets on the results search page.
+"""
+import argparse, heapq, json, sys, threading, time
+
+CURRENT, MEETS, PAST = 0, 1, 2 # job priorities, when several jobs are due the lowest runs first
+
+
+class Watchlist:
+    def __init__(self, teams=(), meets=(), latest_meets=0):
+        """
+        The teams and meets to keep warm.
+
+        Parameters
+        ----------
+        teams : list
+            dictionaries with the state, team, gender and optionally the season (the current one if missing)
+            and what to include for each athlete ('bests' and/or 'results', both if missing)
+
+        meets : list
+            dictionaries with the id of a meet and optionally its genders (both if missing)
+
+        latest_meets : int
+            how many of the newest meets on the results search page to also keep warm
+        """
+        self.teams = [dict(team) for team in teams]
+        self.meets = [dict(meet) for meet in meets]
+        self.latest_meets = latest_meets
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            watchlist = json.load(f)
+        return cls(watchlist.get('teams', ()), watchlist.get('meets', ()), watchlist.get('latest_meets', 0))
+
+
+class Job:
+    __slots__ = ('name', 'run', 'priority', 'due', 'runs', 'failures', 'error')
+
+    def __init__(self, name, run, priority):
+        self.name = name
+        self.run = run
+        self.priority = priority
+        self.due = 0.0
+        self.runs = 0
+        self.failures = 0
+        self.error = None
+
+
+class Refresher:
+    def __init__(self, hermes, watchlist, current_interval=10 * 60, past_interval=24 * 60 * 60, meet_interval=5 * 60,
+                 workers=2, clock=time.monotonic):
+        """
+        Warms and refreshes the pages of a watchlist on a schedule by calling the same Hermes methods the API does,
+        so their caches (page cache, result cache and store) are filled before anyone asks.
+        Jobs run one after the other on a single thread and their downloads go through the transport of the Hermes,
+        so together with the requests being served they stay within its rate limit. When several jobs are due,
+        current seasons go first, then meets, then past seasons.
+
+        Pair it with a ResultCache with a stale_ttl longer than the intervals: a page that expires between two runs
+        is then served stale and revalidated in the background instead of making the request wait.
+
+        Parameters
+        ----------
+        hermes : Hermes
+            the Hermes whose caches are kept warm
+
+        watchlist : Watchlist
+            the teams and meets to keep warm
+
+        current_interval : float
+            seconds between refreshes of current seasons
+
+        past_interval : float
+            seconds between refreshes of past seasons, which do not change
+
+        meet_interval : float
+            seconds between refreshes of meets
+
+        workers : int
+            how many athlete pages of a team are downloaded at once
+
+        clock : callable
+            returns the current time in seconds, can be swapped out for testing
+        """
+        self.hermes = hermes
+        self.intervals = {CURRENT: current_interval, MEETS: meet_interval, PAST: past_interval}
+        self.workers = workers
+        self.clock = clock
+        self.jobs = []
+        self._queue = [] # (due, priority, order, job)
+        self._stop = threading.Event()
+        self._thread = None
+        for team in watchlist.teams:
+            self.add(self.team_job(**team))
+        for meet in watchlist.meets:
+            self.add(self.meet_job(**meet))
+        if watchlist.latest_meets:
+            self.add(Job(f'latest {watchlist.latest_meets} meets', lambda job: self.warm_latest_meets(watchlist.latest_meets), MEETS))
+
+    def add(self, job):
+        self.jobs.append(job)
+        heapq.heappush(self._queue, (job.due, job.priority, len(self.jobs), job))
+
+    def team_job(self, state, team, gender, season=None, include=('bests', 'results')):
+        name = f"{state} {team} {gender} {season or 'current'}"
+        return Job(name, lambda job: self.warm_team(job, state, team, gender, season, tuple(include)), CURRENT)
+
+    def meet_job(self, id, genders=('m', 'f')):
+        return Job(f'meet {id}', lambda job: self.warm_meet(id, genders), MEETS)
+
+    def warm_team(self, job, state, team_name, gender, season, include):
+        """
+        Reads a team season the way the API does: its roster, top performances and every athlete.
+        A team watched with its season named moves to the past season priority once that season is over.
+        """
+        if season is None:
+            season = self.hermes.get_season_index(state, team_name, gender)[0]
+        elif self.hermes.is_past_season(state, team_name, gender, season):
+            job.priority = PAST
+        self.hermes.get_roster(state, team_name, gender, season)
+        self.hermes.get_top_performances(state, team_name, gender, season)
+        if include:
+            self.hermes.get_team_athletes(state, team_name, gender, season, include, self.workers)
+
+    def warm_meet(self, meet_id, genders):
+        for gender in genders:
+            self.hermes.get_meet_results_by_id(meet_id, gender)
+
+    def warm_latest_meets(self, count):
+        for meet in self.hermes.get_meet_index().meets[:count]:
+            for gender in ('m', 'f'):
+                self.hermes.get_meet_results(meet['meet'], gender)
+
+    def run_pending(self):
+        """
+        Runs every job that is due, current seasons first, and schedules each one again.
+        A job that fails is tried again at its next run.
+
+        Returns
+        -------
+        int
+            how many jobs ran
+        """
+        now = self.clock()
+        due = []
+        while self._queue and self._queue[0][0] <= now and not self._stop.is_set():
+            due.append(heapq.heappop(self._queue))
+        due.sort(key=lambda entry: (entry[3].priority, entry[0]))
+        ran = 0
+        for i, (_, _, order, job) in enumerate(due):
+            if self._stop.is_set(): # put back what did not get to run
+                for entry in due[i:]:
+                    heapq.heappush(self._queue, entry)
+                break
+            try:
+                job.run(job)
+                job.error = None
+            except Exception as e:
+                job.failures += 1
+                job.error = f'{type(e).__name__}: {e}'
+            job.runs += 1
+            ran += 1
+            job.due = self.clock() + self.intervals[job.priority]
+            heapq.heappush(self._queue, (job.due, job.priority, order, job))
+        return ran
+
+    def next_due(self):
+        """
+        Returns the number of seconds until the next job is due (0 if one is due now, None without jobs).
+        """
+        if not self._queue:
+            return None
+        return max(self._queue[0][0] - self.clock(), 0.0)
+
+    def run(self, poll=60):
+        """
+        Runs jobs as they come due until stop is called. Everything is warmed first thing.
+
+        Parameters
+        ----------
+        poll : float
+            the most seconds to sleep between checks for due jobs
+        """
+        while not self._stop.is_set():
+            self.run_pending()
+            wait = self.next_due()
+            self._stop.wait(poll if wait is None else min(wait, poll))
+
+    def start(self):
+        """
+        Runs the jobs on a daemon thread. See run.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='hermes-refresher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Stops after the job running now is done.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self):
+        """
+        Returns
+        -------
+        list
+            every job with its priority, how many times it ran and failed, its last error and the seconds until it runs again
+        """
+        now = self.clock()
+        return [{'name': job.name, 'priority': ('current', 'meets', 'past')[job.priority], 'runs': job.runs,
+                 'failures': job.failures, 'error': job.error, 'due_in': max(job.due - now, 0.0)} for job in self.jobs]
+
+
+def main(argv=None):
+    from src.cache import PageCache, ResultCache
+    from src.hermes import Hermes
+    from src.store import Store
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('watchlist', help='the watchlist json file')
+    parser.add_argument('--db', default='hermes.db', help='the store the server reads from')
+    parser.add_argument('--once', action='store_true', help='warm everything once and exit')
+    args = parser.parse_args(argv)
+
+    hermes = Hermes(cache=PageCache(), store=Store(args.db), results=ResultCache())
+    refresher = Refresher(hermes, Watchlist.from_file(args.watchlist))
+    if args.once:
+        refresher.run_pending()
+    else:
+        try:
+            refresher.run()
+        except KeyboardInterrupt:
+            pass
+    hermes.close()
+    for job in refresher.stats():
+        print(f"{job['name']}: {job['runs']} runs, {job['failures']} failures{', ' + job['error'] if job['error'] else ''}")
+    return 1 if any(job['error'] for job in refresher.stats()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
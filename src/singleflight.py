@@ -0,0 +1,74 @@
+from threading import Event, Lock
+
+
+class Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Coalesces concurrent calls for the same key: the first caller runs the function and everyone
+        who asks for the key while it is running waits for it and gets the same result (or exception).
+        Nothing is remembered once the call is done, that is left to the cache.
+        """
+        self._lock = Lock()
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, function):
+        """
+        Runs function for key unless a call for key is already running, in which case its result is waited for.
+
+        Parameters
+        ----------
+        key : hashable
+            what identifies the call, ie the url of a page
+
+        function : callable
+            called with no arguments to produce the result
+
+        Returns
+        -------
+        object
+            the result of the one call that ran
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """
+        Returns
+        -------
+        dict
+            how many calls ran, how many callers were coalesced onto a running call and how many are running now
+        """
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
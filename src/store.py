@@ -0,0 +1,389 @@
+import json, sqlite3, time
+from threading import RLock
+
+from src.athletes import get_athlete_id, team_key
+from src.marks import parse_mark, parse_place
+from src.tables import remove_whitespace
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS teams (
+    id INTEGER PRIMARY KEY,
+    state TEXT NOT NULL,
+    name TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    current_season TEXT,
+    UNIQUE (state, name, gender)
+);
+CREATE TABLE IF NOT EXISTS seasons (
+    id INTEGER PRIMARY KEY,
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    season TEXT NOT NULL,
+    config_hnd TEXT,
+    position INTEGER,
+    UNIQUE (team_id, season)
+);
+CREATE TABLE IF NOT EXISTS athletes (
+    id INTEGER PRIMARY KEY,
+    team_id INTEGER NOT NULL REFERENCES teams (id),
+    name TEXT NOT NULL,
+    tfrrs_id TEXT,
+    url TEXT,
+    UNIQUE (team_id, name)
+);
+CREATE INDEX IF NOT EXISTS athletes_tfrrs_id ON athletes (tfrrs_id);
+CREATE TABLE IF NOT EXISTS roster (
+    season_id INTEGER NOT NULL REFERENCES seasons (id),
+    position INTEGER NOT NULL,
+    athlete_id INTEGER REFERENCES athletes (id),
+    data TEXT NOT NULL,
+    PRIMARY KEY (season_id, position)
+);
+CREATE TABLE IF NOT EXISTS meets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    date TEXT NOT NULL DEFAULT '',
+    tfrrs_id TEXT NOT NULL DEFAULT '',
+    UNIQUE (name, date, tfrrs_id)
+);
+CREATE INDEX IF NOT EXISTS meets_tfrrs_id ON meets (tfrrs_id);
+CREATE TABLE IF NOT EXISTS athlete_meets (
+    id INTEGER PRIMARY KEY,
+    athlete_id INTEGER NOT NULL REFERENCES athletes (id),
+    meet_id INTEGER NOT NULL REFERENCES meets (id),
+    position INTEGER NOT NULL,
+    UNIQUE (athlete_id, position)
+);
+CREATE TABLE IF NOT EXISTS meet_events (
+    id INTEGER PRIMARY KEY,
+    meet_id INTEGER NOT NULL REFERENCES meets (id),
+    gender TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    headers TEXT NOT NULL,
+    UNIQUE (meet_id, gender, position)
+);
+CREATE TABLE IF NOT EXISTS performances (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    season_id INTEGER REFERENCES seasons (id),
+    athlete_meet_id INTEGER REFERENCES athlete_meets (id),
+    meet_event_id INTEGER REFERENCES meet_events (id),
+    position INTEGER NOT NULL,
+    event TEXT,
+    mark REAL,
+    unit TEXT,
+    place INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS performances_season ON performances (season_id, position);
+CREATE INDEX IF NOT EXISTS performances_athlete_meet ON performances (athlete_meet_id, position);
+CREATE INDEX IF NOT EXISTS performances_meet_event ON performances (meet_event_id, position);
+CREATE INDEX IF NOT EXISTS performances_event_mark ON performances (event, mark);
+CREATE TABLE IF NOT EXISTS refreshes (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+'''
+
+
+class Store:
+    def __init__(self, path=':memory:', current_ttl=60 * 60, athlete_ttl=24 * 60 * 60, meet_ttl=24 * 60 * 60,
+                 seasons_ttl=24 * 60 * 60, clock=time.time):
+        """
+        A local SQLite copy of what Hermes has scraped: teams, seasons, rosters, athletes, meets and performances.
+        A Hermes with a store answers from it first and only scrapes what is missing or stale.
+        Rosters and top performances of past seasons never go stale since they will not change again.
+
+        Parameters
+        ----------
+        path : str
+            the sqlite database file (':memory:' for one that only lasts as long as the Store)
+
+        current_ttl : float
+            seconds before the roster or top performances of a team's current season are scraped again
+
+        athlete_ttl : float
+            seconds before an athlete's results are scraped again
+
+        meet_ttl : float
+            seconds before a meet's results are scraped again
+
+        seasons_ttl : float
+            seconds before the list of a team's seasons is scraped again
+
+        clock : callable
+            returns the current time in seconds
+        """
+        self.path = path
+        self.current_ttl = current_ttl
+        self.athlete_ttl = athlete_ttl
+        self.meet_ttl = meet_ttl
+        self.seasons_ttl = seasons_ttl
+        self.clock = clock
+        self._lock = RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    # seasons
+
+    def save_seasons(self, state, team_name, gender, current, keys):
+        with self._lock, self.db:
+            team_id = self._team_id(state, team_name, gender)
+            self.db.execute('UPDATE teams SET current_season = ? WHERE id = ?', (current, team_id))
+            for position, (season, config_hnd) in enumerate(keys.items()):
+                self.db.execute('INSERT INTO seasons (team_id, season, config_hnd, position) VALUES (?, ?, ?, ?) '
+                                'ON CONFLICT (team_id, season) DO UPDATE SET config_hnd = excluded.config_hnd, position = excluded.position',
+                                (team_id, season, config_hnd, position))
+            self._refreshed('seasons', team_key(state, team_name, gender))
+
+    def load_seasons(self, state, team_name, gender):
+        """
+        Returns
+        -------
+        tuple
+            the current season and a dict of every season and its config_hnd value, or None if they are missing or stale
+        """
+        key = team_key(state, team_name, gender)
+        with self._lock, self.db: # the ids are looked up with inserts that are ignored, so commit them away
+            if not self._fresh('seasons', key, self.seasons_ttl):
+                return None
+            team_id = self._team_id(state, team_name, gender)
+            current = self.db.execute('SELECT current_season FROM teams WHERE id = ?', (team_id,)).fetchone()[0]
+            rows = self.db.execute('SELECT season, config_hnd FROM seasons WHERE team_id = ? AND position IS NOT NULL ORDER BY position', (team_id,))
+            return current, dict(rows.fetchall())
+
+    def current_season(self, state, team_name, gender):
+        """
+        Returns
+        -------
+        str
+            the last known current season of a team, or None if its seasons were never saved
+        """
+        with self._lock:
+            row = self.db.execute('SELECT current_season FROM teams WHERE state = ? AND name = ? AND gender = ?',
+                                  (state.upper(), team_name, gender.lower())).fetchone()
+            return row[0] if row else None
+
+    # team seasons
+
+    def save_roster(self, state, team_name, gender, season, roster, athlete_urls=None):
+        """
+        Saves the roster of a team season and the athletes on it.
+
+        Parameters
+        ----------
+        roster : list
+            the output of Hermes.get_roster
+
+        athlete_urls : dict
+            athlete names (Last_First) to the url of their athlete page. Each row is matched to its athlete by
+            the name in the row, a row without a url is saved without an athlete.
+        """
+        with self._lock, self.db:
+            team_id = self._team_id(state, team_name, gender)
+            season_id = self._season_id(team_id, season)
+            athlete_ids = {name: self._athlete_id(team_id, name, url) for name, url in (athlete_urls or {}).items()}
+            self.db.execute('DELETE FROM roster WHERE season_id = ?', (season_id,))
+            self.db.executemany('INSERT INTO roster (season_id, position, athlete_id, data) VALUES (?, ?, ?, ?)',
+                                [(season_id, position, athlete_ids.get(roster_name(row)), json.dumps(row))
+                                 for position, row in enumerate(roster)])
+            self._refreshed('roster', f'{team_key(state, team_name, gender)}:{season}')
+
+    def load_roster(self, state, team_name, gender, season, historical=False):
+        """
+        Returns
+        -------
+        list
+            the saved roster, or None if it is missing or stale
+        """
+        with self._lock, self.db:
+            if not self._fresh('roster', f'{team_key(state, team_name, gender)}:{season}', None if historical else self.current_ttl):
+                return None
+            season_id = self._season_id(self._team_id(state, team_name, gender), season)
+            rows = self.db.execute('SELECT data FROM roster WHERE season_id = ? ORDER BY position', (season_id,))
+            return [json.loads(data) for data, in rows]
+
+    def save_top_performances(self, state, team_name, gender, season, performances):
+        with self._lock, self.db:
+            season_id = self._season_id(self._team_id(state, team_name, gender), season)
+            self.db.execute("DELETE FROM performances WHERE kind = 'top' AND season_id = ?", (season_id,))
+            self.db.executemany('INSERT INTO performances (kind, season_id, position, event, mark, unit, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                [('top', season_id, position, row.get('event'), *self._mark(row.get('time/mark', ''), row.get('event')), json.dumps(row))
+                                 for position, row in enumerate(performances)])
+            self._refreshed('top', f'{team_key(state, team_name, gender)}:{season}')
+
+    def load_top_performances(self, state, team_name, gender, season, historical=False):
+        with self._lock, self.db:
+            if not self._fresh('top', f'{team_key(state, team_name, gender)}:{season}', None if historical else self.current_ttl):
+                return None
+            season_id = self._season_id(self._team_id(state, team_name, gender), season)
+            rows = self.db.execute("SELECT data FROM performances WHERE kind = 'top' AND season_id = ? ORDER BY position", (season_id,))
+            return [json.loads(data) for data, in rows]
+
+    # athletes
+
+    def save_athlete_results(self, state, team_name, gender, name, meet_results, url=None):
+        """
+        Saves the history of performances of an athlete (the output of Hermes.get_athlete_results)
+        and, if it is given, the url of their athlete page.
+        """
+        with self._lock, self.db:
+            athlete_id = self._athlete_id(self._team_id(state, team_name, gender), name, url)
+            self.db.execute('DELETE FROM performances WHERE athlete_meet_id IN (SELECT id FROM athlete_meets WHERE athlete_id = ?)', (athlete_id,))
+            self.db.execute('DELETE FROM athlete_meets WHERE athlete_id = ?', (athlete_id,))
+            for position, meet in enumerate(meet_results):
+                meet_id = self._meet_id(meet['meet_name'], meet['date'])
+                athlete_meet_id = self.db.execute('INSERT INTO athlete_meets (athlete_id, meet_id, position) VALUES (?, ?, ?)',
+                                                  (athlete_id, meet_id, position)).lastrowid
+                self.db.executemany('INSERT INTO performances (kind, athlete_meet_id, position, event, mark, unit, place, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    [('result', athlete_meet_id, i, row.get('event'), *self._mark(row.get('result', ''), row.get('event')),
+                                      parse_place(row.get('place', ''))[0], json.dumps(row))
+                                     for i, row in enumerate(meet['performances'])])
+            self._refreshed('results', f'{team_key(state, team_name, gender)}:{name}')
+
+    def load_athlete_results(self, state, team_name, gender, name):
+        with self._lock, self.db:
+            if not self._fresh('results', f'{team_key(state, team_name, gender)}:{name}', self.athlete_ttl):
+                return None
+            athlete_id = self._athlete_id(self._team_id(state, team_name, gender), name)
+            meets = self.db.execute('SELECT athlete_meets.id, meets.name, meets.date FROM athlete_meets JOIN meets ON meets.id = athlete_meets.meet_id '
+                                    'WHERE athlete_id = ? ORDER BY position', (athlete_id,)).fetchall()
+            meet_results = []
+            for athlete_meet_id, meet_name, date in meets:
+                rows = self.db.execute('SELECT data FROM performances WHERE athlete_meet_id = ? ORDER BY position', (athlete_meet_id,))
+                meet_results.append({'meet_name': meet_name, 'date': date, 'performances': [json.loads(data) for data, in rows]})
+            return meet_results
+
+    # meets
+
+    def save_meet_results(self, tfrrs_id, gender, events, meet_name='', meet_date=''):
+        """
+        Saves the results of a meet for a gender (the output of Hermes.get_meet_results with compact on,
+        so the headers of events without any results are kept too).
+
+        Parameters
+        ----------
+        tfrrs_id : str
+            the TFRRS id of the meet
+
+        gender : str
+            whether they are the men or women's results
+
+        events : list
+            the results of every event
+
+        meet_name : str
+            the name of the meet if it is known
+
+        meet_date : str
+            the date in the header of the meet results page if it is known
+        """
+        with self._lock, self.db:
+            meet_id = self._listed_meet_id(tfrrs_id, meet_name, meet_date)
+            self.db.execute('DELETE FROM performances WHERE meet_event_id IN (SELECT id FROM meet_events WHERE meet_id = ? AND gender = ?)', (meet_id, gender))
+            self.db.execute('DELETE FROM meet_events WHERE meet_id = ? AND gender = ?', (meet_id, gender))
+            for position, event in enumerate(events):
+                meet_event_id = self.db.execute('INSERT INTO meet_events (meet_id, gender, position, name, headers) VALUES (?, ?, ?, ?, ?)',
+                                                (meet_id, gender, position, event['name'], json.dumps(event['headers']))).lastrowid
+                performances = []
+                for i, row in enumerate(event['results']):
+                    result = dict(zip(event['headers'], row))
+                    performances.append(('meet', meet_event_id, i, event['name'], *self._mark(result.get('time', result.get('mark', '')), event['name']),
+                                         parse_place(result.get('pl', ''))[0], json.dumps(row)))
+                self.db.executemany('INSERT INTO performances (kind, meet_event_id, position, event, mark, unit, place, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    performances)
+            self._refreshed('meet', f'{tfrrs_id}:{gender}')
+
+    def load_meet_results(self, tfrrs_id, gender):
+        """
+        Returns
+        -------
+        list
+            the saved results in the compact form they were saved in, or None if they are missing or stale
+        """
+        with self._lock, self.db:
+            if not self._fresh('meet', f'{tfrrs_id}:{gender}', self.meet_ttl):
+                return None
+            meet_id = self._listed_meet_id(tfrrs_id)
+            events = self.db.execute('SELECT id, name, headers FROM meet_events WHERE meet_id = ? AND gender = ? ORDER BY position', (meet_id, gender)).fetchall()
+            results = []
+            for meet_event_id, name, headers in events:
+                rows = self.db.execute('SELECT data FROM performances WHERE meet_event_id = ? ORDER BY position', (meet_event_id,))
+                results.append({'name': name, 'headers': json.loads(headers), 'results': [tuple(json.loads(data)) for data, in rows]})
+            return results
+
+    def load_meet_date(self, tfrrs_id):
+        """
+        Returns
+        -------
+        str
+            the date saved with the results of a meet, or '' if there is none
+        """
+        with self._lock:
+            row = self.db.execute('SELECT date FROM meets WHERE tfrrs_id = ?', (str(tfrrs_id),)).fetchone()
+            return row[0] if row is not None else ''
+
+    def invalidate(self, kind=None):
+        """
+        Marks everything (or everything of one kind: 'seasons', 'roster', 'top', 'results' or 'meet') as stale
+        so it is scraped again the next time it is asked for.
+        """
+        with self._lock, self.db:
+            if kind is None:
+                self.db.execute('DELETE FROM refreshes')
+            else:
+                self.db.execute('DELETE FROM refreshes WHERE kind = ?', (kind,))
+
+    def _fresh(self, kind, key, ttl):
+        row = self.db.execute('SELECT fetched_at FROM refreshes WHERE kind = ? AND key = ?', (kind, key)).fetchone()
+        if row is None:
+            return False
+        return ttl is None or self.clock() - row[0] < ttl
+
+    def _refreshed(self, kind, key):
+        self.db.execute('INSERT OR REPLACE INTO refreshes (kind, key, fetched_at) VALUES (?, ?, ?)', (kind, key, self.clock()))
+
+    def _team_id(self, state, team_name, gender):
+        team = (state.upper(), team_name, gender.lower())
+        self.db.execute('INSERT OR IGNORE INTO teams (state, name, gender) VALUES (?, ?, ?)', team)
+        return self.db.execute('SELECT id FROM teams WHERE state = ? AND name = ? AND gender = ?', team).fetchone()[0]
+
+    def _season_id(self, team_id, season):
+        self.db.execute('INSERT OR IGNORE INTO seasons (team_id, season) VALUES (?, ?)', (team_id, season))
+        return self.db.execute('SELECT id FROM seasons WHERE team_id = ? AND season = ?', (team_id, season)).fetchone()[0]
+
+    def _athlete_id(self, team_id, name, url=None):
+        self.db.execute('INSERT OR IGNORE INTO athletes (team_id, name) VALUES (?, ?)', (team_id, name))
+        if url is not None:
+            self.db.execute('UPDATE athletes SET tfrrs_id = ?, url = ? WHERE team_id = ? AND name = ?', (get_athlete_id(url), url, team_id, name))
+        return self.db.execute('SELECT id FROM athletes WHERE team_id = ? AND name = ?', (team_id, name)).fetchone()[0]
+
+    def _meet_id(self, name, date=''):
+        self.db.execute('INSERT OR IGNORE INTO meets (name, date) VALUES (?, ?)', (name, date))
+        return self.db.execute("SELECT id FROM meets WHERE name = ? AND date = ? AND tfrrs_id = ''", (name, date)).fetchone()[0]
+
+    def _listed_meet_id(self, tfrrs_id, name='', date=''):
+        row = self.db.execute('SELECT id, name, date FROM meets WHERE tfrrs_id = ?', (str(tfrrs_id),)).fetchone()
+        if row is None:
+            return self.db.execute('INSERT INTO meets (name, date, tfrrs_id) VALUES (?, ?, ?)', (name, date, str(tfrrs_id))).lastrowid
+        if name and row[1] != name:
+            self.db.execute('UPDATE meets SET name = ? WHERE id = ?', (name, row[0]))
+        if date and row[2] != date:
+            self.db.execute('UPDATE meets SET date = ? WHERE id = ?', (date, row[0]))
+        return row[0]
+
+    def _mark(self, text, event):
+        mark = parse_mark(text, event)
+        return mark.value, mark.unit
+
+
+def roster_name(row):
+    """
+    Returns the name of a roster row the way athlete urls are keyed (Last_First).
+    """
+    return remove_whitespace(row.get('name', '')).replace(',', '_')
@@ -0,0 +1,149 @@
+import re
+from bs4 import CData, NavigableString
+
+WHITESPACE = re.compile(r'\s+')
+CELL_SPACING = '           ' # the indentation TFRRS leaves inside cells that wrap onto several lines
+TEXT_TYPES = (NavigableString, CData)
+
+
+def remove_whitespace(string):
+    """
+    removes whitespace characters like \n and \t
+
+    Paramters
+    ---------
+    string : str
+        string we want to remove white space from
+
+    Returns
+    -------
+    str
+        string stripped of whitespace
+    """
+    return WHITESPACE.sub('', string)
+
+
+def clean_cell(text):
+    """
+    Tidies up the text of a table cell. Most cells are on one line, so the newline replacements are skipped for them.
+
+    Parameters
+    ----------
+    text : str
+        the text of a td
+
+    Returns
+    -------
+    str
+        the cell text without newlines, runs of indentation, quotes or surrounding whitespace
+    """
+    if '\n' in text:
+        text = text.replace('\xa0\n', '').replace('\n',' ')
+    if CELL_SPACING in text:
+        text = text.replace(CELL_SPACING, ' ')
+    return text.strip('\\"').strip()
+
+
+def cell_text(cell):
+    """
+    The same text as cell.text, collected with a plain walk over the cell instead of the generic beautifulsoup search.
+    """
+    parts = []
+    stack = [iter(cell.contents)]
+    while stack:
+        for child in stack[-1]:
+            if child.name is not None:
+                stack.append(iter(child.contents))
+                break
+            if child.__class__ in TEXT_TYPES: # comments and other special strings are not part of .text
+                parts.append(child)
+        else:
+            stack.pop()
+    return ''.join(parts)
+
+
+def read_rows(table):
+    """
+    Walks a table once and returns the td elements of each tr, in order. Tables nested in a cell are not walked.
+    """
+    rows = []
+    stack = [(iter(table.contents), None)]
+    while stack:
+        children, row = stack[-1]
+        for child in children:
+            name = child.name
+            if name is None:
+                continue
+            if name == 'tr':
+                rows.append([])
+                stack.append((iter(child.contents), rows[-1]))
+                break
+            if name == 'td' and row is not None:
+                row.append(child)
+            elif name != 'table':
+                stack.append((iter(child.contents), row))
+                break
+        else:
+            stack.pop()
+    return rows
+
+
+def read_table(table, keys=None, same_size=False):
+    """
+    Reads a table in one pass over its rows and cells.
+
+    Parameters
+    ----------
+    table : soup obj
+        the table
+
+    keys : list
+        the names of the columns, read from the table's th headers if not given
+
+    same_size : bool
+        only keep rows with a cell for every key. This is helpful for avoiding information on tables you dont want.
+
+    Returns
+    -------
+    tuple
+        the list of keys and a list of row tuples (one per tr, so the header row is an empty tuple)
+    """
+    if keys is None:
+        keys = [remove_whitespace(header.text).lower() for header in table.find('thead').find_all('th')]
+    width = len(keys)
+    data = []
+    for cells in read_rows(table):
+        if same_size and len(cells) != width: # don't bother reading rows that are thrown away
+            continue
+        data.append(tuple(clean_cell(cell_text(cell)) for cell in cells[:width]))
+    return keys, data
+
+
+def get_table_data(table, keys=None, same_size=False, compact=False): # general function idea
+    """
+    Reads the rows of a table.
+
+    Parameters
+    ----------
+    table : soup obj
+        the table
+
+    keys : list
+        the names of the columns, read from the table's th headers if not given
+
+    same_size : bool
+        only keep rows with a cell for every key
+
+    compact : bool
+        return the keys once with a tuple for each row instead of a dictionary for each row
+
+    Returns
+    -------
+    list or dict
+        list of dictionaries of the keys to the text of each cell in a row
+        or, if compact, a dictionary with the 'headers' and the 'rows' as tuples
+    """
+    keys, rows = read_table(table, keys, same_size)
+    if compact:
+        return {'headers': keys, 'rows': rows}
+    return [dict(zip(keys, row)) for row in rows]
@@ -0,0 +1,172 @@
+import time
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class UpstreamException(Exception):
+    def __init__(self, url, reason):
+        self.message = f"TFRRS could not be reached for: {url} ({reason})"
+        super().__init__(self.message)
+
+
+class RateLimiter:
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        A token bucket shared by every thread using a Transport so TFRRS never sees more than
+        rate requests a second on average (with short bursts of up to burst requests).
+
+        Parameters
+        ----------
+        rate : float
+            tokens added to the bucket each second
+
+        burst : int
+            the most tokens the bucket can hold (defaults to rate, at least 1)
+
+        clock : callable
+            returns the current time in seconds
+
+        sleep : callable
+            waits for a number of seconds
+        """
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated = clock()
+        self._lock = Lock()
+
+    def acquire(self):
+        """
+        Takes a token from the bucket, waiting until one is available.
+
+        Returns
+        -------
+        float
+            how long in seconds the caller had to wait
+        """
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def reserve(self):
+        """
+        Takes a token from the bucket without waiting for it. The caller must wait the returned number of
+        seconds before sending its request, which lets async code wait without blocking the event loop.
+
+        Returns
+        -------
+        float
+            how long in seconds the caller has to wait
+        """
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1 # can go negative, later callers then wait behind this one
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class Transport:
+    def __init__(self, pool_size=10, connect_timeout=5, read_timeout=30, retries=3, backoff=0.5,
+                 rate=5, burst=10, session=None, sleep=time.sleep):
+        """
+        Downloads pages from TFRRS over one pooled keep-alive session.
+        Every attempt has a timeout, waits its turn with the rate limiter, and
+        server errors or dropped connections are retried with exponential backoff.
+
+        Parameters
+        ----------
+        pool_size : int
+            the most connections kept open to TFRRS
+
+        connect_timeout : float
+            seconds to wait for a connection
+
+        read_timeout : float
+            seconds to wait for the response once connected
+
+        retries : int
+            how many times a failed request is retried
+
+        backoff : float
+            seconds to wait before the first retry, doubled for each retry after
+
+        rate : float
+            the most requests a second sent to TFRRS (None for no limit)
+
+        burst : int
+            how many requests can be sent at once before rate applies
+
+        session : requests.Session
+            the session to send requests with, one is made if not given
+
+        sleep : callable
+            waits for a number of seconds
+        """
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+        self.limiter = RateLimiter(rate, burst, sleep=sleep) if rate else None
+
+    def get(self, url):
+        """
+        Downloads a page. Client errors (like a 404) are returned as is because TFRRS serves its error pages with them.
+
+        Parameters
+        ----------
+        url : str
+            the url to a webpage
+
+        Returns
+        -------
+        bytes
+            the body of the response
+        """
+        return self.request(url).content
+
+    def request(self, url, headers=None):
+        """
+        Sends a GET request with the timeouts, rate limit and retries of the transport.
+
+        Parameters
+        ----------
+        url : str
+            the url to a webpage
+
+        headers : dict
+            extra request headers
+
+        Returns
+        -------
+        requests.Response
+            the response
+        """
+        for attempt in range(self.retries + 1):
+            if self.limiter is not None:
+                self.limiter.acquire()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                reason = type(e).__name__
+            else:
+                if response.status_code < 500:
+                    return response
+                reason = f'status {response.status_code}'
+            if attempt < self.retries:
+                self.sleep(self.backoff * 2 ** attempt)
+        raise UpstreamException(url, reason)
+
+    def close(self):
+        self.session.close()
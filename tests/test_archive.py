@@ -0,0 +1,60 @@
+import pytest
+from src.archive import Archive, ArchiveTransport, NotArchivedException
+from src.hermes import Hermes
+from tests.test_hermes import Counting_Hermes, urls
+
+TEAM = ('PA', 'Moravian', 'm', '2022_Outdoor')
+
+@pytest.fixture
+def archive(tmp_path):
+    with Archive(str(tmp_path / 'archive')) as archive:
+        for url, name in urls.items():
+            with open(f'tests/html_files/{name}', 'rb') as f:
+                archive.put(url, f.read())
+        yield archive
+
+def test_archive_dedupes_and_compresses(archive):
+    stats = archive.stats()
+    assert stats['urls'] == len(urls)
+    assert stats['bodies'] == len(set(urls.values()))
+    assert stats['compressed_size'] < stats['size'] / 3
+    with open('tests/html_files/thrower.html', 'rb') as f:
+        assert archive.get('https://www.tfrrs.org//athletes/6537261/Moravian/Shane_Mastro.html') == f.read()
+
+def test_archive_versions(archive):
+    url = 'https://www.tfrrs.org/results_search.html'
+    first = archive.get(url)
+    archive.clock = lambda: float('inf')
+    archive.put(url, first) # unchanged, no new version
+    assert len(archive.versions(url)) == 1
+    archive.put(url, b'<html>changed</html>')
+    assert archive.get(url) == b'<html>changed</html>'
+    assert archive.get(url, at=archive.versions(url)[0][0]) == first
+    assert [digest for _, digest in archive.versions(url)][-1] == archive.put(url, b'<html>changed</html>')
+
+def test_archive_survives_reopening(tmp_path):
+    with Archive(str(tmp_path)) as archive:
+        archive.put('https://www.tfrrs.org/a.html', b'a')
+    with Archive(str(tmp_path)) as archive:
+        archive.put('https://www.tfrrs.org/b.html', b'b')
+        assert archive.get('https://www.tfrrs.org/a.html') == b'a'
+        assert archive.get('https://www.tfrrs.org/b.html') == b'b'
+        assert 'https://www.tfrrs.org/a.html' in archive
+        with pytest.raises(NotArchivedException):
+            archive.get('https://www.tfrrs.org/c.html')
+
+def test_replay_matches_downloads(archive):
+    hermes = Hermes(replay=archive)
+    plain = Counting_Hermes()
+    assert hermes.get_roster(*TEAM) == plain.get_roster(*TEAM)
+    assert hermes.get_athlete_results('Houghton_Shane', *TEAM) == plain.get_athlete_results('Houghton_Shane', *TEAM)
+    assert hermes.get_meet_results('Landmark Conference Championships', 'm') == plain.get_meet_results('Landmark Conference Championships', 'm')
+    with pytest.raises(NotArchivedException):
+        hermes.get_athlete_bests_by_id('2')
+
+def test_downloads_are_archived(tmp_path):
+    with Archive(str(tmp_path)) as archive:
+        hermes = Counting_Hermes(archive=archive)
+        roster = hermes.get_roster(*TEAM)
+        assert sorted(archive.urls()) == sorted(set(hermes.downloads))
+        assert Hermes(transport=ArchiveTransport(archive)).get_roster(*TEAM) == roster
@@ -0,0 +1,75 @@
+import asyncio, json
+from asgi_server import API
+from src.async_hermes import AsyncHermes
+from src.hermes import results_cursor
+from src.marks import parse_since
+from tests.test_async_hermes import Async_Fixture_Transport
+from tests.test_hermes import Counting_Hermes
+
+TEAM = 'State=PA&Team-name=Moravian&Gender=m&Season=2022_Outdoor'
+
+
+def call(api, path, query='', headers=()):
+    """
+    Sends one GET request to an ASGI app and returns the status, the headers and the body.
+    """
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+             'headers': [(name.encode(), value.encode()) for name, value in headers]}
+    messages = []
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    async def send(message):
+        messages.append(message)
+    asyncio.run(api(scope, receive, send))
+    start = messages[0]
+    return start['status'], {name.decode(): value.decode() for name, value in start['headers']}, b''.join(m.get('body', b'') for m in messages[1:])
+
+def test_asgi_routes_match_hermes():
+    api = API(AsyncHermes(transport=Async_Fixture_Transport()))
+    hermes = Counting_Hermes()
+    status, headers, body = call(api, '/roster', TEAM)
+    assert status == 200 and headers['content-type'] == 'application/json'
+    assert json.loads(body) == json.loads(json.dumps(hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')))
+    status, _, body = call(api, '/athlete-bests', 'Name=Mastro_Shane&' + TEAM)
+    assert status == 200
+    assert json.loads(body) == json.loads(json.dumps(hermes.get_athlete_bests('Mastro_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')))
+
+def test_asgi_errors():
+    api = API(AsyncHermes(transport=Async_Fixture_Transport()))
+    status, _, body = call(api, '/roster', 'State=PA')
+    assert status == 400 and json.loads(body) == {'message': 'Check that headers are correct.', 'error': 400}
+    status, _, body = call(api, '/athlete-bests', 'Name=Nobody_Here&' + TEAM)
+    assert status == 404 and 'message' in json.loads(body)
+    assert call(api, '/nowhere')[0] == 404
+    assert call(api, '/athlete-results', 'Name=Mastro_Shane&since=yesterday&' + TEAM)[0] == 400
+
+def test_asgi_since_cursor_and_etag():
+    api = API(AsyncHermes(transport=Async_Fixture_Transport()))
+    status, headers, body = call(api, '/athlete-results', 'Name=Gray_Trevor&since=2022-04-01&' + TEAM)
+    synced = json.loads(body)
+    assert status == 200 and set(synced) == {'results', 'cursor'}
+    assert synced['cursor'] == results_cursor(synced['results'], parse_since('2022-04-01'))
+    status, not_modified, body = call(api, '/athlete-results', 'Name=Gray_Trevor&since=2022-04-01&' + TEAM, [('if-none-match', headers['etag'])])
+    assert status == 304 and body == b'' and not_modified['etag'] == headers['etag']
+
+def test_asgi_streams_ndjson():
+    api = API(AsyncHermes(transport=Async_Fixture_Transport()))
+    status, headers, body = call(api, '/athlete-results', 'Name=Gray_Trevor&stream=1&' + TEAM)
+    assert status == 200 and headers['content-type'] == 'application/x-ndjson'
+    lines = [json.loads(line) for line in body.decode().splitlines()]
+    assert lines == json.loads(json.dumps(Counting_Hermes().get_athlete_results('Gray_Trevor', 'PA', 'Moravian', 'm', '2022_Outdoor')))
+
+def test_import_has_no_side_effects(tmp_path, monkeypatch):
+    import importlib, asgi_server
+    monkeypatch.chdir(tmp_path)
+    importlib.reload(asgi_server)
+    assert list(tmp_path.iterdir()) == [] and not hasattr(asgi_server, 'app')
+    monkeypatch.setattr(asgi_server, 'UPSTREAM_RATE', 0)
+    api = asgi_server.create_app()
+    assert api.hermes.transport.limiter is None and api.hermes.transport.pool_size == asgi_server.UPSTREAM_CONNECTIONS
+
+def test_load_test_against_stand_in():
+    from benchmarks.load_test import run_load
+    results = asyncio.run(run_load(requests=42, concurrency=14, latency=0.02))
+    assert results['statuses'] == {200: 42}
+    assert results['most_upstream_in_flight'] > 1
@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from src.async_hermes import AsyncHermes
+from src.cache import PageCache
+from src.hermes import NoAthleteFoundException
+from tests.test_hermes import Counting_Hermes, urls
+
+
+class Async_Fixture_Transport:
+    """
+    Async stand-in transport that serves the test html files and tracks how many downloads overlap.
+    """
+    def __init__(self):
+        self.downloads = []
+        self.running = 0
+        self.most_running = 0
+
+    async def get(self, url):
+        self.downloads.append(url)
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        with open(f'tests/html_files/{urls[url]}', 'rb') as f:
+            return f.read()
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+def test_async_hermes_matches_hermes():
+    hermes = Counting_Hermes()
+    async_hermes = AsyncHermes(transport=Async_Fixture_Transport())
+    assert run(async_hermes.get_year_keys('PA', 'Moravian', 'm')) == hermes.get_year_keys('PA', 'Moravian', 'm')
+    assert run(async_hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')) == hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert run(async_hermes.get_top_performances('PA', 'Moravian', 'm', '2022_Outdoor')) == hermes.get_top_performances('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert run(async_hermes.get_athlete_bests('Mastro_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')) == hermes.get_athlete_bests('Mastro_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    assert run(async_hermes.get_athlete_results_by_id('6873033')) == hermes.get_athlete_results_by_id('6873033')
+
+def test_async_hermes_fetches_concurrently():
+    transport = Async_Fixture_Transport()
+    async_hermes = AsyncHermes(transport=transport, concurrency=2)
+    names = ['Houghton_Shane', 'Mastro_Shane', 'Gray_Trevor', 'Sabastro_Owen']
+
+    async def all_bests():
+        team = await async_hermes.team('PA', 'Moravian', 'm', '2022_Outdoor')
+        return await asyncio.gather(*[team.bests(name) for name in names])
+
+    bests = run(all_bests())
+    assert len(bests) == 4 and all(bests)
+    assert len(transport.downloads) == 2 + 4
+    assert transport.most_running == 2
+
+def test_async_hermes_athlete_not_found():
+    async_hermes = AsyncHermes(transport=Async_Fixture_Transport())
+    with pytest.raises(NoAthleteFoundException):
+        run(async_hermes.get_athlete_bests('Nobody_Here', 'PA', 'Moravian', 'm', '2022_Outdoor'))
+
+def test_async_meet_results_by_gender():
+    transport = Async_Fixture_Transport()
+    async_hermes = AsyncHermes(transport=transport)
+    results = run(async_hermes.get_meet_results_by_gender('Landmark Conference Championships'))
+    assert results['m'] == Counting_Hermes().get_meet_results('Landmark Conference Championships', 'm')
+    assert transport.most_running == 2 # both genders were downloaded at once
+    assert run(async_hermes.get_meet_results_by_id('20871', 'm')) == results['m']
+    columns = run(async_hermes.get_meet_results_by_id('20871', 'm', columnar=True))
+    assert columns.to_dict() == Counting_Hermes().get_meet_results_by_id('20871', 'm', columnar=True).to_dict()
+
+def test_async_current_season_downloaded_once_with_cache():
+    transport = Async_Fixture_Transport()
+    async_hermes = AsyncHermes(cache=PageCache(), transport=transport)
+    roster = run(async_hermes.get_roster('PA', 'Moravian', 'm', '2022_Cross_Country'))
+    assert run(async_hermes.get_roster('PA', 'Moravian', 'm', '2022_Cross_Country')) == roster
+    assert transport.downloads == ['https://www.tfrrs.org/teams/PA_college_m_Moravian.html']
@@ -0,0 +1,18 @@
+from benchmarks.bench_hermes import Stub_Transport, compare, run
+from benchmarks.synthetic import meet_page, meets_page
+from src.hermes import Hermes
+
+def test_synthetic_pages_are_read_like_real_ones():
+    hermes = Hermes(transport=Stub_Transport({'https://www.tfrrs.org/results/1/m/': meet_page(rows=200, events=4),
+                                              'https://www.tfrrs.org/results_search.html': meets_page(50)}))
+    events = hermes.get_meet_results_by_id('1', 'm')
+    assert [len(event['results']) for event in events] == [50, 50, 50, 50]
+    assert events[0]['results'][0]['time'] == '10.00'
+    assert len(hermes.get_meets()) == 50
+
+def test_run_and_compare():
+    results = run(['get_meets', 'get_meet_results'], repeat=1)
+    assert results['get_meet_results']['page_type'] == 'meet+meets'
+    assert compare(results, results) == []
+    slower = {name: dict(result, extract_ms=result['extract_ms'] * 10 + 100) for name, result in results.items()}
+    assert len(compare(slower, results)) == 2
@@ -0,0 +1,66 @@
+from src.cache import PageCache, page_type
+from tests.test_hermes import Counting_Hermes
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_page_type():
+    assert page_type('https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255') == 'team'
+    assert page_type('https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html') == 'athlete'
+    assert page_type('https://www.tfrrs.org/results_search.html') == 'meets'
+    assert page_type('http://www.tfrrs.org/results/xc/21450/Some_Meet') == 'meet'
+    assert page_type('https://www.tfrrs.org/') == 'other'
+
+def test_cache_hits_and_misses():
+    hermes = Counting_Hermes(cache=PageCache())
+    roster = hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor') == roster
+    hermes.get_top_performances('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert len(hermes.downloads) == 2 # the base team page and the season page, once each
+    stats = hermes.cache.stats()
+    assert stats['misses'] == 2
+    assert stats['hits'] == 2 # the base team page is only needed once for the season keys
+    assert stats['entries'] == 2
+
+def test_cache_ttl_per_page_type():
+    clock = Clock()
+    cache = PageCache(ttls={'team': 10, 'athlete': 100}, clock=clock)
+    cache.put('https://www.tfrrs.org/teams/PA_college_m_Moravian.html', 'team')
+    cache.put('https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html', 'athlete')
+    clock.now = 50
+    assert cache.get('https://www.tfrrs.org/teams/PA_college_m_Moravian.html') is None
+    assert cache.get('https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html') == 'athlete'
+    assert cache.stats()['expirations'] == 1
+
+def test_cache_lru_eviction():
+    cache = PageCache(max_entries=2)
+    cache.put('https://www.tfrrs.org/teams/a.html', 'a')
+    cache.put('https://www.tfrrs.org/teams/b.html', 'b')
+    cache.get('https://www.tfrrs.org/teams/a.html')
+    cache.put('https://www.tfrrs.org/teams/c.html', 'c')
+    assert 'https://www.tfrrs.org/teams/a.html' in cache
+    assert 'https://www.tfrrs.org/teams/b.html' not in cache
+    assert cache.evictions == 1
+
+    cache = PageCache(max_bytes=100)
+    cache.put('https://www.tfrrs.org/teams/a.html', 'a', 60)
+    cache.put('https://www.tfrrs.org/teams/b.html', 'b', 60)
+    assert len(cache) == 1 and cache.size == 60
+    cache.put('https://www.tfrrs.org/teams/c.html', 'c', 1000) # too big to ever fit
+    assert 'https://www.tfrrs.org/teams/c.html' not in cache
+
+def test_cache_invalidation():
+    hermes = Counting_Hermes(cache=PageCache())
+    hermes.get_athlete_bests('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    assert hermes.cache.invalidate(kind='athlete') == 1
+    assert len(hermes.cache) == 2
+    hermes.get_athlete_bests('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    assert len(hermes.downloads) == 4 # only the athlete page is downloaded again
+    hermes.cache.clear()
+    assert len(hermes.cache) == 0 and hermes.cache.size == 0
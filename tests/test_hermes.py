@@ -1,14 +1,23 @@
+import time
 from bs4 import BeautifulSoup
-from src.hermes import Hermes, remove_whitespace, NoTableFoundException
+from src.hermes import Hermes, remove_whitespace, NoTableFoundException, NoAthleteFoundException, NoMeetFoundException
+from src.athletes import AthleteIndex, get_athlete_id
 import pytest
 
 urls = {
     'https://www.tfrrs.org/teams/PA_college_m_Moravian.html': 'main_moravian.html',
     'https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255': 'moravian_outdoor_2022.html',
+    'https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=266': 'main_moravian.html',
     "https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html": 'distance.html',
     "https://www.tfrrs.org//athletes/6537261/Moravian/Shane_Mastro.html": 'thrower.html',
     "https://www.tfrrs.org//athletes/7983217/Moravian/Trevor_Gray.html": 'sprinter.html',
-    "https://www.tfrrs.org//athletes/7983219/Moravian/Owen_Sabastro.html": 'sprint_jumper.html'
+    "https://www.tfrrs.org//athletes/7983219/Moravian/Owen_Sabastro.html": 'sprint_jumper.html',
+    'https://www.tfrrs.org/athletes/6873033.html': 'distance.html',
+    'https://www.tfrrs.org/athletes/1.html': 'main_moravian.html',
+    'https://www.tfrrs.org/results_search.html': 'results_search.html',
+    'http://www.tfrrs.org/results/xc/20871/m/_Landmark_Conference_Championships': 'meet_results.html',
+    'http://www.tfrrs.org/results/xc/20871/f/_Landmark_Conference_Championships': 'meet_results.html',
+    'https://www.tfrrs.org/results/20871/m/': 'meet_results.html'
 }
 
 class Mock_Hermes(Hermes):
@@ -36,6 +45,29 @@ class Mock_Hermes(Hermes):
             print('html file does not exist')
         return soup 
 
+class Fixture_Transport:
+    """
+    Stand-in transport that serves the test html files instead of going to TFRRS and records every url it "downloads".
+    """
+    def __init__(self):
+        self.downloads = []
+
+    def get(self, url):
+        self.downloads.append(url)
+        with open(f'tests/html_files/{urls[url]}', 'rb') as f:
+            return f.read()
+
+class Counting_Hermes(Hermes):
+    """
+    Hermes using the Fixture_Transport. Unlike Mock_Hermes this goes through the real get_soup, so caching and parsing are exercised.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(transport=Fixture_Transport(), **kwargs)
+
+    @property
+    def downloads(self):
+        return self.transport.downloads
+
 def test_get_year_keys():
     hermes = Mock_Hermes()
     keys = hermes.get_year_keys('PA', 'Moravian', 'm')
@@ -116,4 +148,335 @@ def test_remove_white_space():
 
 def test_get_athlete_results_returns_list(): # eh test fix
     hermes = Mock_Hermes()
-    assert len(hermes.get_athlete_html('Sabastro_Owen', 'PA', 'Moravian', 'm', '2022_Outdoor')) != 0
\ No newline at end of file
+    assert len(hermes.get_athlete_html('Sabastro_Owen', 'PA', 'Moravian', 'm', '2022_Outdoor')) != 0
+
+def test_get_year_keys_is_remembered():
+    hermes = Counting_Hermes()
+    hermes.clock = lambda: 0
+    keys = hermes.get_year_keys('PA', 'Moravian', 'm')
+    assert hermes.get_year_keys('PA', 'Moravian', 'm') == keys
+    assert '2022_Cross_Country' not in keys
+    assert len(hermes.downloads) == 1
+
+    hermes.clock = lambda: hermes.season_keys_ttl + 1
+    hermes.get_year_keys('PA', 'Moravian', 'm')
+    assert len(hermes.downloads) == 2
+
+def test_get_team_html_downloads_each_page_once():
+    hermes = Counting_Hermes()
+    hermes.get_team_html('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert hermes.downloads == ['https://www.tfrrs.org/teams/PA_college_m_Moravian.html',
+                                'https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255']
+    hermes.get_team_html('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert len(hermes.downloads) == 3
+
+def test_get_team_html_reuses_base_page_for_current_season():
+    hermes = Counting_Hermes()
+    html = hermes.get_team_html('PA', 'Moravian', 'm', '2022_Cross_Country')
+    assert hermes.downloads == ['https://www.tfrrs.org/teams/PA_college_m_Moravian.html']
+    assert html.find('option', selected=True)['value'] == '266'
+    hermes.get_team_html('PA', 'Moravian', 'm', '2022_Cross_Country')
+    assert hermes.downloads[1] == 'https://www.tfrrs.org/teams/PA_college_m_Moravian.html' # same url, so a cache has it
+
+def test_current_season_downloaded_once_with_cache():
+    from src.cache import PageCache
+    hermes = Counting_Hermes(cache=PageCache())
+    roster = hermes.get_roster('PA', 'Moravian', 'm', '2022_Cross_Country')
+    assert hermes.get_roster('PA', 'Moravian', 'm', '2022_Cross_Country') == roster
+    assert hermes.downloads == ['https://www.tfrrs.org/teams/PA_college_m_Moravian.html']
+
+def test_team_season_fetches_team_page_once():
+    hermes = Counting_Hermes()
+    team = hermes.team('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert hermes.downloads == [] # nothing is downloaded until it is needed
+    assert team.roster == hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert team.top_performances == hermes.get_top_performances('PA', 'Moravian', 'm', '2022_Outdoor')
+    team_downloads = len(hermes.downloads)
+    team.bests('Houghton_Shane')
+    team.results('Mastro_Shane')
+    assert len(hermes.downloads) == team_downloads + 2 # only the two athlete pages
+
+def test_team_season_athlete_urls():
+    hermes = Mock_Hermes()
+    team = hermes.team('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert team.athlete_urls['Houghton_Shane'] == "https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html"
+    assert len(team.athlete_urls) == len(team.roster)
+    with pytest.raises(NoAthleteFoundException):
+        team.bests('Nobody_Here')
+
+def test_athlete_index_skips_team_page(tmp_path):
+    index = AthleteIndex(str(tmp_path / 'athletes.json'))
+    hermes = Counting_Hermes(athletes=index)
+    hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert index.lookup('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor') == ('6873033', "https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html")
+
+    hermes = Counting_Hermes(athletes=AthleteIndex(str(tmp_path / 'athletes.json'))) # loaded from disk
+    bests = hermes.get_athlete_bests('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    assert hermes.downloads == ["https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html"]
+    assert bests == Mock_Hermes().get_athlete_bests('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+
+def test_athlete_index_is_per_season():
+    index = AthleteIndex()
+    index.add_team('PA', 'Moravian', 'm', '2019_Outdoor', {'Smith_John': 'https://www.tfrrs.org//athletes/1111/Moravian/John_Smith.html'})
+    index.add_team('PA', 'Moravian', 'm', '2022_Outdoor', {'Smith_John': 'https://www.tfrrs.org//athletes/2222/Moravian/John_Smith.html'})
+    assert index.lookup('Smith_John', 'PA', 'Moravian', 'm', '2019_Outdoor')[0] == '1111'
+    assert index.lookup('Smith_John', 'PA', 'Moravian', 'm', '2022_Outdoor')[0] == '2222'
+    assert index.lookup('Smith_John', 'PA', 'Moravian', 'm', '2021_Outdoor') is None
+    assert index.get_url('1111') and index.get_url('2222')
+
+def test_get_athlete_by_id():
+    hermes = Counting_Hermes()
+    results = hermes.get_athlete_results_by_id('6873033')
+    assert hermes.downloads == ['https://www.tfrrs.org/athletes/6873033.html']
+    assert results == Mock_Hermes().get_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    assert get_athlete_id('/athletes/6537261/Moravian/Shane_Mastro.html') == '6537261'
+    with pytest.raises(NoAthleteFoundException):
+        hermes.get_athlete_bests_by_id('1') # the team page has no meet results like an error page
+
+def test_get_team_athletes():
+    hermes = Counting_Hermes()
+    athletes = hermes.get_team_athletes('PA', 'Moravian', 'm', '2022_Outdoor', include=('bests',), workers=4)
+    assert hermes.downloads.count('https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255') == 1
+    roster_names = list(hermes.team('PA', 'Moravian', 'm', '2022_Outdoor').athlete_urls)
+    assert [athlete['name'] for athlete in athletes] == roster_names
+    by_name = {athlete['name']: athlete for athlete in athletes}
+    assert by_name['Houghton_Shane']['bests'] == Mock_Hermes().get_athlete_bests('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    assert 'results' not in by_name['Houghton_Shane']
+    assert 'error' in by_name['Burrier_Lance'] # no test html file for this athlete, the rest are still returned
+    assert sum('error' not in athlete for athlete in athletes) == 4
+
+def test_get_team_athletes_bad_include():
+    with pytest.raises(ValueError):
+        list(Mock_Hermes().iter_team_athletes('PA', 'Moravian', 'm', '2022_Outdoor', include=('nothing',)))
+
+def test_get_meets():
+    hermes = Counting_Hermes()
+    meets = hermes.get_meets()
+    assert len(meets) == 3
+    assert meets[1] == {'date': 'Oct 29, 2022', 'meet': 'Landmark Conference Championships', 'sport': 'XC', 'state': 'PA'}
+
+def test_get_meet_results():
+    hermes = Counting_Hermes()
+    events = hermes.get_meet_results('Landmark Conference Championships', 'm')
+    assert [len(event['results']) for event in events] == [4, 2, 2] # the shot put attempts rows are left out
+    assert events[0]['results'][1] == {'pl': '2', 'name': 'Houghton, Shane', 'year': 'JR-3', 'team': 'Moravian', 'time': '26:14.9', 'score': '2'}
+    assert events[2]['name'].endswith('Final')
+
+def test_meet_index_is_shared():
+    hermes = Counting_Hermes()
+    hermes.get_meets()
+    events = hermes.get_meet_results('landmark conference  championships', 'm') # the name is normalized
+    assert events == Counting_Hermes().get_meet_results('Landmark Conference Championships', 'm')
+    assert hermes.downloads.count('https://www.tfrrs.org/results_search.html') == 1
+    with pytest.raises(NoMeetFoundException):
+        hermes.get_meet_results('Not A Meet', 'm')
+
+def test_search_meets():
+    hermes = Counting_Hermes()
+    assert [meet['id'] for meet in hermes.search_meets('Paul')] == ['20544']
+    assert [meet['meet'] for meet in hermes.search_meets('Landmrk Conference Championship')] == ['Landmark Conference Championships']
+
+def test_get_meet_results_by_id():
+    hermes = Counting_Hermes()
+    events = hermes.get_meet_results_by_id('20871', 'm')
+    assert hermes.downloads == ['https://www.tfrrs.org/results/20871/m/'] # the results search page is skipped
+    assert events == Counting_Hermes().get_meet_results('Landmark Conference Championships', 'm')
+
+def test_get_meet_results_by_gender():
+    hermes = Counting_Hermes()
+    results = hermes.get_meet_results_by_gender('Landmark Conference Championships')
+    assert set(results) == {'m', 'f'}
+    assert len(hermes.downloads) == 3
+
+def test_iter_meet_results():
+    hermes = Counting_Hermes()
+    events = hermes.iter_meet_results('Landmark Conference Championships', 'm')
+    assert next(events)['name'] == hermes.get_meet_results('Landmark Conference Championships', 'm')[0]['name']
+    assert [event['name'] for event in events] == [event['name'] for event in hermes.get_meet_results('Landmark Conference Championships', 'm')[1:]]
+
+def test_iter_athlete_results():
+    hermes = Counting_Hermes()
+    meets = list(hermes.iter_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor'))
+    assert meets == hermes.get_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    assert list(hermes.iter_athlete_results_by_id('6873033')) == meets
+
+def test_iter_with_result_cache_reads_whole_page_first():
+    from src.cache import ResultCache
+    hermes = Counting_Hermes(results=ResultCache())
+    first = next(hermes.iter_athlete_results_by_id('6873033'))
+    hits = hermes.results.stats()['hits']
+    meets = hermes.get_athlete_results_by_id('6873033') # already kept whole by the first next()
+    assert hermes.results.stats()['hits'] == hits + 1 and meets[0] == first and len(meets) > 1
+    assert len(hermes.downloads) == 1
+
+def test_concurrent_downloads_are_coalesced():
+    from threading import Barrier, Thread
+    class Slow_Transport(Fixture_Transport):
+        def get(self, url):
+            time.sleep(0.2)
+            return super().get(url)
+    hermes = Hermes(transport=Slow_Transport())
+    barrier = Barrier(8)
+    soups = []
+    def fetch():
+        barrier.wait()
+        soups.append(hermes.get_soup('https://www.tfrrs.org/results_search.html'))
+    threads = [Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(hermes.transport.downloads) == 1
+    assert all(soup is soups[0] for soup in soups)
+    assert hermes.flights.stats() == {'calls': 1, 'coalesced': 7, 'in_flight': 0}
+
+class Response:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+class Revalidating_Transport(Fixture_Transport):
+    """
+    Fixture_Transport that also answers conditional requests: every page has the ETag "v<version>" and
+    a request with a matching If-None-Match gets a 304. etags=False leaves the ETag out so only the content hash is left.
+    """
+    def __init__(self, etags=True):
+        super().__init__()
+        self.etags = etags
+        self.version = 1
+        self.conditional = []
+
+    def request(self, url, headers=None):
+        etag = f'"v{self.version}"' if self.etags else None
+        if headers and headers.get('If-None-Match') == etag:
+            self.conditional.append(url)
+            return Response(304)
+        return Response(200, self.get(url), {'ETag': etag} if etag else {})
+
+def revalidating_hermes(transport):
+    from src.cache import ResultCache
+    clock = [0.0]
+    hermes = Hermes(transport=transport, results=ResultCache(clock=lambda: clock[0]))
+    hermes.parse_page = counted(hermes.parse_page)
+    return hermes, clock
+
+def counted(function):
+    def wrapper(*args):
+        wrapper.calls += 1
+        return function(*args)
+    wrapper.calls = 0
+    return wrapper
+
+def test_results_reused_on_not_modified():
+    hermes, clock = revalidating_hermes(Revalidating_Transport())
+    hermes.cache = None
+    results = hermes.get_athlete_results_by_id('6873033')
+    assert hermes.parse_page.calls == 1
+    assert hermes.get_athlete_results_by_id('6873033') is results
+    clock[0] += 3601
+    assert hermes.get_athlete_results_by_id('6873033') == results
+    assert hermes.transport.conditional == ['https://www.tfrrs.org/athletes/6873033.html']
+    assert hermes.parse_page.calls == 1
+    assert hermes.results.stats()['not_modified'] == 1
+
+def test_results_reused_on_same_content():
+    hermes, clock = revalidating_hermes(Revalidating_Transport(etags=False))
+    hermes.cache = None
+    meet = hermes.get_meet_results_by_id('20871', 'm')
+    clock[0] += 601
+    assert hermes.get_meet_results_by_id('20871', 'm') == meet
+    assert len(hermes.transport.downloads) == 2
+    assert hermes.parse_page.calls == 1
+    assert hermes.results.stats()['unchanged'] == 1
+
+def test_results_reextracted_on_change():
+    hermes, clock = revalidating_hermes(Revalidating_Transport())
+    hermes.cache = None
+    roster = hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    parses = hermes.parse_page.calls
+    clock[0] += 901
+    hermes.transport.version = 2
+    urls['https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255'] = 'main_moravian.html'
+    try:
+        assert hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor') != roster
+    finally:
+        urls['https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255'] = 'moravian_outdoor_2022.html'
+    assert hermes.parse_page.calls == parses + 1
+    assert hermes.transport.conditional == []
+
+def test_results_match_without_result_cache():
+    hermes, _ = revalidating_hermes(Revalidating_Transport())
+    plain = Counting_Hermes()
+    team = ('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert hermes.get_roster(*team) == plain.get_roster(*team)
+    assert hermes.get_top_performances(*team) == plain.get_top_performances(*team)
+    assert hermes.get_athlete_bests('Mastro_Shane', *team) == plain.get_athlete_bests('Mastro_Shane', *team)
+    assert hermes.get_athlete_results('Houghton_Shane', *team) == plain.get_athlete_results('Houghton_Shane', *team)
+    assert hermes.get_team_athletes(*team) == plain.get_team_athletes(*team)
+    assert hermes.get_meet_results('Landmark Conference Championships', 'm', compact=True) == plain.get_meet_results('Landmark Conference Championships', 'm', compact=True)
+    with pytest.raises(NoAthleteFoundException):
+        hermes.get_athlete_bests_by_id('1')
+
+def test_each_page_downloaded_once_for_every_reader():
+    from src.cache import ResultCache
+    team = ('PA', 'Moravian', 'm', '2022_Outdoor')
+    hermes = Counting_Hermes(results=ResultCache())
+    hermes.get_roster(*team)
+    hermes.get_top_performances(*team)
+    hermes.get_athlete_bests('Houghton_Shane', *team)
+    hermes.get_athlete_results('Houghton_Shane', *team)
+    assert hermes.downloads == ['https://www.tfrrs.org/teams/PA_college_m_Moravian.html',
+                                'https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255',
+                                'https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html']
+    for hermes in (Counting_Hermes(), Counting_Hermes(results=ResultCache())):
+        hermes.get_team_athletes(*team) # bests and results of each athlete from one download
+        assert len(hermes.downloads) == len(set(hermes.downloads)) == 2 + len(hermes.team(*team).athlete_urls)
+
+def test_new_reader_after_not_modified_reuses_kept_page():
+    hermes, clock = revalidating_hermes(Revalidating_Transport())
+    hermes.get_athlete_bests_by_id('6873033')
+    clock[0] += 3601
+    hermes.get_athlete_results_by_id('6873033')
+    assert hermes.transport.conditional == ['https://www.tfrrs.org/athletes/6873033.html']
+    assert hermes.transport.downloads == ['https://www.tfrrs.org/athletes/6873033.html'] # the 304 was not followed by a download
+
+def test_stale_results_are_revalidated_in_background():
+    from src.cache import ResultCache
+    clock = [0.0]
+    hermes = Hermes(transport=Revalidating_Transport(), results=ResultCache(stale_ttl=600, clock=lambda: clock[0]))
+    results = hermes.get_athlete_results_by_id('6873033')
+    assert hermes.background is None # no thread pool until something is stale
+    clock[0] += 3601
+    assert hermes.get_athlete_results_by_id('6873033') is results # served stale without waiting
+    hermes.close() # waits for the revalidation
+    assert hermes.background is None
+    assert hermes.transport.conditional == ['https://www.tfrrs.org/athletes/6873033.html']
+    assert hermes.results.stats()['stale'] == 1
+    assert hermes.results.lookup('https://www.tfrrs.org/athletes/6873033.html', ('read_found_athlete', '6873033', 'results'))[0] == 'fresh'
+    clock[0] += 601 + 3600
+    hermes.get_athlete_results_by_id('6873033') # too stale, revalidated before answering
+    assert len(hermes.transport.conditional) == 2
+
+def test_athlete_results_since():
+    from datetime import date
+    from src.hermes import newer_meets, results_cursor
+    hermes = Counting_Hermes()
+    meets = hermes.get_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor', since='2022-04-15')
+    assert [meet['date'] for meet in meets] == ['May 18-19, 2022', 'May 7-8, 2022', 'Apr 23, 2022', 'Apr 15, 2022']
+    assert hermes.get_athlete_results_by_id('6873033', since=date(2022, 4, 15)) == meets
+    assert results_cursor(meets, '2022-04-15') == '2022-05-18'
+    assert results_cursor([], '2022-04-15') == '2022-04-15'
+    def history():
+        yield {'date': 'May 7-8, 2022'}
+        yield {'date': 'Apr 2, 2022'}
+        raise AssertionError('read past the watermark')
+    assert len(list(newer_meets(history(), '2022-05-01'))) == 1
+
+def test_athlete_results_since_does_not_store_partial_history():
+    from src.store import Store
+    hermes = Counting_Hermes(store=Store())
+    hermes.get_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor', since='2022-05-01')
+    assert hermes.store.load_athlete_results('PA', 'Moravian', 'm', 'Houghton_Shane') is None
+    full = hermes.get_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    assert hermes.get_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor', since='2022-05-01') == full[:2]
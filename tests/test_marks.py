@@ -0,0 +1,72 @@
+import math
+import pytest
+from datetime import date
+from src.marks import parse_mark, parse_place, parse_meet_date, Performances
+from tests.test_hermes import Counting_Hermes
+
+def test_parse_times():
+    assert parse_mark('10.98').value == 10.98
+    assert parse_mark('4:05.12').value == 245.12
+    assert parse_mark('1:02:03.4').value == 3723.4
+    assert parse_mark('4:05.12').unit == 's'
+
+def test_parse_field_marks():
+    assert parse_mark('15.09m (0.0)  49\' 6.25"').value == 15.09
+    assert parse_mark("16.11m 52'10.25").value == 16.11 # the bests table leaves out the spacing
+    assert parse_mark('46\' 4"').value == 14.1224
+    assert parse_mark('46\' 4"').unit == 'm'
+
+def test_parse_wind_and_flags():
+    mark = parse_mark('10.98w (3.1)')
+    assert (mark.value, mark.wind, mark.flags) == (10.98, 3.1, ('wind-aided',))
+    assert parse_mark('11.24 (-1.6)').wind == -1.6
+    assert parse_mark('11.10(0.0)').wind == 0.0
+    mark = parse_mark('5.65mw (3.0)  18\' 6.5"')
+    assert (mark.value, mark.unit, mark.flags) == (5.65, 'm', ('wind-aided',))
+    assert parse_mark('DNF').value is None and parse_mark('DNF').flags == ('DNF',)
+    assert parse_mark('5120', 'Decathlon').unit == 'pts'
+
+def test_parse_place_and_date():
+    assert parse_place('24th(P)') == (24, 'P')
+    assert parse_place('1st') == (1, None)
+    assert parse_place('') == (None, None)
+    assert parse_meet_date('May 18-19, 2022') == date(2022, 5, 18)
+    assert parse_meet_date('Nov 12, 2022') == date(2022, 11, 12)
+    assert parse_meet_date('Dec 31-Jan 2, 2023') == date(2022, 12, 31)
+    assert parse_meet_date('Jan 30-Feb 1, 2023') == date(2023, 1, 30)
+    assert parse_meet_date('TBA') is None
+
+def test_columnar_athlete_results():
+    hermes = Counting_Hermes()
+    results = hermes.get_athlete_results('Gray_Trevor', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    columns = hermes.get_athlete_results('Gray_Trevor', 'PA', 'Moravian', 'm', '2022_Outdoor', columnar=True)
+    assert len(columns) == sum(len(meet['performances']) for meet in results)
+    assert columns.event[0] == '100' and columns.mark[0] == 11.12 and columns.wind[0] == 0.9
+    assert columns.place[0] == 24 and date.fromordinal(columns.date[0]) == date(2022, 5, 18)
+    assert math.isnan(columns.mark[columns.text.index('DQ')])
+    assert columns.to_dict()['mark'][columns.text.index('DQ')] is None
+
+def test_columnar_top_performances_and_meet_results():
+    hermes = Counting_Hermes()
+    top = hermes.get_top_performances('PA', 'Moravian', 'm', '2022_Outdoor', columnar=True)
+    assert isinstance(top, Performances)
+    assert top.athlete[0] == 'Gray, Trevor' and top.mark[0] == 10.98
+    meet = hermes.get_meet_results('Landmark Conference Championships', 'm', columnar=True)
+    assert len(meet) == 6 # the team scores have no marks
+    assert list(meet.mark) == [1561.4, 1574.9, 1580.1, 1591.0, 14.12, 13.8]
+    assert list(meet.unit) == ['s'] * 4 + ['m'] * 2
+    assert set(meet.date) == {date(2022, 10, 29).toordinal()} # from the meet header
+    from src.cache import ResultCache
+    cached = Counting_Hermes(results=ResultCache())
+    assert cached.get_meet_results('Landmark Conference Championships', 'm', columnar=True).to_dict() == meet.to_dict()
+    assert cached.get_meet_results('Landmark Conference Championships', 'm') == hermes.get_meet_results('Landmark Conference Championships', 'm')
+    assert cached.downloads.count('https://www.tfrrs.org/results/20871/m/') + cached.downloads.count('http://www.tfrrs.org/results/xc/20871/m/_Landmark_Conference_Championships') == 1
+
+def test_parse_since():
+    from datetime import datetime
+    from src.marks import parse_since
+    assert parse_since('2022-05-18') == date(2022, 5, 18)
+    assert parse_since(datetime(2022, 5, 18, 10, 30)) == date(2022, 5, 18)
+    assert parse_since(None) is None
+    with pytest.raises(ValueError):
+        parse_since('May 18')
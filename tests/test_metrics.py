@@ -0,0 +1,48 @@
+from src.metrics import Call, Metrics, covered
+from tests.test_hermes import Counting_Hermes
+
+def test_render_histogram():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.calls.observe(0.5, method='get_roster')
+    lines = metrics.render().splitlines()
+    assert '# TYPE hermes_call_seconds histogram' in lines
+    assert 'hermes_call_seconds_bucket{method="get_roster",le="0.1"} 0' in lines
+    assert 'hermes_call_seconds_bucket{method="get_roster",le="1.0"} 1' in lines
+    assert 'hermes_call_seconds_bucket{method="get_roster",le="+Inf"} 1' in lines
+    assert 'hermes_call_seconds_count{method="get_roster"} 1' in lines
+
+def test_hermes_calls_are_split_into_fetch_parse_and_extract():
+    metrics = Metrics()
+    hermes = Counting_Hermes(metrics=metrics)
+    hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    assert metrics.calls.get(method='get_roster')[0] == 1 # the methods get_roster calls are part of its call
+    assert metrics.calls.get(method='get_year_keys') == (0, 0.0)
+    assert metrics.upstream_requests.get(method='get_roster', page_type='team') == 2
+    assert metrics.parses.get(page_type='team')[0] == 2
+    call_seconds = metrics.calls.get(method='get_roster')[1]
+    assert metrics.parses.get(page_type='team')[1] < call_seconds
+
+def test_thread_pool_work_counts_towards_the_call():
+    metrics = Metrics()
+    hermes = Counting_Hermes(metrics=metrics)
+    athletes = hermes.get_team_athletes('PA', 'Moravian', 'm', '2022_Outdoor', include=('bests',))
+    downloaded = sum(1 for athlete in athletes if 'error' not in athlete)
+    assert metrics.upstream_requests.get(method='get_team_athletes', page_type='athlete') == downloaded
+    assert metrics.current() is None
+
+def test_overlapping_fetches_count_once():
+    assert covered([(0, 2), (1, 3), (5, 6)]) == 4
+    call = Call('get_team_athletes')
+    call.add('fetch', 0, 2) # two workers downloading at once
+    call.add('fetch', 1, 3)
+    call.add('parse', 2, 4) # parsing partly while the second download finishes
+    assert call.durations(5) == {'fetch': 3, 'parse': 1, 'extract': 1}
+
+def test_durations_add_up_with_workers():
+    metrics = Metrics()
+    hermes = Counting_Hermes(metrics=metrics)
+    with metrics.call() as call:
+        hermes.get_team_athletes('PA', 'Moravian', 'm', '2022_Outdoor', include=('bests',), workers=8)
+    durations = dict(part.split(';dur=') for part in call.server_timing().split(', '))
+    assert float(durations['fetch']) + float(durations['parse']) <= float(durations['total']) + 0.2 # rounded to 0.1ms
+    assert len(call.intervals['fetch']) == 2 + len(hermes.team('PA', 'Moravian', 'm', '2022_Outdoor').athlete_urls)
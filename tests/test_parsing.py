@@ -0,0 +1,43 @@
+import pytest
+from bs4 import BeautifulSoup
+from src.parsing import parse
+from src.hermes import read_athlete_bests, read_athlete_results, read_meet_results, read_season_keys, get_table_data
+from tests.test_hermes import urls
+
+parsers = ['html.parser']
+try:
+    import lxml
+    parsers.append('lxml')
+except ImportError:
+    pass
+
+def read(url):
+    with open(f'tests/html_files/{urls[url]}', 'rb') as f:
+        return f.read()
+
+@pytest.mark.parametrize('parser', parsers)
+def test_partial_athlete_page_matches_full(parser):
+    url = "https://www.tfrrs.org//athletes/6537261/Moravian/Shane_Mastro.html"
+    full = BeautifulSoup(read(url), 'html.parser')
+    partial = parse(read(url), parser, url)
+    assert read_athlete_bests(partial) == read_athlete_bests(full)
+    assert read_athlete_results(partial) == read_athlete_results(full)
+    assert partial.find('title') is None # nothing outside of the bests and meet results is parsed
+
+@pytest.mark.parametrize('parser', parsers)
+def test_partial_team_page_matches_full(parser):
+    url = 'https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255'
+    full = BeautifulSoup(read(url), 'html.parser')
+    partial = parse(read(url), parser, url)
+    assert read_season_keys(partial, 'Moravian') == read_season_keys(full, 'Moravian')
+    assert [get_table_data(table) for table in partial.find_all('table', class_='tablesaw')] == \
+           [get_table_data(table) for table in full.find_all('table', class_='tablesaw')]
+    assert len(partial.find_all('a')) < len(full.find_all('a'))
+
+@pytest.mark.parametrize('parser', parsers)
+def test_partial_meet_page_matches_full(parser):
+    url = 'http://www.tfrrs.org/results/xc/20871/m/_Landmark_Conference_Championships'
+    assert read_meet_results(parse(read(url), parser, url)) == read_meet_results(BeautifulSoup(read(url), 'html.parser'))
+
+def test_unknown_pages_are_parsed_whole():
+    assert parse(b'<html><head><title>hi</title></head></html>', 'html.parser', 'https://www.tfrrs.org/').title.text == 'hi'
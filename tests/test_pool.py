@@ -0,0 +1,56 @@
+import pickle
+import pytest
+from src.hermes import NoAthleteFoundException, read_meet_results
+from src.pool import ParsePool
+from src.cache import PageCache, ResultCache
+from tests.test_hermes import Counting_Hermes, Revalidating_Transport, urls
+
+TEAM = ('PA', 'Moravian', 'm', '2022_Outdoor')
+
+@pytest.fixture(scope='module')
+def pool():
+    with ParsePool(2) as pool:
+        yield pool
+
+def test_pool_starts_warm_workers(pool):
+    assert len(pool.pids) == 2
+
+def test_pool_returns_plain_results(pool):
+    with open(f"tests/html_files/{urls['https://www.tfrrs.org/results/20871/m/']}", 'rb') as f:
+        events = pool.extract(f.read(), read_meet_results, (True,), url='https://www.tfrrs.org/results/20871/m/')
+    assert events
+    assert b'bs4' not in pickle.dumps(events) # no soup objects came back with the results
+
+def test_hermes_with_pool_matches_hermes(pool):
+    hermes = Counting_Hermes(pool=pool, results=ResultCache())
+    plain = Counting_Hermes()
+    assert hermes.get_roster(*TEAM) == plain.get_roster(*TEAM)
+    assert hermes.get_top_performances(*TEAM) == plain.get_top_performances(*TEAM)
+    assert hermes.get_athlete_results('Houghton_Shane', *TEAM) == plain.get_athlete_results('Houghton_Shane', *TEAM)
+    assert hermes.get_team_athletes(*TEAM) == plain.get_team_athletes(*TEAM)
+    assert hermes.get_meet_results('Landmark Conference Championships', 'm') == plain.get_meet_results('Landmark Conference Championships', 'm')
+    assert hermes.search_meets('Landmark') == plain.search_meets('Landmark')
+    with pytest.raises(NoAthleteFoundException):
+        hermes.get_athlete_bests_by_id('1')
+
+def test_pool_with_result_cache(pool):
+    hermes = Counting_Hermes(pool=pool, results=ResultCache())
+    hermes.transport = Revalidating_Transport()
+    meet = hermes.get_meet_results_by_id('20871', 'm')
+    assert hermes.get_meet_results_by_id('20871', 'm') == meet
+    assert len(hermes.transport.downloads) == 1
+
+def test_pool_needs_result_cache(pool):
+    with pytest.raises(ValueError):
+        Counting_Hermes(pool=pool, cache=PageCache())
+
+def test_pool_downloads_each_page_once(pool):
+    hermes = Counting_Hermes(pool=pool, cache=PageCache(), results=ResultCache())
+    hermes.get_roster(*TEAM)
+    hermes.get_roster(*TEAM)
+    hermes.get_top_performances(*TEAM)
+    hermes.get_athlete_bests('Houghton_Shane', *TEAM)
+    hermes.get_athlete_bests('Houghton_Shane', *TEAM)
+    assert hermes.downloads == ['https://www.tfrrs.org/teams/PA_college_m_Moravian.html',
+                                'https://www.tfrrs.org/teams/PA_college_m_Moravian.html?config_hnd=255',
+                                'https://www.tfrrs.org//athletes/6873033/Moravian/Shane__Houghton.html']
@@ -0,0 +1,64 @@
+import json
+from src.scheduler import Refresher, Watchlist, CURRENT, MEETS, PAST
+from src.cache import PageCache
+from tests.test_hermes import Counting_Hermes
+
+TEAM = {'state': 'PA', 'team': 'Moravian', 'gender': 'm', 'season': '2022_Outdoor', 'include': ['bests']}
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_watchlist_from_file(tmp_path):
+    path = tmp_path / 'watchlist.json'
+    path.write_text(json.dumps({'teams': [TEAM], 'meets': [{'id': '20871', 'genders': ['m']}]}))
+    watchlist = Watchlist.from_file(path)
+    assert watchlist.teams == [TEAM]
+    assert watchlist.meets == [{'id': '20871', 'genders': ['m']}]
+    assert watchlist.latest_meets == 0
+
+def test_refresher_warms_watchlist():
+    hermes = Counting_Hermes(cache=PageCache())
+    clock = Clock()
+    refresher = Refresher(hermes, Watchlist([TEAM], [{'id': '20871', 'genders': ['m']}]), clock=clock)
+    assert refresher.run_pending() == 2
+    downloads = len(hermes.downloads)
+    hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    hermes.get_athlete_bests('Mastro_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    hermes.get_meet_results_by_id('20871', 'm')
+    assert len(hermes.downloads) == downloads
+    assert [job['error'] for job in refresher.stats()] == [None, None]
+
+def test_refresher_schedule():
+    hermes = Counting_Hermes()
+    clock = Clock()
+    refresher = Refresher(hermes, Watchlist([TEAM], [{'id': '20871', 'genders': ['m']}]), meet_interval=60, clock=clock)
+    refresher.run_pending()
+    team, meet = refresher.jobs
+    assert team.priority == PAST # 2022_Outdoor is over on the fixture team page
+    assert refresher.run_pending() == 0
+    assert refresher.next_due() == 60
+    clock.now = 61
+    assert refresher.run_pending() == 1
+    assert (team.runs, meet.runs) == (1, 2)
+
+def test_refresher_runs_current_seasons_first():
+    ran = []
+    refresher = Refresher(Counting_Hermes(), Watchlist(), clock=Clock())
+    for name, priority in (('past', PAST), ('meet', MEETS), ('current', CURRENT)):
+        refresher.add(refresher.meet_job(name, ()))
+        refresher.jobs[-1].priority = priority
+        refresher.jobs[-1].run = lambda job: ran.append(job.name)
+    refresher.run_pending()
+    assert ran == ['meet current', 'meet meet', 'meet past']
+
+def test_refresher_records_failures():
+    hermes = Counting_Hermes()
+    refresher = Refresher(hermes, Watchlist(meets=[{'id': '1', 'genders': ['m']}]), clock=Clock())
+    refresher.run_pending()
+    job = refresher.stats()[0]
+    assert (job['runs'], job['failures']) == (1, 1)
+    assert job['error'].startswith('KeyError')
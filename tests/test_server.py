@@ -0,0 +1,147 @@
+import json, os
+from types import SimpleNamespace
+import pytest
+from src.cache import DEFAULT_TTLS
+from tests.test_hermes import Counting_Hermes
+
+TEAM = {'State': 'PA', 'Team-name': 'Moravian', 'Gender': 'm', 'Season': '2022_Outdoor'}
+CURRENT_TEAM = dict(TEAM, Season='2022_Cross_Country')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """
+    The server module with its Hermes swapped for a Counting_Hermes and its clock for one the test moves.
+    """
+    cwd = os.getcwd()
+    monkeypatch.chdir(tmp_path) # importing server opens hermes.db and athlete_index.json in the working directory
+    import server
+    monkeypatch.chdir(cwd)
+    clock = Clock()
+    monkeypatch.setattr(server, 'hermes', Counting_Hermes(metrics=server.metrics))
+    monkeypatch.setattr(server, 'validators', {})
+    monkeypatch.setattr(server, 'time', SimpleNamespace(monotonic=clock))
+    server.clock = clock
+    server.client = server.app.test_client()
+    return server
+
+def test_responses_have_etag_and_max_age(server):
+    response = server.client.get('/roster', query_string=TEAM)
+    assert response.status_code == 200
+    etag, weak = response.get_etag()
+    assert etag and not weak
+    assert response.cache_control.public and response.cache_control.max_age == server.PAST_SEASON_MAX_AGE
+    response = server.client.get('/roster', query_string=CURRENT_TEAM)
+    assert response.cache_control.max_age == DEFAULT_TTLS['team']
+
+def test_matching_etag_is_answered_without_scraping(server):
+    etag = server.client.get('/roster', query_string=TEAM).get_etag()[0]
+    downloads = len(server.hermes.downloads)
+    response = server.client.get('/roster', query_string=TEAM, headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 304 and response.get_data() == b''
+    assert response.get_etag()[0] == etag and response.cache_control.max_age == server.PAST_SEASON_MAX_AGE
+    assert len(server.hermes.downloads) == downloads
+
+def test_expired_validator_scrapes_again(server):
+    etag = server.client.get('/roster', query_string=CURRENT_TEAM).get_etag()[0]
+    server.clock.now = DEFAULT_TTLS['team'] + 1
+    server.hermes.get_roster = lambda *args: [{'name': 'New, Athlete', 'year': 'FR-1'}] # the roster changed meanwhile
+    response = server.client.get('/roster', query_string=CURRENT_TEAM, headers={'If-None-Match': f'"{etag}"'})
+    assert response.status_code == 200 and response.get_etag()[0] != etag
+    assert response.get_json() == [{'name': 'New, Athlete', 'year': 'FR-1'}]
+
+def test_validators_evict_expired_then_everything(server, monkeypatch):
+    monkeypatch.setattr(server, 'MAX_VALIDATORS', 2)
+    server.client.get('/meets')
+    server.client.get('/meet-search', query_string={'Query': 'Landmark'})
+    server.clock.now = DEFAULT_TTLS['meets'] + 1 # both expired
+    server.client.get('/roster', query_string=TEAM)
+    assert [path.split('?')[0] for path in server.validators] == ['/roster']
+    server.client.get('/top-performances', query_string=TEAM)
+    assert len(server.validators) == 2
+    server.client.get('/roster', query_string=CURRENT_TEAM) # full and nothing expired
+    assert list(server.validators) == ['/roster?' + '&'.join(f'{key}={value}' for key, value in CURRENT_TEAM.items())]
+
+def test_validators_shared_across_threads(server, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    monkeypatch.setattr(server, 'MAX_VALIDATORS', 2)
+    monkeypatch.setattr(server.hermes, 'search_meets', lambda query: [query])
+    def search(i):
+        server.clock.now += DEFAULT_TTLS['meets'] # every remembered ETag has expired by the next request
+        return server.app.test_client().get('/meet-search', query_string={'Query': str(i)}).status_code
+    with ThreadPoolExecutor(8) as pool:
+        assert set(pool.map(search, range(200))) == {200}
+    assert len(server.validators) <= 2
+
+def test_stream_sends_one_json_object_per_line(server):
+    response = server.client.get('/athlete-results', query_string=dict(TEAM, Name='Gray_Trevor', stream='1'))
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == server.client.get('/athlete-results', query_string=dict(TEAM, Name='Gray_Trevor')).get_json()
+    response = server.client.get('/meet-results', query_string={'Meet-name': 'Landmark Conference Championships', 'Gender': 'm', 'stream': '1'})
+    assert response.mimetype == 'application/x-ndjson'
+    assert all(isinstance(json.loads(line), dict) for line in response.get_data(as_text=True).splitlines())
+
+def test_stream_with_result_cache_matches_json(server, monkeypatch):
+    from src.cache import ResultCache
+    monkeypatch.setattr(server, 'hermes', Counting_Hermes(metrics=server.metrics, results=ResultCache()))
+    response = server.client.get('/athlete-results', query_string=dict(TEAM, Name='Gray_Trevor', stream='1'))
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    downloads, hits = len(server.hermes.downloads), server.hermes.results.stats()['hits']
+    assert lines == server.client.get('/athlete-results', query_string=dict(TEAM, Name='Gray_Trevor')).get_json()
+    assert len(server.hermes.downloads) == downloads and server.hermes.results.stats()['hits'] > hits # kept whole by the stream
+
+def test_stream_of_missing_athlete_or_meet_is_a_json_error(server):
+    response = server.client.get('/athlete-results', query_string=dict(TEAM, Name='Nobody_Here', stream='1'))
+    assert response.status_code == 404 and response.mimetype == 'application/json' and 'message' in response.get_json()
+    response = server.client.get('/meet-results', query_string={'Meet-name': 'No Such Meet', 'Gender': 'm', 'stream': '1'})
+    assert response.status_code == 404 and response.mimetype == 'application/json' and 'message' in response.get_json()
+
+def test_metrics_in_prometheus_format(server, monkeypatch):
+    from src.cache import PageCache, ResultCache
+    monkeypatch.setattr(server, 'hermes', Counting_Hermes(metrics=server.metrics, cache=PageCache(), results=ResultCache()))
+    server.client.get('/roster', query_string=TEAM)
+    response = server.client.get('/metrics')
+    assert response.status_code == 200 and response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert '# TYPE hermes_http_requests_total counter' in text
+    assert 'hermes_http_requests_total{endpoint="get_roster",status="200"}' in text
+    for gauge in ('hermes_page_cache', 'hermes_single_flight', 'hermes_result_cache'):
+        assert f'# TYPE {gauge} gauge' in text
+    assert 'hermes_page_cache{stat="misses"}' in text and 'hermes_result_cache{stat="entries"}' in text
+    assert 'hermes_single_flight{stat=' in text
+
+def test_server_timing_switch(server, monkeypatch):
+    response = server.client.get('/roster', query_string=TEAM)
+    assert [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')] == ['fetch', 'parse', 'extract', 'total']
+    monkeypatch.setitem(server.app.config, 'SERVER_TIMING', False)
+    assert 'Server-Timing' not in server.client.get('/roster', query_string=CURRENT_TEAM).headers
+
+def test_since_returns_results_and_cursor(server):
+    everything = server.client.get('/athlete-results', query_string=dict(TEAM, Name='Gray_Trevor')).get_json()
+    response = server.client.get('/athlete-results', query_string=dict(TEAM, Name='Gray_Trevor', since='2022-04-15'))
+    assert response.status_code == 200
+    synced = response.get_json()
+    assert set(synced) == {'results', 'cursor'}
+    assert synced['results'] == everything[:5] # Apr 15 onwards, newest first
+    assert synced['cursor'] == '2022-05-18'
+    response = server.client.get('/athlete-results', query_string=dict(TEAM, Name='Gray_Trevor', since='2030-01-01'))
+    assert response.get_json() == {'results': [], 'cursor': '2030-01-01'}
+
+def test_since_with_stream(server):
+    response = server.client.get('/athlete-results', query_string=dict(TEAM, Name='Gray_Trevor', since='2022-04-15', stream='1'))
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [meet['date'] for meet in lines] == ['May 18-19, 2022', 'May 7-8, 2022', 'Apr 29-30, 2022', 'Apr 23, 2022', 'Apr 15, 2022']
+
+def test_malformed_since_is_a_400(server):
+    for path, args in (('/athlete-results', dict(TEAM, Name='Gray_Trevor')), ('/athlete-results-by-id', {'Athlete-id': '6873033'})):
+        response = server.client.get(path, query_string=dict(args, since='last tuesday'))
+        assert response.status_code == 400 and response.get_json()['message'] == "since has to be a date like 2022-05-18."
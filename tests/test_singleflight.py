@@ -0,0 +1,32 @@
+from threading import Event, Thread
+import pytest
+from src.singleflight import SingleFlight
+
+def test_waiters_get_the_exception():
+    flights = SingleFlight()
+    started, release = Event(), Event()
+    errors = []
+    def failing():
+        started.set()
+        release.wait()
+        raise ValueError('upstream down')
+    def leader():
+        with pytest.raises(ValueError):
+            flights.do('url', failing)
+    def waiter():
+        try:
+            flights.do('url', lambda: 'never called')
+        except ValueError as e:
+            errors.append(e)
+    first = Thread(target=leader)
+    first.start()
+    started.wait()
+    second = Thread(target=waiter)
+    second.start()
+    while flights.stats()['coalesced'] == 0:
+        pass
+    release.set()
+    first.join()
+    second.join()
+    assert [str(e) for e in errors] == ['upstream down']
+    assert flights.do('url', lambda: 'retried') == 'retried' # a failed call is not remembered
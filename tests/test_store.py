@@ -0,0 +1,73 @@
+from src.store import Store
+from tests.test_hermes import Counting_Hermes
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+def test_past_season_is_served_from_store(tmp_path):
+    path = str(tmp_path / 'hermes.db')
+    hermes = Counting_Hermes(store=Store(path))
+    roster = hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    performances = hermes.get_top_performances('PA', 'Moravian', 'm', '2022_Outdoor')
+    downloads = len(hermes.downloads)
+
+    fresh = Counting_Hermes(store=Store(path)) # a new process with the same database
+    assert fresh.get_roster('PA', 'Moravian', 'm', '2022_Outdoor') == roster
+    assert fresh.get_top_performances('PA', 'Moravian', 'm', '2022_Outdoor') == performances
+    assert fresh.downloads == []
+    assert downloads > 0
+
+def test_current_season_goes_stale():
+    clock = Clock()
+    hermes = Counting_Hermes(store=Store(current_ttl=60, clock=clock))
+    roster = hermes.get_roster('PA', 'Moravian', 'm', '2022_Cross_Country')
+    downloads = len(hermes.downloads)
+    assert hermes.get_roster('PA', 'Moravian', 'm', '2022_Cross_Country') == roster
+    assert len(hermes.downloads) == downloads
+
+    clock.now = 61
+    assert hermes.get_roster('PA', 'Moravian', 'm', '2022_Cross_Country') == roster
+    assert len(hermes.downloads) > downloads
+    assert hermes.store.load_roster('PA', 'Moravian', 'm', '2022_Outdoor', historical=True) is None # never scraped
+
+def test_athlete_results_round_trip():
+    hermes = Counting_Hermes(store=Store())
+    results = hermes.get_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor')
+    downloads = len(hermes.downloads)
+    assert hermes.get_athlete_results('Houghton_Shane', 'PA', 'Moravian', 'm', '2022_Outdoor') == results
+    assert len(hermes.downloads) == downloads
+    tfrrs_id, = hermes.store.db.execute("SELECT tfrrs_id FROM athletes WHERE name = 'Houghton_Shane'").fetchone()
+    assert tfrrs_id == '6873033'
+
+def test_meet_results_round_trip():
+    hermes = Counting_Hermes(store=Store())
+    plain = Counting_Hermes()
+    meet = ('Landmark Conference Championships', 'm')
+    assert hermes.get_meet_results(*meet) == plain.get_meet_results(*meet)
+    downloads = len(hermes.downloads)
+    assert hermes.get_meet_results(*meet, compact=True) == plain.get_meet_results(*meet, compact=True)
+    assert hermes.get_meet_results(*meet, columnar=True).to_dict() == plain.get_meet_results(*meet, columnar=True).to_dict()
+    assert len(hermes.downloads) == downloads
+    assert hermes.store.load_meet_date('20871') == 'October 29, 2022'
+    fastest, = hermes.store.db.execute("SELECT mark FROM performances WHERE kind = 'meet' AND unit = 's' ORDER BY mark LIMIT 1").fetchone()
+    assert fastest == 26 * 60 + 1.4
+
+def test_invalidate():
+    hermes = Counting_Hermes(store=Store())
+    hermes.get_roster('PA', 'Moravian', 'm', '2022_Outdoor')
+    hermes.store.invalidate('roster')
+    assert hermes.store.load_roster('PA', 'Moravian', 'm', '2022_Outdoor', historical=True) is None
+    assert hermes.store.load_seasons('PA', 'Moravian', 'm') is not None
+
+def test_roster_rows_matched_to_athletes_by_name():
+    store = Store()
+    roster = [{'name': 'Burrier, Lance', 'year': 'SO-2'}, {'name': 'Nobody, Here', 'year': 'FR-1'}, {'name': 'Calantoni, Marco', 'year': 'SO-2'}]
+    athlete_urls = {'Calantoni_Marco': 'https://www.tfrrs.org//athletes/7791526/Moravian/Marco_Calantoni.html', # not in roster order
+                    'Burrier_Lance': 'https://www.tfrrs.org//athletes/7791525/Moravian/Lance_Burrier.html'}
+    store.save_roster('PA', 'Moravian', 'm', '2022_Outdoor', roster, athlete_urls)
+    rows = store.db.execute('SELECT athletes.tfrrs_id FROM roster LEFT JOIN athletes ON athletes.id = roster.athlete_id ORDER BY position')
+    assert [tfrrs_id for tfrrs_id, in rows] == ['7791525', None, '7791526']
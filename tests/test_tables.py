@@ -0,0 +1,43 @@
+from bs4 import BeautifulSoup
+from src.tables import get_table_data, read_table, clean_cell, remove_whitespace
+
+table_html = '''
+<table>
+  <thead><tr><th>PL</th><th>NAME</th><th>MARK</th></tr></thead>
+  <tbody>
+    <tr><td>1</td><td>
+      <a href="/athletes/1.html">Mastro, Shane</a><!-- a comment -->
+    </td><td>14.12m\xa0
+</td></tr>
+    <tr><td colspan="2">13.50 14.12 FOUL</td></tr>
+    <tr><td>2</td><td>Jones,           Tim</td><td>"13.80m"</td></tr>
+  </tbody>
+</table>
+'''
+
+def old_clean_cell(text):
+    return text.replace('\xa0\n', '').replace('\n',' ').replace('           ', ' ').strip('\\"').strip()
+
+def test_clean_cell_matches_old_replace_chain():
+    for text in ['1', '\n   Gray, Trevor\n  ', '14.12m\xa0\n', 'a\n          b', '"4:05.12"', '\\"x\\"', '  \n\n', 'a' + ' ' * 23 + 'b']:
+        assert clean_cell(text) == old_clean_cell(text)
+
+def test_get_table_data_rows():
+    table = BeautifulSoup(table_html, 'html.parser').find('table')
+    assert get_table_data(table) == [{},
+                                     {'pl': '1', 'name': 'Mastro, Shane', 'mark': '14.12m'},
+                                     {'pl': '13.50 14.12 FOUL'},
+                                     {'pl': '2', 'name': 'Jones, Tim', 'mark': '13.80m'}]
+    assert get_table_data(table, same_size=True)[1]['name'] == 'Jones, Tim'
+    assert len(get_table_data(table, same_size=True)) == 2
+
+def test_get_table_data_compact():
+    table = BeautifulSoup(table_html, 'html.parser').find('table')
+    assert get_table_data(table, ['place', 'athlete', 'mark'], same_size=True, compact=True) == {
+        'headers': ['place', 'athlete', 'mark'],
+        'rows': [('1', 'Mastro, Shane', '14.12m'), ('2', 'Jones, Tim', '13.80m')]}
+    keys, rows = read_table(table)
+    assert keys == ['pl', 'name', 'mark'] and rows[0] == ()
+
+def test_remove_whitespace():
+    assert remove_whitespace(' Gray,\n\tTrevor ') == 'Gray,Trevor'
@@ -0,0 +1,64 @@
+import requests
+import pytest
+from src.transport import Transport, RateLimiter, UpstreamException
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class Response:
+    def __init__(self, status_code, content=b''):
+        self.status_code = status_code
+        self.content = content
+
+class Session:
+    """
+    Stand-in requests session that plays back a list of responses (or exceptions to raise).
+    """
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append((url, timeout))
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+def test_rate_limiter_waits_for_tokens():
+    clock = Clock()
+    limiter = RateLimiter(2, burst=2, clock=clock, sleep=clock.sleep)
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(0.5) # bucket is empty, the next token comes in half a second
+    clock.now += 10
+    assert limiter.acquire() == 0
+
+def test_transport_retries_server_errors():
+    waits = []
+    session = Session([Response(503), requests.ConnectionError(), Response(200, b'<html></html>')])
+    transport = Transport(session=session, rate=None, connect_timeout=1, read_timeout=2, backoff=0.5, sleep=waits.append)
+    assert transport.get('https://www.tfrrs.org/') == b'<html></html>'
+    assert waits == [0.5, 1.0]
+    assert session.calls[0] == ('https://www.tfrrs.org/', (1, 2))
+
+def test_transport_gives_up():
+    session = Session([Response(500), requests.Timeout()])
+    transport = Transport(session=session, rate=None, retries=1, sleep=lambda seconds: None)
+    with pytest.raises(UpstreamException) as exc:
+        transport.get('https://www.tfrrs.org/')
+    assert 'Timeout' in str(exc.value)
+
+def test_transport_returns_client_errors():
+    session = Session([Response(404, b'not found')])
+    transport = Transport(session=session, rate=None)
+    assert transport.get('https://www.tfrrs.org/athletes/1.html') == b'not found'
+    assert len(session.calls) == 1